@@ -0,0 +1,74 @@
+"""
+Precisión vs. costo de cada estrategia de extracción.
+Corre las estrategias de LLMHelper (gpt-4o / gpt-4o-mini, con y sin reglas) y
+los extractores deterministas (selectores del DOM, regex) sobre el golden set
+(benchmarks/golden/) y reporta precisión/recall por campo, latencia y costo.
+
+    python3 accuracy_benchmark.py --seed                      # Sembrar el golden set desde output/
+    python3 accuracy_benchmark.py                             # Todas las estrategias
+    python3 accuracy_benchmark.py --strategy rules --strategy llm:gpt-4o-mini --verified-only
+"""
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_all_scrapers import SCRAPERS_CONFIG
+from utils.llm_helper import LLMHelper
+from utils.extraction_eval import seed_golden, load_golden, evaluate, format_report
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Precisión/recall vs. costo de las estrategias de extracción')
+    parser.add_argument('--golden', default=os.path.join(BENCHMARK_DIR, "golden"), help='Directorio del golden set (default benchmarks/golden)')
+    parser.add_argument('--seed', action='store_true', help='Sembrar el golden set desde output/*_database.csv y output/archive/ y salir')
+    parser.add_argument('--per-site', type=int, default=20, help='Cursos por sitio al sembrar (default 20)')
+    parser.add_argument('--site', action='append', default=None, help='Solo muestras de este sitio (dir_name, repetible)')
+    parser.add_argument('--strategy', action='append', default=None,
+                        help='Estrategia a correr (ej. rules, selectors, llm:gpt-4o, html:rules; repetible; default todas)')
+    parser.add_argument('--verified-only', action='store_true', help='Solo muestras revisadas a mano (verified: true)')
+    parser.add_argument('--limit', type=int, default=None, help='Máximo de muestras por tipo (html/pdf)')
+    args = parser.parse_args()
+
+    if args.seed:
+        counts = seed_golden(SCRAPERS_CONFIG, golden_dir=args.golden, per_site=args.per_site)
+        if not counts:
+            print("❌ No hay cursos con HTML archivado: corre run_all_scrapers.py sin --no-archive primero")
+            sys.exit(1)
+        for site, count in sorted(counts.items()):
+            print(f"   🏷️  {site}: {count} cursos")
+        print(f"✅ Golden set en {args.golden} (etiquetas sin verificar: revísalas y marca verified: true)")
+        sys.exit(0)
+
+    samples = load_golden(args.golden)
+    if args.site:
+        samples = [sample for sample in samples if sample["site"] in args.site]
+    if args.verified_only:
+        samples = [sample for sample in samples if sample.get("verified")]
+    if args.limit:
+        limited, per_kind = [], {}
+        for sample in samples:
+            per_kind[sample["kind"]] = per_kind.get(sample["kind"], 0) + 1
+            if per_kind[sample["kind"]] <= args.limit:
+                limited.append(sample)
+        samples = limited
+    if not samples:
+        print(f"❌ Golden set vacío en {args.golden}. Siémbralo con: python3 accuracy_benchmark.py --seed")
+        sys.exit(1)
+
+    verified = sum(1 for sample in samples if sample.get("verified"))
+    print(f"🎯 {len(samples)} muestras ({verified} verificadas a mano)")
+    helper = LLMHelper(site="golden_set")
+    report = evaluate(samples, helper, golden_dir=args.golden, selected=args.strategy)
+    print(format_report(report))
+
+    if not os.path.exists(RESULTS_DIR):
+        os.makedirs(RESULTS_DIR)
+    results_file = os.path.join(RESULTS_DIR, f"accuracy_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(results_file, 'w') as f:
+        json.dump({"samples": len(samples), "verified": verified, "report": report}, f, indent=2)
+    print(f"\n💾 Resultados: {results_file}")
@@ -0,0 +1,246 @@
+"""
+Benchmark offline de punta a punta.
+Corre el scraper contra los sitios grabados (benchmarks/fixtures/, servidos
+localmente por utils/fixture_server.py) y un endpoint OpenAI simulado
+(utils/fake_openai.py), sin red. Reporta por sitio: páginas/s, llamadas LLM y
+tokens por curso, pico de RSS y tiempo total, y compara con un baseline.
+
+    python3 benchmark.py --record 20260118_150258     # Grabar fixtures desde output/archive/RUN
+    python3 benchmark.py --synthetic                  # (Re)generar el sitio sintético de benchmarks/fixtures/
+    python3 benchmark.py                              # Correr y comparar con benchmarks/baseline.json
+    python3 benchmark.py --save-baseline              # Fijar el resultado como nuevo baseline
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import resource
+import argparse
+import tempfile
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_all_scrapers import SCRAPERS_CONFIG
+from scrapers.enhanced_universal_scraper import EnhancedUniversalScraper
+from utils.browser_pool import BrowserPool
+from utils.politeness import get_scheduler
+from utils.llm_governor import configure_governor
+from utils.llm_usage import configure_usage_log
+from utils.spans import configure_spans
+from utils.course_store import configure_course_store
+from utils.fixture_server import FixtureServer, record_fixtures, synthetic_fixtures
+from utils.fake_openai import FakeOpenAIServer
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+# Métrica → True si más alto es mejor
+METRICS = {
+    "pages_per_sec": True,
+    "courses": True,
+    "wall_seconds": False,
+    "llm_calls_per_course": False,
+    "tokens_per_course": False,
+    "browser_peak_mb": False,
+}
+
+
+def process_peak_mb():
+    """Pico de RSS de todo el proceso hasta ahora (ru_maxrss no se reinicia: no es por sitio)."""
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_site(manifest, server, browser_pool, usage_log, spans, llm_workers, course_store):
+    site = manifest["site"]
+    scraper = EnhancedUniversalScraper(
+        site_name=manifest["name"],
+        catalog_url=server.local_url(manifest["catalog_url"]),
+        download_dir_name=site,
+        max_pagination=manifest.get("max_pages", 10),
+        llm_workers=llm_workers,
+        browser_pool=browser_pool,
+        course_store=course_store,
+    )
+    start = time.time()
+    scraper.parse_catalog()
+    scraper.save_data()
+    wall = time.time() - start
+
+    stats = spans.stats()
+    pages = sum(stats.get((site, phase), {}).get("count", 0) for phase in ("catalog_goto", "course_goto"))
+    llm = usage_log.report()["by_site"].get(site, {}).get("total", {})
+    courses = len(scraper.data)
+    tokens = llm.get("prompt_tokens", 0) + llm.get("completion_tokens", 0)
+    return {
+        "courses": courses,
+        "pages": pages,
+        "wall_seconds": round(wall, 2),
+        "pages_per_sec": round(pages / wall, 3) if wall else 0.0,
+        "llm_calls": llm.get("calls", 0),
+        "llm_calls_per_course": round(llm.get("calls", 0) / courses, 3) if courses else None,
+        "tokens_per_course": round(tokens / courses, 1) if courses else None,
+        "browser_peak_mb": round(scraper.memory_watchdog.peak_bytes / 1024 / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Devuelve [(sitio, métrica, baseline, actual, cambio relativo)] de las regresiones."""
+    regressions = []
+    print(f"\n📏 Comparación con baseline ({baseline.get('run_id', '?')}, tolerancia {tolerance * 100:.0f}%):")
+    for site, metrics in sorted(results["sites"].items()):
+        base = baseline.get("sites", {}).get(site)
+        if not base:
+            print(f"   ➕ {site}: sin baseline")
+            continue
+        for metric, higher_is_better in METRICS.items():
+            current, previous = metrics.get(metric), base.get(metric)
+            if current is None or not previous:
+                continue
+            change = (current - previous) / previous
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                regressions.append((site, metric, previous, current, change))
+                icon = "🔴"
+            elif worse < -tolerance:
+                icon = "🟢"
+            else:
+                continue
+            print(f"   {icon} {site:<28} {metric:<22} {previous:>10} → {current:<10} ({change * 100:+.0f}%)")
+    current, previous = results.get("process_peak_mb"), baseline.get("process_peak_mb")
+    if current and previous and (current - previous) / previous > tolerance:
+        change = (current - previous) / previous
+        regressions.append(("(proceso)", "process_peak_mb", previous, current, change))
+        print(f"   🔴 {'(proceso)':<28} {'process_peak_mb':<22} {previous:>10} → {current:<10} ({change * 100:+.0f}%)")
+    if not regressions:
+        print(f"   ✅ Sin regresiones")
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'sitio':<28} {'cursos':>6} {'págs/s':>7} {'LLM/curso':>9} {'tokens/curso':>12} "
+          f"{'RSS nav':>8} {'tiempo':>8}")
+    for site, m in sorted(results["sites"].items()):
+        per_course = m["llm_calls_per_course"] if m["llm_calls_per_course"] is not None else "-"
+        tokens = m["tokens_per_course"] if m["tokens_per_course"] is not None else "-"
+        print(f"{site:<28} {m['courses']:>6} {m['pages_per_sec']:>7} {per_course:>9} {tokens:>12} "
+              f"{m['browser_peak_mb']:>7}M {m['wall_seconds']:>7}s")
+    print(f"🐍 Pico de RSS del proceso (todos los sitios): {results.get('process_peak_mb')}M")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark offline del scraper (fixtures locales + OpenAI simulado)')
+    parser.add_argument('--record', metavar='RUN', default=None, help='Grabar fixtures desde output/archive/RUN y salir')
+    parser.add_argument('--synthetic', action='store_true', help='Escribir el sitio sintético en --fixtures y salir')
+    parser.add_argument('--fixtures', default=os.path.join(BENCHMARK_DIR, "fixtures"), help='Directorio de fixtures (default benchmarks/fixtures)')
+    parser.add_argument('--site', action='append', default=None, help='Sitio a correr (dir_name, repetible; default todos)')
+    parser.add_argument('--page-latency', type=float, default=0.0, help='Segundos de latencia por petición a los fixtures')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='Latencia media del OpenAI simulado (default 0.5s)')
+    parser.add_argument('--llm-jitter', type=float, default=0.2, help='Variación de la latencia LLM (default ±0.2s)')
+    parser.add_argument('--llm-429-rate', type=float, default=0.0, help='Fracción de llamadas LLM que responden 429')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla de latencias y 429 (corridas reproducibles)')
+    parser.add_argument('--llm-workers', type=int, default=4, help='Llamadas LLM en paralelo por sitio')
+    parser.add_argument('--max-contexts', type=int, default=4, help='Contextos de navegador a la vez')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Archivo de baseline a comparar')
+    parser.add_argument('--save-baseline', action='store_true', help='Guardar este resultado como baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Cambio relativo tolerado antes de marcar regresión (default 0.15)')
+    parser.add_argument('--keep-workdir', action='store_true', help='No borrar el directorio de trabajo temporal')
+    args = parser.parse_args()
+
+    fixtures_dir = os.path.abspath(args.fixtures)
+    if args.record:
+        recorded = record_fixtures(args.record, SCRAPERS_CONFIG, fixtures_dir)
+        if not recorded:
+            print(f"❌ Ningún sitio de SCRAPERS_CONFIG en output/archive/{args.record}")
+            sys.exit(1)
+        for site, count in sorted(recorded.items()):
+            print(f"   🗂️  {site}: {count} recursos")
+        print(f"✅ Fixtures grabados en {fixtures_dir}")
+        sys.exit(0)
+    if args.synthetic:
+        count = synthetic_fixtures(fixtures_dir)
+        print(f"✅ Sitio sintético: {count} recursos en {fixtures_dir}")
+        sys.exit(0)
+
+    server = FixtureServer(fixtures_dir, latency=args.page_latency)
+    manifests = server.manifests
+    if args.site:
+        manifests = {site: m for site, m in manifests.items() if site in args.site}
+    if not manifests:
+        print(f"❌ No hay fixtures en {fixtures_dir}. Grábalos con: python3 benchmark.py --record RUN (o --synthetic)")
+        sys.exit(1)
+
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    fake_llm = FakeOpenAIServer(latency=args.llm_latency, jitter=args.llm_jitter,
+                                rate_limit_rate=args.llm_429_rate, seed=args.seed)
+    server.start()
+    fake_llm.start()
+    os.environ["OPENAI_BASE_URL"] = fake_llm.base_url
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+
+    # Todo el estado (output/, cachés, descargas) va a un directorio temporal: cada corrida arranca en frío
+    original_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="scraper_benchmark_")
+    os.chdir(workdir)
+    print(f"🏁 Benchmark {run_id}: {len(manifests)} sitios | trabajo en {workdir}")
+
+    configure_governor(max_rpm=100000, max_tpm=10 ** 9, run_key=f"benchmark_{run_id}")
+    usage_log = configure_usage_log(run_id=run_id, live_every=0)
+    spans = configure_spans(run_id=run_id)
+    course_store = configure_course_store(run_id=run_id)
+    scheduler = get_scheduler()
+    scheduler.respect_robots = False
+    for manifest in manifests.values():
+        # Los fixtures son locales: la cortesía por dominio no debe dominar la medición
+        scheduler.configure(server.local_url(manifest["catalog_url"]), rate=1000, burst=1000, concurrency=16)
+    # Chromium no resuelve ningún host fuera de los fixtures (imágenes, CDNs, analytics)
+    browser_pool = BrowserPool(max_contexts=args.max_contexts,
+                               launch_args=[f"--host-resolver-rules=MAP * ~NOTFOUND , EXCLUDE {server.bind}"])
+
+    results = {"run_id": run_id, "sites": {}, "config": {
+        "llm_latency": args.llm_latency, "llm_jitter": args.llm_jitter, "llm_429_rate": args.llm_429_rate,
+        "page_latency": args.page_latency, "llm_workers": args.llm_workers, "seed": args.seed,
+    }}
+    try:
+        for site, manifest in manifests.items():
+            print(f"\n{'='*80}\n🎯 {manifest['name']} ({site})\n{'='*80}")
+            try:
+                results["sites"][site] = run_site(manifest, server, browser_pool, usage_log, spans, args.llm_workers,
+                                                  course_store)
+            except Exception as e:
+                print(f"❌ Error en {site}: {e}")
+    finally:
+        browser_pool.close()
+        server.close()
+        fake_llm.close()
+        os.chdir(original_cwd)
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results["process_peak_mb"] = round(process_peak_mb(), 1)
+    results["llm"] = {"calls": fake_llm.calls, "rate_limited": fake_llm.rate_limited,
+                      "tokens": fake_llm.prompt_tokens + fake_llm.completion_tokens}
+    print(f"\n{server.summary()}")
+    print(fake_llm.summary())
+    print_results(results)
+
+    if not os.path.exists(RESULTS_DIR):
+        os.makedirs(RESULTS_DIR)
+    results_file = os.path.join(RESULTS_DIR, f"benchmark_{run_id}.json")
+    with open(results_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Resultados: {results_file}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline actualizado: {args.baseline}")
+        sys.exit(0)
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        sys.exit(1 if regressions else 0)
+    print(f"💡 Sin baseline: fíjalo con --save-baseline")
@@ -68,7 +68,7 @@ if [[ $REPLY =~ ^[Yy]$ ]]; then
     echo ""
     echo "📁 Archivos generados:"
     echo "   • output/*_database.csv (CSVs individuales por plataforma)"
-    echo "   • output/MASTER_courses_database_*.csv (CSV consolidado)"
+    echo "   • output/MASTER_courses_database.csv (CSV consolidado, exportado de output/courses.db)"
     echo ""
     echo "👀 Revisa la carpeta 'output/' para ver los resultados"
     
@@ -1,10 +1,8 @@
-from playwright.sync_api import sync_playwright
+from utils.browser_pool import get_browser_pool
 
 url = "https://www.datascience.pe/lista-cursos"
 
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=True)
-    page = browser.new_page()
+with get_browser_pool().page() as page:
     page.goto(url)
     try:
         page.wait_for_load_state("networkidle")
@@ -31,5 +29,3 @@ with sync_playwright() as p:
 
     except Exception as e:
         print(e)
-    finally:
-        browser.close()
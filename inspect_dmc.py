@@ -1,11 +1,9 @@
-from playwright.sync_api import sync_playwright
+from utils.browser_pool import get_browser_pool
 import time
 
 url = "https://dmc.pe/cursos/"
 
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=True)
-    page = browser.new_page()
+with get_browser_pool().page() as page:
     try:
         print(f"Navigating to {url}...")
         page.goto(url, timeout=60000)
@@ -46,5 +44,3 @@ with sync_playwright() as p:
 
     except Exception as e:
         print(f"Error: {e}")
-    finally:
-        browser.close()
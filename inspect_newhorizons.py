@@ -1,13 +1,11 @@
-from playwright.sync_api import sync_playwright
+from utils.browser_pool import get_browser_pool
 
 urls = [
     "https://www.newhorizons.edu.pe/",
     "https://www.newhorizons.edu.pe/cursos-y-certificaciones-internacionales/cloud/az-204t00-a-developing-solutions-for-microsoft-azure"
 ]
 
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=True)
-    page = browser.new_page()
+with get_browser_pool().page() as page:
     
     # 1. Check home/catalog
     print("=== Checking Home Page ===")
@@ -47,5 +45,3 @@ with sync_playwright() as p:
     # Check for price
     price_text = page.get_by_text("S/", exact=False).all()
     print(f"Found {len(price_text)} elements with 'S/'")
-    
-    browser.close()
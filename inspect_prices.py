@@ -1,10 +1,8 @@
-from playwright.sync_api import sync_playwright
+from utils.browser_pool import get_browser_pool
 
 url = "https://www.datascience.pe/lista-cursos"
 
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=True)
-    page = browser.new_page()
+with get_browser_pool().page() as page:
     try:
         page.goto(url)
         # Wait for dynamic content
@@ -38,5 +36,3 @@ with sync_playwright() as p:
             
     except Exception as e:
         print(f"Error: {e}")
-    finally:
-        browser.close()
@@ -4,13 +4,32 @@ Genera CSVs individuales + un CSV consolidado homologado.
 """
 import sys
 import os
-import pandas as pd
+import time
 from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scrapers.enhanced_universal_scraper import EnhancedUniversalScraper
+from utils.brochure_store import BrochureStore
+from utils.browser_pool import BrowserPool
+from utils.politeness import get_scheduler, interleave_by_host
+from utils.llm_governor import configure_governor
+from utils.llm_usage import configure_usage_log
+from utils.spans import configure_spans
+from utils.profiling import Profiler, MODES as PROFILE_MODES
+from contextlib import nullcontext
+from utils.page_archive import ArchiveReader
+from utils.frontier import STATE_DONE, STATE_FAILED
+from utils.run_history import RunHistory, format_regressions, MODE_FULL, MODE_TEST, MODE_RESUMED
+from utils.status import configure_status
+from utils.course_store import get_course_store, configure_course_store
 
 # ============= CONFIGURACIÓN DE TODOS LOS SITIOS =============
+# Claves opcionales por sitio:
+#   max_zero_yield_pages: páginas seguidas sin cursos nuevos (o repetidas) antes de cortar la paginación (default 2)
+#   max_minutes / max_llm_usd: presupuesto del sitio (default --site-max-minutes / --site-max-llm-usd)
+#   breaker_failures: fallos seguidos que abren el circuito del sitio (default 5)
+#   host_rate / host_burst / host_concurrency: límites del dominio (req/s, ráfaga, en vuelo; default 1.0 / 3 / 2).
+#     Se aplican por dominio registrado: los tres sitios PUCP comparten "pucp.edu.pe" y queda el más estricto.
 SCRAPERS_CONFIG = [
     # === Sitios ya implementados (ahora con enhanced scraper) ===
     {
@@ -96,12 +115,16 @@ SCRAPERS_CONFIG = [
 ]
 
 def consolidate_csvs():
-    """Consolida todos los CSVs individuales en uno solo homologado."""
+    """
+    Exporta el CSV (y Parquet) maestro homologado desde el almacén de cursos.
+    Los scrapers ya hicieron upsert de cada fila: aquí no se reconstruye nada.
+    Los sitios que aún no están en el almacén se cargan una vez desde su CSV.
+    """
     output_dir = "output"
-    all_data = []
+    store = get_course_store()
     
     print("\n" + "="*80)
-    print("📊 CONSOLIDANDO CSVs...")
+    print("📊 CONSOLIDANDO CURSOS...")
     print("="*80)
     
     for config in SCRAPERS_CONFIG:
@@ -112,55 +135,28 @@ def consolidate_csvs():
         sanitized_name = re.sub(r'_+', '_', sanitized_name).strip('_')
         
         csv_file = f"{output_dir}/{sanitized_name}_database.csv"
+        count = store.count(site=config['dir_name'])
         
-        if os.path.exists(csv_file):
+        if count == 0 and os.path.exists(csv_file):
             try:
-                df = pd.read_csv(csv_file)
-                if len(df) == 0:
-                    print(f"⚠️  Vacío: {config['name']}")
-                    continue
-                    
-                # Asegurar que tenga la columna source_site
-                if 'source_site' not in df.columns:
-                    df['source_site'] = config['name']
-                
-                print(f"✓ {config['name']}: {len(df)} cursos")
-                all_data.append(df)
+                count = store.import_csv(config['dir_name'], csv_file)
+                print(f"✓ {config['name']}: {count} cursos (importados de {csv_file})")
             except Exception as e:
                 print(f"⚠️  Error leyendo {csv_file}: {e}")
+        elif count:
+            print(f"✓ {config['name']}: {count} cursos")
         else:
-            print(f"⚠️  No encontrado: {csv_file}")
+            print(f"⚠️  Sin cursos: {config['name']}")
     
-    if all_data:
-        # Combinar todos
-        consolidated_df = pd.concat(all_data, ignore_index=True)
-        
-        # Homologar columnas (asegurar orden consistente)
-        standard_columns = [
-            'source_site', 'course_name', 'course_type', 'price_raw', 
-            'price_currency', 'price_original', 'duration', 'start_date',
-            'instructor', 'modality', 'certification', 'methodology', 
-            'content', 'url', 'brochure_url'
-        ]
-        
-        # Agregar columnas faltantes con N/A
-        for col in standard_columns:
-            if col not in consolidated_df.columns:
-                consolidated_df[col] = 'N/A'
-        
-        # Reordenar
-        consolidated_df = consolidated_df[standard_columns]
-        
-        # Eliminar duplicados por URL
-        consolidated_df = consolidated_df.drop_duplicates(subset=['url'], keep='first')
-        
-        # Guardar
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        consolidated_file = f"{output_dir}/MASTER_courses_database_{timestamp}.csv"
-        consolidated_df.to_csv(consolidated_file, index=False, encoding='utf-8-sig')
+    # Vista maestra: columnas homologadas, un curso por URL canónica
+    consolidated_df = store.master_frame()
+    if len(consolidated_df):
+        consolidated_file = store.export_csv(f"{output_dir}/MASTER_courses_database.csv", consolidated_df)
+        parquet_file = store.export_parquet(f"{output_dir}/MASTER_courses_database.parquet", consolidated_df)
         
         print(f"\n✅ CSV CONSOLIDADO CREADO:")
-        print(f"   📁 {consolidated_file}")
+        print(f"   📁 {consolidated_file}" + (f" (+ {parquet_file})" if parquet_file else ""))
+        print(f"   🗃️  Almacén: {store.db_file}")
         print(f"   📊 Total de cursos únicos: {len(consolidated_df)}")
         print(f"   🏢 Plataformas: {consolidated_df['source_site'].nunique()}")
         
@@ -172,9 +168,33 @@ def consolidate_csvs():
         
         return consolidated_file
     else:
-        print("\n❌ No se encontraron CSVs para consolidar")
+        print("\n❌ No hay cursos para consolidar")
         return None
 
+def run_replay(run_id, site_index=None, max_workers=8):
+    """Re-extrae todos los sitios (o uno) desde el archivo crudo de una ejecución."""
+    from scrapers.replay_scraper import ArchiveReplayScraper
+    
+    try:
+        archived_sites = ArchiveReader(run_id).sites()
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
+    configs = SCRAPERS_CONFIG if site_index is None else [SCRAPERS_CONFIG[site_index]]
+    for config in configs:
+        if config['dir_name'] not in archived_sites:
+            print(f"⏭️  {config['name']}: sin páginas archivadas en {run_id}")
+            continue
+        scraper = ArchiveReplayScraper(
+            site_name=config['name'],
+            download_dir_name=config['dir_name'],
+            run_id=run_id,
+            max_workers=max_workers
+        )
+        scraper.parse_catalog()
+        scraper.save_data()
+
 if __name__ == "__main__":
     import argparse
     import json
@@ -185,18 +205,45 @@ if __name__ == "__main__":
     parser.add_argument('--consolidate-only', action='store_true', help='Solo consolidar CSVs existentes')
     parser.add_argument('--resume', action='store_true', help='Reanudar desde el último checkpoint')
     parser.add_argument('--test', action='store_true', help='MODO PRUEBA: Solo 2 cursos por sitio')
+    parser.add_argument('--force-refresh', action='store_true', help='Re-extraer todos los cursos aunque no hayan cambiado')
+    parser.add_argument('--rediscover', action='store_true', help='Forzar el descubrimiento de catálogo (ignorar la caché de la fase 1)')
+    parser.add_argument('--discovery-ttl-hours', type=float, default=24, help='Horas que vale la caché de cursos descubiertos (default 24)')
+    parser.add_argument('--no-archive', action='store_true', help='No guardar el archivo crudo de páginas de esta ejecución')
+    parser.add_argument('--replay', metavar='RUN', default=None, help='Re-extraer offline desde output/archive/RUN (sin navegador ni red)')
+    parser.add_argument('--replay-workers', type=int, default=8, help='Extracciones en paralelo durante --replay (default 8)')
+    parser.add_argument('--llm-workers', type=int, default=4, help='Llamadas LLM en paralelo por sitio (etapa extract del pipeline)')
+    parser.add_argument('--browser-endpoint', default=None, help='Conectarse por CDP a un navegador compartido (ej. http://localhost:9222, ver utils/browser_pool.py --serve)')
+    parser.add_argument('--max-contexts', type=int, default=4, help='Contextos de navegador abiertos a la vez (default 4)')
+    parser.add_argument('--recycle-pages', type=int, default=200, help='Cursos por contexto de navegador antes de reciclarlo (default 200)')
+    parser.add_argument('--max-browser-mb', type=int, default=2048, help='RSS del navegador que fuerza relanzarlo (MB, default 2048)')
+    parser.add_argument('--site-max-minutes', type=float, default=None, help='Tiempo máximo por sitio en minutos (el resto conserva su fila anterior)')
+    parser.add_argument('--site-max-llm-usd', type=float, default=None, help='Gasto LLM máximo por sitio en USD')
+    parser.add_argument('--llm-rpm', type=int, default=500, help='Llamadas LLM por minuto (todos los procesos, default 500)')
+    parser.add_argument('--llm-tpm', type=int, default=200000, help='Tokens LLM por minuto (todos los procesos, default 200000)')
+    parser.add_argument('--llm-max-usd', type=float, default=None, help='Gasto LLM máximo de la ejecución en USD (al llegar: checkpoint y parada)')
+    parser.add_argument('--llm-run-key', default=None, help='Clave de ejecución compartida por varios procesos para el tope de gasto')
+    parser.add_argument('--profile', nargs='?', const='sample', choices=PROFILE_MODES, default=None,
+                        help='Perfilar cada sitio (sample = muestreo de pilas, cprofile = determinista); artefactos en output/profiles/RUN/')
+    parser.add_argument('--profile-interval', type=float, default=0.005, help='Segundos entre muestras con --profile sample (default 0.005)')
+    parser.add_argument('--status-port', type=int, default=None, help='Servir el estado en vivo en http://localhost:PORT/status (además de output/status.json)')
+    parser.add_argument('--status-interval', type=float, default=5, help='Segundos entre reescrituras de output/status.json (default 5)')
+    parser.add_argument('--capture-slow', action='store_true', help='Guardar traza de Playwright + HAR de las páginas de curso atípicas (> p95 del sitio) o fallidas en output/slow_pages/')
+    parser.add_argument('--capture-percentile', type=float, default=0.95, help='Percentil de carga del sitio que marca una página como atípica (default 0.95)')
+    parser.add_argument('--capture-floor', type=float, default=20, help='Segundos mínimos para considerar lenta una carga (default 20)')
+    parser.add_argument('--capture-sample-rate', type=float, default=0.25, help='Fracción de páginas que se cargan con traza de Playwright (default 0.25; el HAR se toma siempre)')
+    parser.add_argument('--capture-max', type=int, default=10, help='Capturas máximas por sitio y ejecución (default 10)')
+    parser.add_argument('--capture-max-mb', type=int, default=500, help='Tope de output/slow_pages en MB (borra las capturas más viejas, default 500)')
+    parser.add_argument('--brochure-max-mb', type=int, default=None, help='Tamaño máximo del almacén de brochures (MB, desaloja los menos usados)')
     
     args = parser.parse_args()
     
     # Archivo de checkpoint para resiliencia
     checkpoint_file = "output/.scraping_checkpoint.json"
     
-    if args.consolidate_only:
-        consolidate_csvs()
-        sys.exit(0)
-    
     sites_to_scrape = []
     completed_sites = []
+    resume_key = None  # Corrida que se reanuda (la frontera de cada sitio solo reanuda esa)
+    llm_run_key = args.llm_run_key
     
     # Cargar checkpoint si existe y se solicita resume
     if args.resume and os.path.exists(checkpoint_file):
@@ -204,12 +251,28 @@ if __name__ == "__main__":
             with open(checkpoint_file, 'r') as f:
                 checkpoint = json.load(f)
                 completed_sites = checkpoint.get('completed', [])
+                resume_key = checkpoint.get('run_key')
+                # El tope de gasto sigue contando lo de la corrida interrumpida
+                llm_run_key = llm_run_key or checkpoint.get('llm_run_key')
                 print(f"\n♻️  MODO RESUME: {len(completed_sites)} sitios ya completados")
                 for site in completed_sites:
                     print(f"   ✓ {site}")
         except:
             pass
     
+    # Límites LLM de la ejecución (compartidos con otros procesos vía output/llm_governor.db)
+    governor = configure_governor(max_rpm=args.llm_rpm, max_tpm=args.llm_tpm,
+                                  max_usd=args.llm_max_usd, run_key=llm_run_key)
+    
+    if args.consolidate_only:
+        consolidate_csvs()
+        sys.exit(0)
+    
+    if args.replay:
+        run_replay(args.replay, args.site, args.replay_workers)
+        consolidate_csvs()
+        sys.exit(0)
+    
     if args.all:
         sites_to_scrape = SCRAPERS_CONFIG
         
@@ -222,6 +285,8 @@ if __name__ == "__main__":
             print(f"\n🚀 MODO COMPLETO: Scrapeando {len(SCRAPERS_CONFIG)} plataformas")
             print("⏱️  Tiempo estimado: 6-12 horas (max_pages=30)")
             print("💰 Llamadas LLM estimadas: ~3000-8000 (GPT-4o)")
+            if args.llm_max_usd:
+                print(f"💸 Tope de gasto LLM: ${args.llm_max_usd:.2f} (--llm-max-usd)")
             print("🎯 Objetivo: Benchmarking para DMC - Máxima cobertura")
         
         if completed_sites:
@@ -252,6 +317,40 @@ if __name__ == "__main__":
     
     # ========== EJECUCIÓN DE SCRAPERS ==========
     total_courses = 0
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    resume_key = resume_key or run_id
+    usage_log = configure_usage_log(run_id=run_id)  # Cada llamada LLM → output/llm_calls.jsonl
+    spans = configure_spans(run_id=run_id)  # Tiempos por fase → output/events.jsonl + output/metrics.prom
+    run_history = RunHistory()  # Registro por sitio → output/run_history.jsonl
+    course_store = configure_course_store(run_id=run_id)  # Upsert de cada curso → output/courses.db
+    # Estado en vivo: fase, frontera, ritmo, ETA y gasto por sitio → output/status.json
+    run_status = configure_status(run_id=run_id, interval=args.status_interval, spend_fn=governor.spent)
+    run_status.start(port=args.status_port)
+    profiler = Profiler(run_id, mode=args.profile, interval=args.profile_interval) if args.profile else None
+    if profiler:
+        print(f"🔬 Perfilado ({args.profile}) activo: output/profiles/{run_id}/<sitio>.pstats + .collapsed")
+    # Traza + HAR de las cargas de curso atípicas → output/slow_pages/<sitio>/ (índice en index.jsonl)
+    capture_options = dict(percentile=args.capture_percentile, floor_seconds=args.capture_floor,
+                           sample_rate=args.capture_sample_rate, max_captures=args.capture_max,
+                           max_total_mb=args.capture_max_mb) if args.capture_slow else None
+    if capture_options:
+        print(f"🐢 Captura de páginas atípicas activa: output/slow_pages/ (ver con: playwright show-trace <archivo>.trace.zip)")
+    if not args.no_archive:
+        print(f"🗄️  Archivo crudo de esta ejecución: output/archive/{run_id}/ (re-extraer con --replay {run_id})")
+    change_totals = {"fresh": 0, "changed": 0, "unchanged": 0}
+    memory_peaks = {}  # sitio → pico de memoria del navegador (MB)
+    timeout_totals = {"losses": 0, "timeouts": 0, "timeout_wait": 0.0}
+    degraded_sites = []  # (sitio, motivo) de sitios cortados por circuito o presupuesto
+    max_bytes = args.brochure_max_mb * 1024 * 1024 if args.brochure_max_mb else None
+    brochure_store = BrochureStore(max_bytes=max_bytes)
+    # Un solo Chromium para todos los sitios; cada sitio recibe un contexto aislado
+    browser_pool = BrowserPool(max_contexts=args.max_contexts, endpoint=args.browser_endpoint)
+    scheduler = get_scheduler()
+    for config in sites_to_scrape:
+        scheduler.configure(config['catalog_url'], rate=config.get('host_rate'),
+                            burst=config.get('host_burst'), concurrency=config.get('host_concurrency'))
+    # Sitios del mismo dominio no van seguidos (ej. las entradas PUCP)
+    sites_to_scrape = interleave_by_host(sites_to_scrape, key=lambda config: config['catalog_url'])
     
     for idx, config in enumerate(sites_to_scrape, 1):
         # Skip si ya está completado (resume mode)
@@ -269,20 +368,83 @@ if __name__ == "__main__":
                 catalog_url=config['catalog_url'],
                 download_dir_name=config['dir_name'],
                 max_pagination=config['max_pages'],
-                max_courses=2 if args.test else None  # Limitar a 2 en modo prueba
+                max_zero_yield_pages=config.get('max_zero_yield_pages', 2),
+                max_courses=2 if args.test else None,  # Limitar a 2 en modo prueba
+                brochure_store=brochure_store,
+                resume=args.resume,
+                force_refresh=args.force_refresh,
+                discovery_ttl=args.discovery_ttl_hours * 3600,
+                rediscover=args.rediscover,
+                archive_run_id=None if args.no_archive else run_id,
+                llm_workers=args.llm_workers,
+                browser_pool=browser_pool,
+                recycle_pages=args.recycle_pages,
+                max_browser_mb=args.max_browser_mb,
+                max_minutes=config.get('max_minutes', args.site_max_minutes),
+                max_llm_usd=config.get('max_llm_usd', args.site_max_llm_usd),
+                breaker_failures=config.get('breaker_failures', 5),
+                capture_slow=capture_options,
+                resume_key=resume_key,
+                course_store=course_store
             )
             
-            scraper.parse_catalog()
-            scraper.save_data()
+            site_start = time.time()
+            with scraper.span("site"), profiler.site(config['dir_name']) if profiler else nullcontext():
+                scraper.parse_catalog()
+                scraper.save_data()
+            site_seconds = time.time() - site_start
+            spans.export_prometheus()  # Métricas al día aunque la ejecución se corte después
+            
+            if governor.exhausted:
+                # Parada ordenada: el sitio queda sin completar y la frontera guarda lo pendiente
+                with open(checkpoint_file, 'w') as f:
+                    json.dump({'completed': completed_sites, 'run_key': resume_key,
+                               'llm_run_key': governor.run_key}, f)
+                print(f"\n💸 Tope de gasto LLM alcanzado en {config['name']} ({governor.summary()})")
+                print(f"💾 Checkpoint guardado. Reanuda con: python3 run_all_scrapers.py --resume --all")
+                break
             
             courses_count = len(scraper.data)
             total_courses += courses_count
-            print(f"\n✅ {config['name']}: {courses_count} cursos extraídos")
+            for status, count in scraper.page_cache.stats.items():
+                change_totals[status] += count
+            memory_peaks[config['name']] = scraper.memory_watchdog.peak_bytes / 1024 / 1024
+            timeout_totals["losses"] += scraper.timeouts.losses
+            timeout_totals["timeouts"] += sum(scraper.timeouts.timeouts.values())
+            timeout_totals["timeout_wait"] += scraper.timeouts.timeout_wait
+            if scraper.stop_reason or scraper.breaker.trips:
+                degraded_sites.append((config['name'], scraper.stop_reason or
+                                       f"circuito abierto ({scraper.breaker.trips} aperturas, "
+                                       f"{scraper.breaker.skipped} cursos saltados)"))
+            site_stats = spans.stats()
+            site_llm = usage_log.report()["by_site"].get(config['dir_name'], {}).get("total", {})
+            frontier_counts = scraper.frontier.counts()
+            run_history.record(
+                run_id, config['name'],
+                mode=MODE_TEST if args.test else (MODE_RESUMED if scraper.resume else MODE_FULL),
+                duration_seconds=round(site_seconds, 1),
+                pages=sum(site_stats.get((config['dir_name'], phase), {}).get("count", 0)
+                          for phase in ("catalog_goto", "course_goto")),
+                courses=frontier_counts.get(STATE_DONE, 0),
+                rows=courses_count,
+                llm_calls=site_llm.get("calls", 0),
+                tokens=site_llm.get("prompt_tokens", 0) + site_llm.get("completion_tokens", 0),
+                errors=frontier_counts.get(STATE_FAILED, 0),
+                timeouts=sum(scraper.timeouts.timeouts.values()),
+            )
+            print(f"\n✅ {config['name']}: {courses_count} cursos extraídos ({scraper.page_cache.summary()})")
+            # Solo una corrida completa dice qué cursos ya no están en el catálogo
+            if scraper.course_store and not (args.test or scraper.resume or scraper.stop_reason or scraper.breaker.trips):
+                # Los que la frontera vio pero fallaron conservan su última fila
+                retired = course_store.retire_unseen(scraper.site_key, keep=scraper.frontier.urls())
+                if retired:
+                    print(f"   🪦 {retired} curso(s) que ya no aparecen se retiran de la vista maestra")
             
             # Guardar checkpoint
             completed_sites.append(config['name'])
             with open(checkpoint_file, 'w') as f:
-                json.dump({'completed': completed_sites}, f)
+                json.dump({'completed': completed_sites, 'run_key': resume_key,
+                           'llm_run_key': governor.run_key}, f)
             print(f"💾 Checkpoint guardado")
             
         except KeyboardInterrupt:
@@ -295,13 +457,39 @@ if __name__ == "__main__":
             traceback.print_exc()
             print(f"\n💡 Continuando con siguiente plataforma...")
     
+    browser_pool.close()
+    run_status.close()
+    
     # ========== CONSOLIDACIÓN FINAL ==========
     print(f"\n{'='*80}")
     print(f"✅ SCRAPING COMPLETADO")
     print(f"   Total de cursos extraídos en esta ejecución: {total_courses}")
+    print(f"   🆕 Nuevos: {change_totals['fresh']} | 🔁 Cambiados: {change_totals['changed']} | "
+          f"✔️  Sin cambios: {change_totals['unchanged']}")
+    print(f"   ⏱️  Timeouts: {timeout_totals['timeouts']} ({timeout_totals['timeout_wait']:.0f}s esperando) | "
+          f"Páginas perdidas por timeout: {timeout_totals['losses']}")
+    print(f"   {governor.summary()}")
+    print(f"   {course_store.summary()}")
+    usage_report = usage_log.export(f"output/llm_report_{run_id}.json")
+    print(f"   {usage_log.live_summary()} → {usage_report}")
+    if scheduler.summary():
+        print(scheduler.summary())
+    print(f"   ⏲️  Tiempo por fase (p50/p95) → {spans.export_prometheus()}:")
+    print(spans.summary())
+    for name, reason in degraded_sites:
+        print(f"   ⛔ {name}: {reason}")
+    regressions = run_history.compare(run_id)
+    if regressions:
+        print(f"   ⚠️  Regresiones vs. las últimas ejecuciones (python -m utils.run_history):")
+        print(format_regressions(regressions))
+    if memory_peaks:
+        print(f"   🧠 Pico de memoria del navegador por sitio:")
+        for name, peak in sorted(memory_peaks.items(), key=lambda item: -item[1]):
+            print(f"      {name:<30} {peak:7.0f} MB")
     print(f"{'='*80}")
     
-    consolidate_csvs()
+    with profiler.site("consolidate") if profiler else nullcontext():
+        consolidate_csvs()
     
     # Limpiar checkpoint si completó todo
     if len(completed_sites) == len(SCRAPERS_CONFIG) and os.path.exists(checkpoint_file):
@@ -310,7 +498,9 @@ if __name__ == "__main__":
     
     print(f"\n{'='*80}")
     print("🎉 PROCESO COMPLETO")
-    print("📁 Brochures descargados en: scrapers/downloads/")
+    stats = brochure_store.stats()
+    print(f"📁 Brochures en: {brochure_store.store_dir} "
+          f"({stats['brochures']} PDFs únicos, {stats['courses']} cursos, {stats['bytes'] / 1024 / 1024:.1f} MB)")
     print(f"{'='*80}")
 
 
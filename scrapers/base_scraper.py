@@ -1,11 +1,14 @@
 import pandas as pd
 from abc import ABC, abstractmethod
 import os
+from utils.spans import span
 
 class BaseScraper(ABC):
-    def __init__(self, source_name):
+    def __init__(self, source_name, course_store=None):
         self.source_name = source_name
+        self.site_key = source_name.lower().replace(' ', '_')  # Etiqueta en métricas y LLM
         self.data = []
+        self.course_store = course_store  # Almacén maestro (lo pasa run_all_scrapers); None = no escribir
 
     @abstractmethod
     def get_urls(self):
@@ -17,6 +20,10 @@ class BaseScraper(ABC):
         """Extract details from a specific course URL."""
         pass
 
+    def span(self, phase, **attrs):
+        """Mide una fase del scraping de este sitio (ver utils/spans.py)."""
+        return span(self.site_key, phase, **attrs)
+
     def add_item(self, item):
         """Normalize and add an item to the data list."""
         defaults = {
@@ -35,6 +42,8 @@ class BaseScraper(ABC):
         # Update defaults with actual item data
         normalized_item = {**defaults, **item}
         self.data.append(normalized_item)
+        if self.course_store is not None:
+            self.course_store.upsert(self.site_key, normalized_item)
 
     def save_data(self, output_dir="output"):
         if not os.path.exists(output_dir):
@@ -4,7 +4,7 @@ import os
 import pdfplumber
 import time
 from base_scraper import BaseScraper
-from playwright.sync_api import sync_playwright
+from utils.browser_pool import get_browser_pool
 
 class DatapathScraper(BaseScraper):
     def __init__(self):
@@ -24,19 +24,19 @@ class DatapathScraper(BaseScraper):
     def parse_catalog(self):
         print(f"Starting Playwright scraper for Datapath catalog...")
         
-        from playwright.sync_api import sync_playwright
         from utils.llm_helper import LLMHelper
+        from utils.brochure_store import BrochureStore
         
-        self.llm_helper = LLMHelper()
+        self.llm_helper = LLMHelper(site=self.site_key)
+        self.brochure_store = BrochureStore()
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        with get_browser_pool().page() as page:
             
             # 1. Crawl Catalog to find links
             catalog_url = "https://cursos.datapath.ai/"
             print(f"Navigating to catalog: {catalog_url}")
-            page.goto(catalog_url, timeout=60000)
+            with self.span("catalog_load"):
+                page.goto(catalog_url, timeout=60000)
             page.wait_for_load_state("networkidle")
             
             links = page.query_selector_all("a")
@@ -53,9 +53,8 @@ class DatapathScraper(BaseScraper):
 
             # 2. Iterate and Scrape
             for url in course_urls:
-                self.process_course_detail(page, url)
-            
-            browser.close()
+                with self.span("course"):
+                    self.process_course_detail(page, url)
 
     def process_course_detail(self, page, url):
         print(f"  Scraping: {url}")
@@ -135,9 +134,7 @@ class DatapathScraper(BaseScraper):
                     
                     download = download_info.value
                     # Clean filename
-                    safe_name = re.sub(r'[^a-zA-Z0-9]', '_', title).strip('_') + ".pdf"
-                    pdf_path = os.path.join(self.download_dir, safe_name)
-                    download.save_as(pdf_path)
+                    pdf_path = self.brochure_store.save_download(download, url)
                     print(f"    Downloaded: {pdf_path}")
                     brochure_url = "Downloaded via Form"
                 except Exception as e:
@@ -148,7 +145,7 @@ class DatapathScraper(BaseScraper):
             # PDF Extraction using LLMHelper
             pdf_info = {}
             if pdf_path and os.path.exists(pdf_path) and hasattr(self, 'llm_helper'):
-                pdf_info = self.llm_helper.extract_from_pdf(pdf_path)
+                pdf_info = self.brochure_store.extract_cached(pdf_path, self.llm_helper.extract_from_pdf)
             
             # Defaults
             start_date = pdf_info.get("start_date", "N/A")
@@ -4,7 +4,10 @@ import os
 import pdfplumber
 import time
 from base_scraper import BaseScraper
-from playwright.sync_api import sync_playwright
+from utils.browser_pool import get_browser_pool
+from utils.brochure_rules import find_duration, find_start_date
+from utils.brochure_store import BrochureStore
+from utils.brochure_fetcher import BrochureFetcher
 
 class DatascienceScraper(BaseScraper):
     def __init__(self):
@@ -13,6 +16,8 @@ class DatascienceScraper(BaseScraper):
         self.download_dir = "scrapers/downloads"
         if not os.path.exists(self.download_dir):
             os.makedirs(self.download_dir)
+        self.brochure_store = BrochureStore()
+        self.brochure_fetcher = BrochureFetcher(self.brochure_store)
 
     def get_urls(self):
         return [self.base_url]
@@ -23,16 +28,13 @@ class DatascienceScraper(BaseScraper):
     def parse_catalog(self):
         print(f"Starting Playwright scraper for: {self.base_url}")
         
-        from playwright.sync_api import sync_playwright
-        
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        with get_browser_pool().page() as page:
             
             try:
                 # 1. Count Total Cards first
                 print("Navigating to catalog to count cards...")
-                page.goto(self.base_url, timeout=60000)
+                with self.span("catalog_load"):
+                    page.goto(self.base_url, timeout=60000)
                 try:
                     page.wait_for_load_state("networkidle", timeout=30000)
                 except:
@@ -48,7 +50,8 @@ class DatascienceScraper(BaseScraper):
                     try:
                         print(f"Processing Card {i+1}/{card_count}...")
                         # Navigate fresh to catalog for each item to avoid stale handles/state
-                        page.goto(self.base_url, timeout=60000)
+                        with self.span("catalog_load"):
+                            page.goto(self.base_url, timeout=60000)
                         page.wait_for_load_state("networkidle")
                         
                         # Re-locate the card
@@ -108,7 +111,8 @@ class DatascienceScraper(BaseScraper):
                         scraped_urls.add(current_url)
                         
                         # Scrape Detail Page
-                        self.scrape_detail_page(page, current_url, title, price_current, price_original)
+                        with self.span("course"):
+                            self.scrape_detail_page(page, current_url, title, price_current, price_original)
                         
                     except Exception as e:
                         print(f"Error processing card {i}: {e}")
@@ -124,14 +128,15 @@ class DatascienceScraper(BaseScraper):
                             page.goto(e_url, timeout=60000)
                             page.wait_for_load_state("networkidle")
                             # We don't have list prices for this if it wasn't on the list
-                            self.scrape_detail_page(page, e_url, "Explicit: Data Analyst IA", "N/A", "N/A")
+                            with self.span("course"):
+                                self.scrape_detail_page(page, e_url, "Explicit: Data Analyst IA", "N/A", "N/A")
                         except Exception as e:
                             print(f"Error scraping explicit URL: {e}")
 
             except Exception as e:
                 print(f"Error in parse_catalog: {e}")
             finally:
-                browser.close()
+                self.brochure_fetcher.close()
 
     def scrape_detail_page(self, page, url, title, price_current, price_original):
         # Extract info from detail page
@@ -167,17 +172,19 @@ class DatascienceScraper(BaseScraper):
             return result;
         }""")
 
-        # Fallback duration
-        if data['duration'] == 'N/A':
+        # Fallback duration / start date (mismas reglas que los brochures)
+        if data['duration'] == 'N/A' or data['start_date'] == 'N/A':
             body_text = page.inner_text('body')
-            dur_match = re.search(r'(\d+\s*HRS\s*ACAD[ÉE]MICAS)', body_text, re.IGNORECASE)
-            if dur_match:
-                data['duration'] = dur_match.group(1)
+            if data['duration'] == 'N/A':
+                data['duration'] = find_duration(body_text) or 'N/A'
+            if data['start_date'] == 'N/A':
+                data['start_date'] = find_start_date(body_text) or 'N/A'
 
         # PDF Extraction
         pdf_info = {}
         if "drive.google.com" in data['brochure_url']:
-            pdf_path = self.download_brochure(data['brochure_url'], title)
+            with self.span("brochure"):
+                pdf_path = self.download_brochure(data['brochure_url'], url)
             if pdf_path:
                 pdf_info = self.extract_brochure_info(pdf_path)
         
@@ -202,47 +209,20 @@ class DatascienceScraper(BaseScraper):
         self.add_item(item)
         print(f"    Saved Item: {title}")
 
-    def download_brochure(self, drive_url, course_name):
-        file_id_match = re.search(r'/d/([a-zA-Z0-9_-]+)', drive_url)
-        if not file_id_match:
-            return None
-        
-        file_id = file_id_match.group(1)
-        download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
-        
-        safe_name = re.sub(r'[^a-zA-Z0-9]', '_', course_name).strip('_')
-        file_path = os.path.join(self.download_dir, f"{safe_name}.pdf")
-
-        if os.path.exists(file_path):
-            return file_path
+    def download_brochure(self, drive_url, course_url):
+        stored_path = self.brochure_store.path_for_url(course_url)
+        if stored_path:
+            return stored_path
 
         print(f"    Downloading brochure...")
-        try:
-            session = requests.Session()
-            response = session.get(download_url, stream=True)
-            for key, value in response.cookies.items():
-                if key.startswith('download_warning'):
-                    params = {'id': file_id, 'confirm': value}
-                    response = session.get(download_url, params=params, stream=True)
-                    break
-            
-            if response.status_code == 200:
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(32768):
-                        if chunk:
-                            f.write(chunk)
-                return file_path
-            return None
-        except Exception as e:
-            print(f"    Download error: {e}")
-            return None
+        return self.brochure_fetcher.fetch(drive_url, course_url)
 
     def extract_brochure_info(self, pdf_path):
         from utils.llm_helper import LLMHelper
         if not hasattr(self, 'llm_helper'):
-            self.llm_helper = LLMHelper()
+            self.llm_helper = LLMHelper(site=self.site_key)
         
-        return self.llm_helper.extract_from_pdf(pdf_path)
+        return self.brochure_store.extract_cached(pdf_path, self.llm_helper.extract_from_pdf)
 
 if __name__ == "__main__":
     scraper = DatascienceScraper()
@@ -4,8 +4,9 @@ import os
 import pdfplumber
 import time
 from base_scraper import BaseScraper
-from playwright.sync_api import sync_playwright
+from utils.browser_pool import get_browser_pool
 from utils.llm_helper import LLMHelper
+from utils.brochure_store import BrochureStore
 
 class DMCScraper(BaseScraper):
     def __init__(self):
@@ -14,7 +15,8 @@ class DMCScraper(BaseScraper):
         self.download_dir = "scrapers/downloads/dmc"
         if not os.path.exists(self.download_dir):
             os.makedirs(self.download_dir)
-        self.llm_helper = LLMHelper()
+        self.llm_helper = LLMHelper(site=self.site_key)
+        self.brochure_store = BrochureStore()
 
     def get_urls(self):
         return [self.base_url]
@@ -25,13 +27,12 @@ class DMCScraper(BaseScraper):
     def parse_catalog(self):
         print(f"Starting Playwright scraper for DMC...")
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        with get_browser_pool().page() as page:
             
             # 1. Navigate to Catalog
             print(f"Navigating to: {self.base_url}")
-            page.goto(self.base_url, timeout=60000)
+            with self.span("catalog_load"):
+                page.goto(self.base_url, timeout=60000)
             page.wait_for_load_state("networkidle")
             
             # 2. Extract Course Links
@@ -48,9 +49,8 @@ class DMCScraper(BaseScraper):
 
             # 3. Iterate
             for url in course_urls:
-                self.process_course_detail(page, url)
-            
-            browser.close()
+                with self.span("course"):
+                    self.process_course_detail(page, url)
 
     def process_course_detail(self, page, url):
         print(f"  Scraping: {url}")
@@ -128,9 +128,7 @@ class DMCScraper(BaseScraper):
                             if form_btn.is_visible(): form_btn.click()
                     
                     download = download_info.value
-                    safe_name = re.sub(r'[^a-zA-Z0-9]', '_', title).strip('_') + ".pdf"
-                    pdf_path = os.path.join(self.download_dir, safe_name)
-                    download.save_as(pdf_path)
+                    pdf_path = self.brochure_store.save_download(download, url)
                     print(f"    Downloaded: {pdf_path}")
                     brochure_url = "Downloaded via Form"
 
@@ -143,7 +141,7 @@ class DMCScraper(BaseScraper):
             # PDF Extraction
             pdf_info = {}
             if pdf_path and os.path.exists(pdf_path):
-                 pdf_info = self.llm_helper.extract_from_pdf(pdf_path)
+                 pdf_info = self.brochure_store.extract_cached(pdf_path, self.llm_helper.extract_from_pdf)
 
             item = {
                 "course_name": title,
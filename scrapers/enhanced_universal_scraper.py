@@ -6,31 +6,88 @@ import os
 import time
 import re
 import sys
+import hashlib
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scrapers.base_scraper import BaseScraper
-from playwright.sync_api import sync_playwright
+from utils.browser_pool import get_browser_pool
+from utils.memory_watch import MemoryWatchdog
+from utils.adaptive_timeouts import AdaptiveTimeouts, is_timeout_error
+from utils.circuit_breaker import CircuitBreaker, SiteBudget
+from utils.politeness import get_scheduler
+from utils.llm_governor import LLMBudgetExhausted
 from utils.llm_helper import LLMHelper
+from utils.brochure_store import BrochureStore
+from utils.brochure_fetcher import BrochureFetcher, find_direct_brochure_urls
+from utils.brochure_strategy import BrochureStrategyMemo, STRATEGY_DIRECT, STRATEGY_FORM
+from utils.frontier import CrawlFrontier, canonicalize_url, KIND_CATALOG, KIND_COURSE, STATE_DONE, STATE_PENDING
+from utils.page_cache import CoursePageCache, content_fingerprint, STATUS_UNCHANGED, STATUS_CHANGED
+from utils.page_archive import PageArchive, RECORD_CATALOG, RECORD_COURSE, RECORD_XHR, RECORD_BROCHURE, RECORD_CARRIED
+from utils.pipeline import Pipeline, Stage
+from utils.status import get_run_status, PHASE_DISCOVERY, PHASE_EXTRACTION
+from utils.slow_capture import SlowPageCapture
+
+PIPELINE_METRICS_FILE = "output/pipeline_metrics.json"
+
+# Contenedores del contenido principal (sin banners, nav ni footer) para la huella de la página
+MAIN_CONTENT_SELECTORS = ["main", "[role=main]", "article"]
+
+
+class ExtractionFailed(Exception):
+    """El LLM no devolvió datos del curso (error, sin cliente o página sin contenido útil)."""
 
 class EnhancedUniversalScraper(BaseScraper):
     """
     Versión mejorada con GPT-4o para máxima extracción.
     """
-    def __init__(self, site_name, catalog_url, download_dir_name, max_pagination=10, max_courses=None):
-        super().__init__(site_name)
+    def __init__(self, site_name, catalog_url, download_dir_name, max_pagination=10, max_courses=None,
+                 brochure_store=None, resume=False, max_zero_yield_pages=2, force_refresh=False,
+                 discovery_ttl=24 * 3600, rediscover=False, archive_run_id=None, llm_workers=4,
+                 browser_pool=None, recycle_pages=200, max_browser_mb=2048, max_minutes=None,
+                 max_llm_usd=None, breaker_failures=5, capture_slow=None, resume_key=None, course_store=None):
+        # Una muestra (--test) no actualiza el almacén maestro
+        super().__init__(site_name, course_store=None if max_courses else course_store)
         self.catalog_url = catalog_url
         self.download_dir = f"scrapers/downloads/{download_dir_name}"
         self.max_pagination = max_pagination  # Límite de páginas a scrapear
         self.max_courses = max_courses  # Límite de cursos (None = todos)
+        self.max_zero_yield_pages = max_zero_yield_pages  # Páginas seguidas sin cursos nuevos antes de parar
         
-        # Timeouts específicos por sitio (algunos necesitan más tiempo)
+        # Timeouts aprendidos de la latencia del sitio (p95 × factor, persistidos entre ejecuciones).
+        # Los sitios lentos conocidos arrancan con más margen mientras no hay historia.
         slow_sites = ["bsg", "we_educacion", "upc", "platzi"]
-        self.page_timeout = 120000 if download_dir_name in slow_sites else 90000  # 120s vs 90s
-        self.networkidle_timeout = 90000 if download_dir_name in slow_sites else 60000  # 90s vs 60s
+        cold_start = {"catalog_goto": 120000, "catalog_idle": 90000} if download_dir_name in slow_sites else None
+        self.timeouts = AdaptiveTimeouts(download_dir_name, defaults=cold_start)
         
         if not os.path.exists(self.download_dir):
             os.makedirs(self.download_dir)
-        self.llm_helper = LLMHelper()
+        self.llm_helper = LLMHelper(site=download_dir_name)
+        self.brochure_store = brochure_store or BrochureStore()  # Compartido entre sitios
+        self.brochure_fetcher = BrochureFetcher(self.brochure_store)
+        self.brochure_memo = BrochureStrategyMemo(download_dir_name)
+        self.frontier = CrawlFrontier(download_dir_name, max_retries=1)
+        self.resume = resume  # Reanudar la frontera de la ejecución interrumpida
+        self.resume_key = resume_key  # Corrida a la que pertenece (solo se reanuda esa)
+        self.page_cache = CoursePageCache(download_dir_name)
+        self.force_refresh = force_refresh  # Ignorar la caché y re-extraer todo
+        self.discovery_ttl = discovery_ttl  # Segundos que vale la caché de la fase 1
+        self.rediscover = rediscover  # Forzar la fase 1 aunque la caché esté vigente
+        # Archivo crudo de la ejecución (para --replay); None = desactivado
+        self.archive = PageArchive(archive_run_id, download_dir_name) if archive_run_id else None
+        self._pending_xhr = []
+        self.site_key = download_dir_name
+        self.llm_workers = llm_workers  # Hilos de la etapa extract (llamadas LLM en paralelo)
+        self.browser_pool = browser_pool or get_browser_pool()  # Chromium compartido entre sitios
+        # Reciclaje de página/contexto cada N cursos o al pasar el umbral de memoria
+        self.memory_watchdog = MemoryWatchdog(max_pages=recycle_pages, max_rss_mb=max_browser_mb)
+        # Corta el sitio si falla en cadena, se pasa de tiempo o de gasto LLM
+        self.breaker = CircuitBreaker(download_dir_name, max_consecutive=breaker_failures)
+        self.budget = SiteBudget(max_minutes, max_llm_usd, cost_fn=lambda: self.llm_helper.cost_usd)
+        self.stop_reason = None
+        self.scheduler = get_scheduler()  # Concurrencia y tasa por dominio (compartido entre sitios)
+        self.status = get_run_status()  # Estado en vivo (output/status.json / endpoint HTTP)
+        # Traza + HAR de las páginas de curso atípicas; `capture_slow` = opciones de SlowPageCapture o None
+        self.slow_capture = SlowPageCapture(download_dir_name, **capture_slow) if capture_slow is not None else None
 
     def get_urls(self):
         return [self.catalog_url]
@@ -42,225 +99,679 @@ class EnhancedUniversalScraper(BaseScraper):
         print(f"🚀 Starting ENHANCED LLM scraper for {self.source_name}...")
         print(f"   Using GPT-4o for intelligent catalog discovery")
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        self.frontier.start_run(seed_urls=[self.catalog_url], resume=self.resume, run_key=self.resume_key)
+        self.resume = self.frontier.resumed  # Un sitio que la corrida no llegó a empezar se hace completo
+        self.status.site_started(self.site_key, self.source_name, probe=self.status_probe)
+
+        try:
+            with self.browser_pool.session(self.memory_watchdog, on_page=self.setup_page) as session:
+                # === FASE 1: Descubrimiento inteligente de TODOS los cursos ===
+                self.status.set_phase(self.site_key, PHASE_DISCOVERY)
+                with self.span("discovery"):
+                    if not self.reuse_discovery(session.page):
+                        self.discover_courses(session.page)
+                
+                # === FASE 2: Extracción de datos de cada curso ===
+                self.status.set_phase(self.site_key, PHASE_EXTRACTION)
+                with self.span("extraction"):
+                    self.extract_courses(session)
+        finally:
+            self.brochure_fetcher.close()  # También si el sitio se corta con una excepción
+            self.timeouts.save()
+            self.brochure_memo.flush()
+            self.status.site_finished(self.site_key, self.stop_reason or "ok")
             
-            all_course_urls = set()
-            visited_pages = set()
-            pages_to_visit = [self.catalog_url]
-            pagination_count = 0
+        print(f"\n✅ Scraping completo: {len(self.data)} cursos extraídos")
+        print(f"   {self.memory_watchdog.summary()}")
+        print(f"   {self.timeouts.summary()}")
+        if self.slow_capture:
+            print(f"   {self.slow_capture.summary()}")
+        print(f"   {self.breaker.summary()} | LLM ${self.llm_helper.cost_usd:.2f} | "
+              f"{self.budget.elapsed() / 60:.1f} min")
+
+    def status_probe(self):
+        """Datos del sitio para el estado en vivo (se llama desde el hilo del estado)."""
+        return {
+            "frontier": self.frontier.counts(),
+            "llm_usd": round(self.llm_helper.cost_usd, 4),
+            "breaker": self.breaker.state,
+            "stop_reason": self.stop_reason,
+        }
+
+    def setup_page(self, page):
+        """Se aplica a cada página nueva (también tras reciclar el contexto)."""
+        if self.archive:
+            page.on("response", self.queue_xhr_response)
+        if self.slow_capture:
+            self.slow_capture.attach(page)
+
+    def discover_courses(self, page):
+        """
+        Recorre el catálogo (y su paginación) cargando los cursos en la frontera.
+        Se detiene antes de max_pagination cuando converge: N páginas seguidas sin
+        cursos nuevos o con contenido repetido (misma página con otra query string).
+        """
+        pagination_count = 0
+        zero_yield_streak = 0
+        seen_fingerprints = set()
+        first_page_fingerprint = None
+        converged = False
+        
+        while pagination_count < self.max_pagination:
+            stop_reason = self.budget.check() or self.status.stop_requested(self.site_key)
+            if stop_reason:
+                print(f"\n⏹️  Descubrimiento cortado: {stop_reason}")
+                break
+            current_url = self.frontier.claim(KIND_CATALOG)
+            if not current_url:
+                break
+                
+            print(f"\n📑 Analizando catálogo página {pagination_count + 1}: {current_url[:80]}...")
+            pagination_count += 1
             
-            # === FASE 1: Descubrimiento inteligente de TODOS los cursos ===
-            while pages_to_visit and pagination_count < self.max_pagination:
-                current_url = pages_to_visit.pop(0)
+            try:
+                found_urls, next_page = self.analyze_catalog_page(page, current_url)
                 
-                if current_url in visited_pages:
-                    continue
-                    
-                print(f"\n📑 Analizando catálogo página {pagination_count + 1}: {current_url[:80]}...")
-                visited_pages.add(current_url)
-                pagination_count += 1
+                new_urls = sum(1 for url in found_urls if self.frontier.add(url, KIND_COURSE))
+                print(f"   ✅ Patrones encontraron {len(found_urls)} cursos ({new_urls} nuevos)")
+                self.frontier.complete(current_url)
                 
-                try:
-                    page.goto(current_url, timeout=self.page_timeout)
-                    page.wait_for_load_state("networkidle", timeout=self.networkidle_timeout)
-                    
-                    # Scroll para cargar contenido lazy-load
-                    for i in range(3):
-                        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                        time.sleep(1)
-                    
-                    # === MÉTODO PRINCIPAL: Pattern-Based (más confiable) ===
-                    found_urls = self.llm_helper.discover_course_links_pattern_fallback(page)
-                    print(f"   ✅ Patrones encontraron {len(found_urls)} cursos")
-                    
-                    # === PAGINACIÓN: Buscar siguiente página ===
-                    next_page = None
-                    
-                    # Método 1: Buscar botón "Siguiente" o "Next"
-                    next_keywords = ["siguiente", "next", "›", "→", ">"]
-                    for keyword in next_keywords:
-                        next_btn = page.get_by_text(keyword, exact=False).all()
-                        for btn in next_btn:
-                            if btn.is_visible():
-                                href = btn.get_attribute("href")
-                                if href:
-                                    if href.startswith("/"):
-                                        from urllib.parse import urljoin
-                                        href = urljoin(current_url, href)
-                                    next_page = href
-                                    break
-                        if next_page:
-                            break
-                    
-                    # Método 2: Buscar en los links de paginación
-                    if not next_page:
-                        pagination_links = page.query_selector_all("a.page-link, a.pagination, nav a")
-                        for link in pagination_links:
-                            text = link.inner_text().strip() if link.is_visible() else ""
-                            href = link.get_attribute("href")
-                            if text and href:
-                                # Si es un número mayor al actual
-                                if text.isdigit():
-                                    # Buscar número en URL actual
-                                    import re
-                                    current_page_match = re.search(r'/page/(\d+)', current_url)
-                                    if current_page_match:
-                                        current_page_num = int(current_page_match.group(1))
-                                        if int(text) == current_page_num + 1:
-                                            if href.startswith("/"):
-                                                from urllib.parse import urljoin
-                                                href = urljoin(current_url, href)
-                                            next_page = href
-                                            break
-                    
-                    # Normalizar URLs encontradas
-                    for url in found_urls:
-                        if url.startswith("/"):
-                            from urllib.parse import urljoin
-                            url = urljoin(current_url, url)
-                        all_course_urls.add(url)
+                # === Convergencia ===
+                fingerprint = self.catalog_fingerprint(found_urls)
+                if current_url == canonicalize_url(self.catalog_url):
+                    first_page_fingerprint = fingerprint
+                repeated = fingerprint in seen_fingerprints
+                seen_fingerprints.add(fingerprint)
+                
+                # Agregar siguiente página si existe (la frontera ignora las ya vistas)
+                if next_page and self.frontier.add(next_page, KIND_CATALOG):
+                    print(f"   🔗 Siguiente página detectada: {next_page[:80]}")
+                
+                if new_urls == 0 or repeated:
+                    zero_yield_streak += 1
+                    reason = "contenido repetido" if repeated else "sin cursos nuevos"
+                    print(f"   ⏸️  Página {reason} ({zero_yield_streak}/{self.max_zero_yield_pages})")
+                    if zero_yield_streak >= self.max_zero_yield_pages:
+                        converged = True
+                        break
+                else:
+                    zero_yield_streak = 0
                     
-                    # Agregar siguiente página si existe
-                    if next_page and next_page not in visited_pages:
-                        if next_page.startswith("/"):
-                            from urllib.parse import urljoin
-                            next_page = urljoin(current_url, next_page)
-                        pages_to_visit.append(next_page)
-                        print(f"   🔗 Siguiente página detectada: {next_page[:80]}")
-                        
-                except Exception as e:
-                    print(f"   ⚠️  Error en página: {e}")
-            
-            print(f"\n📊 TOTAL de cursos únicos encontrados: {len(all_course_urls)}")
-            
-            # === FASE 2: Extracción de datos de cada curso ===
-            # Limitar si es modo prueba
-            courses_to_scrape = list(all_course_urls)
-            if self.max_courses:
-                courses_to_scrape = courses_to_scrape[:self.max_courses]
-                print(f"🧪 MODO PRUEBA: Limitando a {self.max_courses} cursos")
+            except Exception as e:
+                print(f"   ⚠️  Error en página: {e}")
+                if is_timeout_error(e):
+                    self.timeouts.record_loss()
+                self.frontier.fail(current_url, e)
+        
+        if converged:
+            # Cargas evitadas = páginas siguientes ya conocidas que quedaron sin visitar
+            skipped_loads = self.frontier.counts(KIND_CATALOG).get(STATE_PENDING, 0)
+            print(f"\n📉 Paginación convergió: {pagination_count} páginas visitadas, "
+                  f"{skipped_loads} página(s) siguiente(s) conocida(s) sin cargar (max {self.max_pagination})")
+        else:
+            print(f"\n📑 Páginas de catálogo visitadas: {pagination_count} (max {self.max_pagination})")
+        course_urls = self.frontier.urls(KIND_COURSE)
+        print(f"📊 TOTAL de cursos únicos encontrados: {len(course_urls)}")
+        
+        # Solo se cachea un descubrimiento cuya primera página cargó bien
+        if first_page_fingerprint and course_urls:
+            self.frontier.save_discovery(course_urls, first_page_fingerprint)
+
+    def reuse_discovery(self, page):
+        """
+        Reutiliza los cursos descubiertos en una ejecución anterior si la caché es
+        más joven que discovery_ttl, o si la primera página del catálogo no cambió.
+        """
+        if self.rediscover or self.resume:
+            return False
+        cached = self.frontier.load_discovery()
+        if not cached:
+            return False
+        
+        age_hours = (time.time() - cached["discovered_at"]) / 3600
+        if age_hours * 3600 < self.discovery_ttl:
+            reason = f"caché de {age_hours:.1f} h (TTL {self.discovery_ttl / 3600:.0f} h)"
+        else:
+            # Chequeo barato: solo la primera página del catálogo
+            print(f"\n🔎 Caché de descubrimiento vencida ({age_hours:.1f} h), verificando primera página...")
+            try:
+                found_urls, _ = self.analyze_catalog_page(page, self.catalog_url)
+            except Exception as e:
+                print(f"   ⚠️  Error en página: {e}")
+                return False
+            if self.catalog_fingerprint(found_urls) != cached["fingerprint"]:
+                print(f"   🔁 El catálogo cambió, se redescubre")
+                return False
+            self.frontier.touch_discovery()
+            reason = "primera página sin cambios"
+        
+        for url in cached["urls"]:
+            self.frontier.add(url, KIND_COURSE)
+        self.frontier.complete(self.catalog_url)
+        print(f"\n♻️  Fase 1 omitida ({reason}): {len(cached['urls'])} cursos desde la caché")
+        print(f"   💡 Usa --rediscover para forzar el descubrimiento")
+        return True
+
+    def catalog_fingerprint(self, found_urls):
+        """Huella de una página de catálogo: su conjunto canónico de URLs de cursos."""
+        return hashlib.sha1(
+            "\n".join(sorted(canonicalize_url(url) for url in found_urls)).encode("utf-8")
+        ).hexdigest()
+
+    def analyze_catalog_page(self, page, current_url):
+        """Carga una página del catálogo; devuelve (URLs de cursos, siguiente página)."""
+        from urllib.parse import urljoin
+        
+        self.load_page(page, current_url, "catalog")
+        
+        # Scroll para cargar contenido lazy-load
+        with self.span("catalog_scroll"):
+            for i in range(3):
+                page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                time.sleep(1)
+        
+        if self.archive:
+            self.archive.add(RECORD_CATALOG, current_url, page.content())
+            self.archive_xhr_responses(current_url)
+        
+        # === MÉTODO PRINCIPAL: Pattern-Based (más confiable) ===
+        with self.span("catalog_links"):
+            found_urls = [
+                urljoin(current_url, url)
+                for url in self.llm_helper.discover_course_links_pattern_fallback(page)
+            ]
+        
+        # === PAGINACIÓN: Buscar siguiente página ===
+        next_page = None
+        
+        # Método 1: Buscar botón "Siguiente" o "Next"
+        next_keywords = ["siguiente", "next", "›", "→", ">"]
+        for keyword in next_keywords:
+            next_btn = page.get_by_text(keyword, exact=False).all()
+            for btn in next_btn:
+                if btn.is_visible():
+                    href = btn.get_attribute("href")
+                    if href:
+                        next_page = urljoin(current_url, href)
+                        break
+            if next_page:
+                break
+        
+        # Método 2: Buscar en los links de paginación
+        if not next_page:
+            pagination_links = page.query_selector_all("a.page-link, a.pagination, nav a")
+            for link in pagination_links:
+                text = link.inner_text().strip() if link.is_visible() else ""
+                href = link.get_attribute("href")
+                if text and href:
+                    # Si es un número mayor al actual
+                    if text.isdigit():
+                        # Buscar número en URL actual
+                        current_page_match = re.search(r'/page/(\d+)', current_url)
+                        if current_page_match:
+                            current_page_num = int(current_page_match.group(1))
+                            if int(text) == current_page_num + 1:
+                                next_page = urljoin(current_url, href)
+                                break
+        
+        return found_urls, next_page
+
+    def load_page(self, page, url, kind):
+        """
+        goto + networkidle de una página de catálogo o de curso (`kind`), con
+        cortesía por dominio, timeouts adaptativos y un span por cada paso.
+        Las cargas de curso atípicas o fallidas se capturan (traza + HAR) si está activo.
+        """
+        capture = self.slow_capture if kind == "course" else None
+        with self.scheduler.slot(url):
+            if capture:
+                capture.begin(page)
+            start, error = time.time(), None  # Se mide dentro del slot: la espera de cortesía no cuenta
+            try:
+                with self.span(f"{kind}_goto"):
+                    response = self.timeouts.measure(f"{kind}_goto", lambda timeout: page.goto(url, timeout=timeout))
+                with self.span(f"{kind}_idle"):
+                    self.timeouts.measure(f"{kind}_idle", lambda timeout: page.wait_for_load_state("networkidle", timeout=timeout))
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                if capture:
+                    try:
+                        capture.end(page, url, time.time() - start, error)
+                    except Exception as e:
+                        print(f"    ⚠️  No se pudo guardar la captura de {url[:60]}: {e}")
+        return response
+
+    def extract_courses(self, session):
+        """
+        Procesa los cursos pendientes de la frontera (los que cambiaron la última vez
+        y los nuevos primero).
+        El navegador solo hace la etapa fetch (hilo principal); el resto corre en
+        un pipeline con colas acotadas para que el LLM y el navegador no se esperen:
+        fetch → reduce → extract → merge → sink.
+        `session` (PageSession) recicla la página cada N cursos o por memoria.
+        """
+        total = len(self.frontier.urls(KIND_COURSE))
+        # Limitar si es modo prueba
+        if self.max_courses:
+            total = min(total, self.max_courses)
+            print(f"🧪 MODO PRUEBA: Limitando a {self.max_courses} cursos")
+        
+        pipeline = Pipeline([
+            Stage("reduce", self.reduce_course, workers=2),
+            Stage("extract", self.extract_course, workers=self.llm_workers),
+            Stage("merge", self.merge_course, workers=1),
+            Stage("sink", self.sink_course, workers=1),
+        ], on_error=self.on_pipeline_error)
+        
+        idx = 0
+        while not self.max_courses or idx < self.max_courses:
+            if self.llm_helper.governor.exhausted:
+                # Tope de gasto de la ejecución: lo pendiente queda para --resume
+                self.stop_reason = self.stop_reason or "tope de gasto LLM de la ejecución"
+                print(f"\n💸 {self.source_name}: {self.stop_reason}, se detiene la extracción")
+                break
+            url = self.frontier.claim(KIND_COURSE)
+            if not url:
+                break
+            idx += 1
             
-            for idx, url in enumerate(courses_to_scrape, 1):
-                print(f"\n[{idx}/{len(courses_to_scrape)}] ", end="")
-                self.process_course_detail(page, url)
+            # Presupuesto agotado o circuito abierto: se conserva la última fila conocida
+            stop_reason = self.budget.check() or self.status.stop_requested(self.site_key)
+            if stop_reason:
+                if not self.stop_reason:
+                    self.stop_reason = stop_reason
+                    print(f"\n⏹️  {self.source_name}: {stop_reason}; el resto de los cursos conserva su fila anterior")
+                self.skip_course(url, stop_reason)
+                continue
+            if not self.breaker.allow():
+                self.skip_course(url, "circuito abierto")
+                continue
+            print(f"\n[{idx}/{total}] ", end="")
             
-            browser.close()
+            fetch_start = time.time()
+            with self.span("fetch"):
+                job = self.fetch_course(session.page, url)
+            if not job and session.broken():
+                # El renderer se cayó: página nueva y un reintento antes de contar el fallo
+                print(f"    💥 Renderer caído, reintentando con un contexto nuevo")
+                with self.span("recycle"):
+                    session.recycle("crash")
+                with self.span("fetch"):
+                    job = self.fetch_course(session.page, url)
+            session.page_done()
+            if job and self.breaker.probing:
+                # Prueba half-open: se resuelve aquí, sin pipeline, para que el circuito se cierre
+                # (o se reabra) antes de reclamar el siguiente curso en vez de saltarlos todos
+                with self.span("probe"):
+                    self.run_job(job)
+            elif job:
+                # El éxito se cuenta en la etapa sink, tras una extracción no vacía
+                pipeline.submit(job, produce_seconds=time.time() - fetch_start)
+            else:
+                self.breaker.record_failure()
+                self.frontier.fail(url, "fetch_course")
+                self.status.error(self.site_key, f"fetch_course: {url}")
             
-        print(f"\n✅ Scraping completo: {len(self.data)} cursos extraídos")
+            if idx % 10 == 0:
+                pipeline.export(PIPELINE_METRICS_FILE, self.site_key)
+        
+        pipeline.close()
+        pipeline.export(PIPELINE_METRICS_FILE, self.site_key)
+        print(f"\n⚙️  Pipeline ({PIPELINE_METRICS_FILE}):\n{pipeline.summary()}")
+        
+        # Al reanudar, los cursos ya hechos antes del corte se toman de la caché
+        if self.resume:
+            scraped = {item["url"] for item in self.data}
+            for url in self.frontier.urls(KIND_COURSE, state=STATE_DONE):
+                row = self.page_cache.row_for(url)
+                if url not in scraped and row:
+                    self.add_item(row)
+        
+        print(f"\n📋 Cambios: {self.page_cache.summary()}")
+
+    def skip_course(self, url, reason):
+        """Saltea un curso sin visitarlo; si ya se conocía, se mantiene su fila anterior."""
+        self.frontier.skip(url, reason)
+        row = self.page_cache.row_for(url)
+        if row:
+            self.add_item(row)
 
     def process_course_detail(self, page, url):
+        """Procesa un curso completo de forma secuencial (mismas etapas que el pipeline)."""
+        job = self.fetch_course(page, url)
+        if not job:
+            return False
+        return self.run_job(job)
+
+    def run_job(self, job):
+        """Corre las etapas del pipeline sobre un job en este hilo. True si llegó al sink."""
+        try:
+            for stage in (self.reduce_course, self.extract_course, self.merge_course, self.sink_course):
+                job = stage(job)
+            return True
+        except Exception as e:
+            self.on_pipeline_error(job, e)
+            return False
+
+    # === Etapas del pipeline ===
+    def fetch_course(self, page, url):
+        """
+        Etapa fetch (usa el navegador, hilo principal): render, detección de cambios,
+        archivo y obtención del brochure. Devuelve el job para las etapas siguientes.
+        """
         print(f"Scraping: {url[:80]}...")
         try:
-            page.goto(url, timeout=60000)
-            page.wait_for_load_state('networkidle', timeout=20000)
+            # Revalidación HTTP barata (ETag / Last-Modified) antes de abrir el navegador
+            if not self.force_refresh:
+                with self.span("revalidate"):
+                    previous_row = self.page_cache.revalidate(url)
+                if previous_row:
+                    print(f"    ✔️  Sin cambios (304), se reutiliza la fila anterior")
+                    if self.archive:
+                        self.archive.add(RECORD_CARRIED, url, b"")
+                    return {"url": url, "carried_row": previous_row, "record": False}
             
-            # Extracción con LLM
+            response = self.load_page(page, url, "course")
+            if response and response.status >= 400:
+                # Bloqueo (403/429) o error del sitio: cuenta para el circuito y no pasa al LLM ni a la caché
+                print(f"    ❌ HTTP {response.status}")
+                return None
+            headers = response.headers if response else {}
             html_content = page.content()
-            llm_data = self.llm_helper.extract_from_html(html_content, url)
+            if self.archive:
+                self.archive.add(RECORD_COURSE, url, html_content)
+                self.archive_xhr_responses(url)
             
-            course_name = llm_data.get("course_name", "N/A")
-            print(f"    ✓ {course_name}")
-
-            # Intentar descargar brochure
-            pdf_path = None
-            brochure_url = "N/A"
+            # Huella del contenido principal: si no cambió, se salta LLM y brochure
+            fingerprint = content_fingerprint(main_content_text(page))
+            status, previous_row = self.page_cache.compare(url, fingerprint)
+            job = {
+                "url": url, "html": html_content, "headers": headers,
+                "status": status, "fingerprint": fingerprint, "record": True
+            }
+            if status == STATUS_UNCHANGED and not self.force_refresh:
+                print(f"    ✔️  Contenido sin cambios, se reutiliza la fila anterior")
+                job["carried_row"] = previous_row
+                return job
             
-            brochure_keywords = [
-                "brochure", "descargar", "plan de estudios", "temario", 
-                "syllabus", "download", "pdf", "malla"
-            ]
+            # Brochure: 1) almacén, 2) link directo en el DOM, 3) formulario
+            pdf_path = self.brochure_store.path_for_url(url)
+            brochure_url = self.brochure_store.source_for_url(url) if pdf_path else "N/A"
             
-            btn = None
-            for keyword in brochure_keywords:
-                matches = page.get_by_text(keyword, exact=False).all()
-                for match in matches:
-                    if match.is_visible():
-                        btn = match
-                        break
-                if btn:
-                    break
+            if not pdf_path:
+                with self.span("brochure_direct"):
+                    direct_urls = find_direct_brochure_urls(page)
+                if direct_urls:
+                    print(f"    🔗 {len(direct_urls)} link(s) directo(s) a brochure")
+                    # La descarga corre en segundo plano; la etapa extract espera el resultado
+                    job["brochure_future"] = self.brochure_fetcher.submit(direct_urls, url)
             
-            if btn and btn.is_visible():
-                pdf_path = self.attempt_brochure_download(page, btn, course_name)
+            # Fallback: automatizar el formulario (según lo que funcionó antes en este sitio).
+            # Necesita la página abierta: si hay una descarga directa en curso se espera aquí
+            # y el formulario solo se intenta cuando esa descarga no entregó un PDF.
+            try_form = not pdf_path and self.brochure_memo.should_try_form()
+            future = job.pop("brochure_future", None) if try_form else None
+            if future:
+                with self.span("brochure_wait"):
+                    pdf_path = future.result()
                 if pdf_path:
-                    brochure_url = "Downloaded via Form"
-
-            # Extracción PDF
-            pdf_info = {}
-            if pdf_path and os.path.exists(pdf_path):
-                pdf_info = self.llm_helper.extract_from_pdf(pdf_path)
-
-            # Combinar datos
-            item = {
-                "course_name": llm_data.get("course_name", "N/A"),
-                "course_type": llm_data.get("course_type", "Curso"),
-                "price_raw": llm_data.get("price_raw", "N/A"),
-                "price_currency": self.detect_currency(llm_data.get("price_raw", "")),
-                "price_original": llm_data.get("price_original", "N/A"),
-                "duration": llm_data.get("duration") if llm_data.get("duration") != "N/A" else pdf_info.get("duration", "N/A"),
-                "start_date": llm_data.get("start_date") if llm_data.get("start_date") != "N/A" else pdf_info.get("start_date", "N/A"),
-                "instructor": llm_data.get("instructor") if llm_data.get("instructor") != "N/A" else pdf_info.get("instructor", "N/A"),
-                "modality": llm_data.get("modality", "N/A"),
-                "url": url,
-                "brochure_url": brochure_url,
-                "certification": pdf_info.get("certification", "N/A"),
-                "methodology": pdf_info.get("methodology", "N/A"),
-                "content": pdf_info.get("content", "N/A")
-            }
-            self.add_item(item)
+                    brochure_url = self.brochure_store.source_for_url(url)
+                    self.brochure_memo.record_success(STRATEGY_DIRECT)
+            if try_form and not pdf_path:
+                with self.span("brochure_form"):
+                    btn, keyword = self.find_brochure_button(page)
+                    if btn:
+                        pdf_path = self.attempt_brochure_download(page, btn, url, keyword)
+                        if pdf_path:
+                            brochure_url = "Downloaded via Form"
+                    else:
+                        self.brochure_memo.record_failure()
+            
+            job["pdf_path"] = pdf_path
+            job["brochure_url"] = brochure_url
+            return job
             
         except Exception as e:
             print(f"    ❌ Error: {e}")
+            if is_timeout_error(e):
+                self.timeouts.record_loss()
+            return None
+
+    def reduce_course(self, job):
+        """Etapa reduce: limpia y recorta el HTML antes del LLM."""
+        if not job.get("carried_row"):
+            with self.span("reduce"):
+                job["html"] = self.llm_helper.clean_html(job["html"])
+        return job
+
+    def extract_course(self, job):
+        """Etapa extract: LLM sobre el HTML y extracción (memoizada) del brochure."""
+        if job.get("carried_row"):
+            # Página sin cambios: la fila anterior evita la llamada (cuenta como acierto de caché)
+            self.llm_helper.record_memo_hit("extract_from_html")
+            return job
+        url = job["url"]
+        with self.span("extract_html"):
+            job["llm_data"] = self.llm_helper.extract_from_html(job["html"], url)
+        if not extraction_succeeded(job["llm_data"]):
+            # No se cachea: la próxima ejecución vuelve a intentar en vez de arrastrar una fila N/A
+            raise ExtractionFailed("extracción vacía del HTML")
+        print(f"    ✓ {job['llm_data'].get('course_name', 'N/A')}")
+        
+        # Descarga directa lanzada en fetch (ya solapada con el render y el LLM)
+        future = job.pop("brochure_future", None)
+        if future:
+            with self.span("brochure_wait"):
+                job["pdf_path"] = future.result()
+            if job["pdf_path"]:
+                job["brochure_url"] = self.brochure_store.source_for_url(url)
+                self.brochure_memo.record_success(STRATEGY_DIRECT)
+        
+        # Extracción PDF
+        job["pdf_info"] = {}
+        pdf_path = job.get("pdf_path")
+        if pdf_path and os.path.exists(pdf_path):
+            if self.archive:
+                self.archive.add_file(RECORD_BROCHURE, job["brochure_url"], pdf_path, course_url=url)
+            with self.span("extract_pdf"):
+                job["pdf_info"] = self.brochure_store.extract_cached(
+                    pdf_path, self.llm_helper.extract_from_pdf, on_hit=self.llm_helper.record_memo_hit
+                )
+        return job
+
+    def merge_course(self, job):
+        """Etapa merge: combina HTML + PDF en la fila final."""
+        if job.get("carried_row"):
+            job["item"] = job["carried_row"]
+        else:
+            job["item"] = build_course_item(job["url"], job["llm_data"], job["pdf_info"], job["brochure_url"])
+        return job
+
+    def sink_course(self, job):
+        """Etapa sink: agrega la fila, actualiza la caché y marca el curso como hecho."""
+        with self.span("sink"):
+            self.add_item(job["item"])
+            # Solo se cachean filas de una extracción real (o la fila anterior que se reutilizó)
+            if job.get("record") and (job.get("carried_row") or extraction_succeeded(job.get("llm_data"))):
+                self.page_cache.record(job["url"], job["status"], job["fingerprint"], job["item"], job["headers"])
+            self.frontier.complete(job["url"])
+            self.frontier.mark_changed(job["url"], job.get("status") == STATUS_CHANGED)
+        self.breaker.record_success()
+        self.status.course_done(self.site_key)
+        return job
+
+    def on_pipeline_error(self, job, error):
+        if isinstance(error, LLMBudgetExhausted):
+            # No es un fallo del sitio: el curso queda en curso y --resume lo retoma
+            return
+        print(f"    ❌ Error ({job['url'][:60]}): {error}")
+        self.status.error(self.site_key, f"{job['url']}: {error}")
+        self.breaker.record_failure()
+        self.frontier.fail(job["url"], error)
+
+    def queue_xhr_response(self, response):
+        """Listener de Playwright: encola respuestas XHR/fetch JSON para archivarlas."""
+        if response.request.resource_type in ("xhr", "fetch"):
+            if "json" in response.headers.get("content-type", ""):
+                self._pending_xhr.append(response)
 
-    def attempt_brochure_download(self, page, btn, course_name):
+    def archive_xhr_responses(self, page_url):
+        """Archiva las respuestas XHR capturadas durante la carga de `page_url`."""
+        pending, self._pending_xhr = self._pending_xhr, []
+        for response in pending:
+            try:
+                self.archive.add(RECORD_XHR, response.url, response.body(),
+                                 content_type="application/json", course_url=page_url)
+            except Exception:
+                # Respuestas ya descartadas por el navegador (redirecciones, navegación)
+                pass
+
+    def find_brochure_button(self, page):
+        """Devuelve (botón visible, keyword), probando primero el keyword memorizado."""
+        brochure_keywords = [
+            "brochure", "descargar", "plan de estudios", "temario", 
+            "syllabus", "download", "pdf", "malla"
+        ]
+        for keyword in self.brochure_memo.preferred_keywords(brochure_keywords):
+            matches = page.get_by_text(keyword, exact=False).all()
+            for match in matches:
+                if match.is_visible():
+                    return match, keyword
+        return None, None
+
+    def attempt_brochure_download(self, page, btn, course_url, keyword=None):
         """Intenta descargar brochure de forma robusta."""
+        timeout = self.brochure_memo.download_timeout(15000)
         try:
-            with page.expect_download(timeout=15000) as download_info:
+            with page.expect_download(timeout=timeout) as download_info:
                 btn.click()
                 time.sleep(1)
                 
-                # Llenar formularios si aparecen
-                if page.locator("input[type='text'], input[type='email']").first.is_visible(timeout=2000):
-                    for field in page.locator("input[type='text']").all():
-                        if field.is_visible():
-                            field.fill("Juan Perez", timeout=1000)
-                            break
-                    
-                    for field in page.locator("input[type='email']").all():
-                        if field.is_visible():
-                            field.fill("test@example.com", timeout=1000)
-                            break
-                    
-                    for checkbox in page.locator("input[type='checkbox']").all():
-                        if checkbox.is_visible():
-                            try:
-                                checkbox.check(force=True, timeout=1000)
-                            except:
-                                pass
-                    
-                    time.sleep(1)
-                    for submit in page.locator("button[type='submit'], input[type='submit']").all():
-                        if submit.is_visible():
-                            submit.click(timeout=2000)
-                            break
+                # Llenar formularios si aparecen: primero el mapeo que ya funcionó
+                fields = self.fill_form_from_mapping(page, self.brochure_memo.form_mapping())
+                if not fields and page.locator("input[type='text'], input[type='email']").first.is_visible(timeout=2000):
+                    fields = self.fill_form_generic(page)
             
             download = download_info.value
-            safe_name = re.sub(r'[^a-zA-Z0-9]', '_', course_name).strip('_')[:50] + ".pdf"
-            pdf_path = os.path.join(self.download_dir, safe_name)
-            download.save_as(pdf_path)
+            pdf_path = self.brochure_store.save_download(download, course_url)
+            self.brochure_memo.record_success(STRATEGY_FORM, keyword=keyword, fields=fields)
             return pdf_path
             
         except Exception as e:
+            self.brochure_memo.record_failure()
+            return None
+
+    def fill_form_generic(self, page):
+        """Llena el primer formulario visible y devuelve el mapeo de selectores usado."""
+        fields = {}
+        for field in page.locator("input[type='text']").all():
+            if field.is_visible():
+                field.fill("Juan Perez", timeout=1000)
+                fields["text"] = self.selector_for(field, "input[type='text']")
+                break
+        
+        for field in page.locator("input[type='email']").all():
+            if field.is_visible():
+                field.fill("test@example.com", timeout=1000)
+                fields["email"] = self.selector_for(field, "input[type='email']")
+                break
+        
+        fields["checkbox"] = []
+        for checkbox in page.locator("input[type='checkbox']").all():
+            if checkbox.is_visible():
+                try:
+                    checkbox.check(force=True, timeout=1000)
+                    fields["checkbox"].append(self.selector_for(checkbox, "input[type='checkbox']"))
+                except:
+                    pass
+        
+        time.sleep(1)
+        for submit in page.locator("button[type='submit'], input[type='submit']").all():
+            if submit.is_visible():
+                submit.click(timeout=2000)
+                fields["submit"] = self.selector_for(submit, "button[type='submit'], input[type='submit']")
+                break
+        return fields
+
+    def fill_form_from_mapping(self, page, fields):
+        """Repite un mapeo memorizado; devuelve el mapeo si el formulario estaba, o None."""
+        if not fields or not fields.get("submit"):
+            return None
+        try:
+            for key, value in [("text", "Juan Perez"), ("email", "test@example.com")]:
+                if fields.get(key):
+                    page.locator(fields[key]).first.fill(value, timeout=2000)
+            for selector in fields.get("checkbox", []):
+                try:
+                    page.locator(selector).first.check(force=True, timeout=1000)
+                except:
+                    pass
+            page.locator(fields["submit"]).first.click(timeout=2000)
+            return fields
+        except Exception:
+            # El mapeo ya no aplica (otro formulario); se cae al llenado genérico
             return None
 
+    def selector_for(self, element, fallback):
+        """Selector estable (name o id) para un elemento, o el genérico."""
+        tag = element.evaluate("el => el.tagName.toLowerCase()")
+        name = element.get_attribute("name")
+        if name:
+            return f"{tag}[name='{name}']"
+        element_id = element.get_attribute("id")
+        if element_id:
+            return f"#{element_id}"
+        return fallback
+
     def detect_currency(self, price_str):
         """Detecta moneda del precio."""
-        if "S/" in price_str or "PEN" in price_str:
-            return "PEN"
-        elif "$" in price_str or "USD" in price_str:
-            return "USD"
-        elif "€" in price_str or "EUR" in price_str:
-            return "EUR"
-        return "N/A"
+        return detect_currency(price_str)
+
+
+def main_content_text(page):
+    """Texto del contenido principal de la página; el body entero si no hay contenedor."""
+    for selector in MAIN_CONTENT_SELECTORS:
+        element = page.query_selector(selector)
+        if element:
+            text = element.inner_text()
+            if text.strip():
+                return text
+    return page.inner_text("body")
+
+
+def extraction_succeeded(llm_data):
+    """True si extract_from_html devolvió algo real (no {} ni la fila N/A de error)."""
+    return bool(llm_data) and llm_data.get("course_name", "N/A") not in ("N/A", "", None)
+
+
+def detect_currency(price_str):
+    """Detecta moneda del precio."""
+    if "S/" in price_str or "PEN" in price_str:
+        return "PEN"
+    elif "$" in price_str or "USD" in price_str:
+        return "USD"
+    elif "€" in price_str or "EUR" in price_str:
+        return "EUR"
+    return "N/A"
+
+
+def build_course_item(url, llm_data, pdf_info, brochure_url):
+    """Combina la extracción del HTML y del brochure (prioridad: HTML > PDF > N/A)."""
+    return {
+        "course_name": llm_data.get("course_name", "N/A"),
+        "course_type": llm_data.get("course_type", "Curso"),
+        "price_raw": llm_data.get("price_raw", "N/A"),
+        "price_currency": detect_currency(llm_data.get("price_raw", "")),
+        "price_original": llm_data.get("price_original", "N/A"),
+        "duration": llm_data.get("duration") if llm_data.get("duration") != "N/A" else pdf_info.get("duration", "N/A"),
+        "start_date": llm_data.get("start_date") if llm_data.get("start_date") != "N/A" else pdf_info.get("start_date", "N/A"),
+        "instructor": llm_data.get("instructor") if llm_data.get("instructor") != "N/A" else pdf_info.get("instructor", "N/A"),
+        "modality": llm_data.get("modality", "N/A"),
+        "url": url,
+        "brochure_url": brochure_url,
+        "certification": pdf_info.get("certification", "N/A"),
+        "methodology": pdf_info.get("methodology", "N/A"),
+        "content": pdf_info.get("content", "N/A")
+    }
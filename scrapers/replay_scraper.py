@@ -0,0 +1,90 @@
+"""
+Re-extracción offline desde el archivo crudo de una ejecución (--replay).
+Sin navegador y sin red hacia los sitios: lee las páginas de curso y los
+brochures archivados y vuelve a correr la extracción (LLM + reglas) en paralelo.
+Útil después de cambiar prompts en LLMHelper o corregir un campo.
+"""
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.base_scraper import BaseScraper
+from scrapers.enhanced_universal_scraper import build_course_item
+from utils.llm_helper import LLMHelper
+from utils.brochure_store import BrochureStore
+from utils.page_cache import CoursePageCache
+from utils.page_archive import ArchiveReader, RECORD_COURSE, RECORD_BROCHURE, RECORD_CARRIED
+
+
+class ArchiveReplayScraper(BaseScraper):
+    def __init__(self, site_name, download_dir_name, run_id, max_workers=8):
+        # Sin almacén: re-extraer un archivo viejo no es el estado actual del catálogo
+        super().__init__(site_name)
+        self.site_key = download_dir_name
+        self.reader = ArchiveReader(run_id)
+        self.max_workers = max_workers
+        self.llm_helper = LLMHelper(site=download_dir_name)
+        self.brochure_store = BrochureStore()
+        self.page_cache = CoursePageCache(download_dir_name)
+
+    def get_urls(self):
+        return list(self.reader.latest(self.site_key, RECORD_COURSE).keys())
+
+    def parse_course(self, url):
+        pass
+
+    def parse_catalog(self):
+        pages = self.reader.latest(self.site_key, RECORD_COURSE)
+        brochures = self.reader.latest(self.site_key, RECORD_BROCHURE)
+        print(f"🗄️  Replay {self.source_name}: {len(pages)} páginas, {len(brochures)} brochures "
+              f"(run {self.reader.run_id}, {self.max_workers} workers)")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(
+                lambda url: self.replay_course(url, pages[url], brochures.get(url)), pages
+            ))
+
+        for item in results:
+            if item:
+                self.add_item(item)
+        
+        # Cursos que en la ejecución original respondieron 304 (sin HTML archivado)
+        for url in self.reader.latest(self.site_key, RECORD_CARRIED):
+            row = self.page_cache.row_for(url)
+            if url not in pages and row:
+                self.add_item(row)
+        print(f"✅ Replay completo: {len(self.data)} cursos re-extraídos")
+
+    def replay_course(self, url, page_entry, brochure_entry):
+        try:
+            html_content = self.reader.read_text(self.site_key, page_entry)
+            llm_data = self.llm_helper.extract_from_html(html_content, url)
+
+            # Brochure: el archivado en la ejecución, o el del almacén local
+            pdf_info = {}
+            brochure_url = "N/A"
+            if brochure_entry:
+                brochure_url = brochure_entry["url"]
+                fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self.reader.read(self.site_key, brochure_entry))
+                try:
+                    pdf_info = self.llm_helper.extract_from_pdf(pdf_path)
+                finally:
+                    os.remove(pdf_path)
+            else:
+                pdf_path = self.brochure_store.path_for_url(url)
+                if pdf_path:
+                    brochure_url = self.brochure_store.source_for_url(url)
+                    # Sin memo: el objetivo del replay es re-extraer con el prompt actual
+                    pdf_info = self.llm_helper.extract_from_pdf(pdf_path)
+
+            print(f"    ✓ {llm_data.get('course_name', 'N/A')}")
+            return build_course_item(url, llm_data, pdf_info, brochure_url)
+
+        except Exception as e:
+            print(f"    ❌ Error en replay de {url[:80]}: {e}")
+            # Se conserva la última fila conocida antes que perder el curso
+            return self.page_cache.row_for(url)
@@ -2,21 +2,26 @@ import os
 import time
 import re
 from base_scraper import BaseScraper
-from playwright.sync_api import sync_playwright
+from utils.browser_pool import get_browser_pool
 from utils.llm_helper import LLMHelper
+from utils.brochure_store import BrochureStore
+from utils.brochure_fetcher import BrochureFetcher, find_direct_brochure_urls
 
 class UniversalScraper(BaseScraper):
     """
     Scraper universal que usa LLM para extraer información del HTML.
     Mucho más robusto que selectores específicos.
     """
-    def __init__(self, site_name, catalog_url, download_dir_name):
+    def __init__(self, site_name, catalog_url, download_dir_name, browser_pool=None):
         super().__init__(site_name)
         self.catalog_url = catalog_url
         self.download_dir = f"scrapers/downloads/{download_dir_name}"
         if not os.path.exists(self.download_dir):
             os.makedirs(self.download_dir)
-        self.llm_helper = LLMHelper()
+        self.llm_helper = LLMHelper(site=self.site_key)
+        self.brochure_store = BrochureStore()
+        self.brochure_fetcher = BrochureFetcher(self.brochure_store)
+        self.browser_pool = browser_pool or get_browser_pool()  # Un solo Chromium por proceso
 
     def get_urls(self):
         return [self.catalog_url]
@@ -27,13 +32,12 @@ class UniversalScraper(BaseScraper):
     def parse_catalog(self):
         print(f"Starting LLM-powered scraper for {self.source_name}...")
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        with self.browser_pool.page() as page:
             
             # 1. Navegar al catálogo
             print(f"Navigating to catalog: {self.catalog_url}")
-            page.goto(self.catalog_url, timeout=60000)
+            with self.span("catalog_load"):
+                page.goto(self.catalog_url, timeout=60000)
             page.wait_for_load_state("networkidle")
             
             # 2. Encontrar todos los enlaces de cursos
@@ -67,9 +71,9 @@ class UniversalScraper(BaseScraper):
 
             # 3. Scrape cada curso
             for url in course_urls:
-                self.process_course_detail(page, url)
-            
-            browser.close()
+                with self.span("course"):
+                    self.process_course_detail(page, url)
+            self.brochure_fetcher.close()
 
     def process_course_detail(self, page, url):
         print(f"  Scraping: {url}")
@@ -84,28 +88,34 @@ class UniversalScraper(BaseScraper):
             print(f"    LLM extracted: {llm_data.get('course_name')} | {llm_data.get('price_raw')}")
 
             # === PASO 2: Descargar brochure si existe ===
-            pdf_path = None
-            brochure_url = "N/A"
+            pdf_path = self.brochure_store.path_for_url(url)
+            if not pdf_path:
+                # Camino rápido: link directo (.pdf, Drive, data-*) antes del formulario
+                direct_urls = find_direct_brochure_urls(page)
+                if direct_urls:
+                    pdf_path = self.brochure_fetcher.fetch_first(direct_urls, url)
+            brochure_url = self.brochure_store.source_for_url(url) if pdf_path else "N/A"
             
             # Buscar botones de brochure (patrones comunes)
             brochure_keywords = ["brochure", "descargar", "plan de estudios", "temario"]
             btn = None
             
-            for keyword in brochure_keywords:
-                btn = page.get_by_text(keyword, exact=False).first
-                if btn.is_visible():
-                    print(f"    Found button: '{keyword}'")
-                    break
+            if not pdf_path:
+                for keyword in brochure_keywords:
+                    btn = page.get_by_text(keyword, exact=False).first
+                    if btn.is_visible():
+                        print(f"    Found button: '{keyword}'")
+                        break
             
             if btn and btn.is_visible():
-                pdf_path = self.attempt_brochure_download(page, btn, llm_data.get("course_name", "course"))
+                pdf_path = self.attempt_brochure_download(page, btn, url)
                 if pdf_path:
                     brochure_url = "Downloaded via Form"
 
             # === PASO 3: Extraer info adicional del PDF ===
             pdf_info = {}
             if pdf_path and os.path.exists(pdf_path):
-                pdf_info = self.llm_helper.extract_from_pdf(pdf_path)
+                pdf_info = self.brochure_store.extract_cached(pdf_path, self.llm_helper.extract_from_pdf)
                 print(f"    PDF extracted: {pdf_info.get('duration')} | {pdf_info.get('certification')}")
 
             # === PASO 4: Combinar datos ===
@@ -131,7 +141,7 @@ class UniversalScraper(BaseScraper):
         except Exception as e:
             print(f"  Error processing {url}: {e}")
 
-    def attempt_brochure_download(self, page, btn, course_name):
+    def attempt_brochure_download(self, page, btn, course_url):
         """Intenta descargar el brochure haciendo clic en el botón."""
         try:
             with page.expect_download(timeout=20000) as download_info:
@@ -167,10 +177,8 @@ class UniversalScraper(BaseScraper):
                             break
             
             download = download_info.value
-            safe_name = re.sub(r'[^a-zA-Z0-9]', '_', course_name).strip('_')[:50] + ".pdf"
-            pdf_path = os.path.join(self.download_dir, safe_name)
-            download.save_as(pdf_path)
-            print(f"    Downloaded: {safe_name}")
+            pdf_path = self.brochure_store.save_download(download, course_url)
+            print(f"    Downloaded: {os.path.basename(pdf_path)}")
             return pdf_path
             
         except Exception as e:
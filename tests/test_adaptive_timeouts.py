@@ -0,0 +1,74 @@
+import pytest
+
+from utils.adaptive_timeouts import AdaptiveTimeouts, OPERATIONS, is_timeout_error
+from utils.stats import percentile
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    return str(tmp_path / "timeouts.json")
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 0.95) is None
+    assert percentile([3, 1, 2], 0.5) == 2
+    assert percentile(range(1, 101), 0.95) == 95
+    assert percentile([7], 0.0) == 7
+
+
+def test_cold_start_uses_defaults(history_file):
+    timeouts = AdaptiveTimeouts("academia", history_file=history_file, defaults={"catalog_goto": 120000})
+    assert timeouts.timeout("catalog_goto") == 120000
+    assert timeouts.timeout("course_goto") == OPERATIONS["course_goto"][0]
+
+
+def test_timeout_follows_p95_within_floor_and_ceiling(history_file):
+    timeouts = AdaptiveTimeouts("academia", history_file=history_file, factor=3.0, min_samples=5)
+    for seconds in (4, 5, 5, 6, 8):
+        timeouts.observe("course_goto", seconds)
+    assert timeouts.timeout("course_goto") == 24000  # p95 = 8 s × 3
+
+    fast = AdaptiveTimeouts("rapido", history_file=history_file)
+    for _ in range(5):
+        fast.observe("course_goto", 0.2)
+    assert fast.timeout("course_goto") == OPERATIONS["course_goto"][1]  # Piso
+
+    slow = AdaptiveTimeouts("lento", history_file=history_file)
+    for _ in range(5):
+        slow.observe("course_goto", 100)
+    assert slow.timeout("course_goto") == OPERATIONS["course_goto"][2]  # Techo
+
+
+def test_timeouts_count_as_censored_samples(history_file):
+    timeouts = AdaptiveTimeouts("academia", history_file=history_file, min_samples=1)
+    timeouts.observe("course_idle", 2)
+    limit = timeouts.timeout("course_idle")
+
+    def goto(timeout_ms):
+        raise TimeoutError(f"Timeout {timeout_ms}ms exceeded")
+
+    with pytest.raises(TimeoutError):
+        timeouts.measure("course_idle", goto)
+    assert timeouts.timeout("course_idle") > limit  # El sitio lento sube su límite
+    assert timeouts.timeouts["course_idle"] == 1 and timeouts.timeout_wait == limit / 1000
+
+
+def test_history_is_persisted_per_site_with_a_window(history_file):
+    timeouts = AdaptiveTimeouts("academia", history_file=history_file, window=3)
+    for seconds in (1, 2, 3, 4):
+        timeouts.observe("catalog_goto", seconds)
+    timeouts.record_loss()
+    timeouts.save()
+    AdaptiveTimeouts("otro", history_file=history_file).save()
+
+    again = AdaptiveTimeouts("academia", history_file=history_file)
+    assert again.samples["catalog_goto"] == [2, 3, 4]
+    assert again.losses == 0  # Los contadores son de la ejecución
+
+
+def test_is_timeout_error_matches_by_name():
+    class TimeoutError(Exception):  # Como playwright._impl._errors.TimeoutError
+        pass
+
+    assert is_timeout_error(TimeoutError("x"))
+    assert not is_timeout_error(ValueError("x"))
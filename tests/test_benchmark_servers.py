@@ -0,0 +1,60 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from utils.fake_openai import FakeOpenAIServer, fake_completion
+from utils.fixture_server import FixtureServer, synthetic_fixtures, load_manifests
+
+
+def post_json(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.status, json.loads(response.read())
+
+
+def test_synthetic_site_is_served_with_local_links(tmp_path):
+    fixtures_dir = str(tmp_path / "fixtures")
+    written = synthetic_fixtures(fixtures_dir, per_page=6)
+    manifest = next(iter(load_manifests(fixtures_dir).values()))
+    assert len(manifest["resources"]) == written
+
+    with FixtureServer(fixtures_dir) as server:
+        catalog = server.local_url(manifest["catalog_url"])
+        assert catalog.startswith("http://127.0.0.1:")
+        with urllib.request.urlopen(catalog, timeout=5) as response:
+            html = response.read().decode("utf-8")
+        # Los links absolutos al host original apuntan al servidor local
+        assert "https://" not in html and catalog.rsplit("/catalogo/", 1)[0] + "/curso/" in html
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(catalog + "no-existe/", timeout=5)
+        assert error.value.code == 404
+        assert server.requests == 2 and server.not_found == 1
+
+
+def test_fake_completion_follows_the_prompt():
+    keys = fake_completion("Extrae datos.\nReturn ONLY raw JSON with keys: duration, modality.")
+    assert keys == {"duration": "N/A", "modality": "N/A"}
+    course = fake_completion("Devuelve course_name y price_raw.\n<h1>Python <b>Pro</b></h1> Precio S/ 1,200")
+    assert course["course_name"] == "Python Pro" and course["price_raw"] == "S/ 1,200"
+    assert fake_completion("course_urls del catálogo")["course_urls"] == []
+
+
+def test_fake_openai_reports_usage_and_injects_429():
+    payload = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "course_name <h1>SQL</h1>"}]}
+    with FakeOpenAIServer(latency=0, jitter=0) as fake:
+        status, body = post_json(fake.base_url + "/chat/completions", payload)
+        assert status == 200
+        assert json.loads(body["choices"][0]["message"]["content"])["course_name"] == "SQL"
+        usage = body["usage"]
+        assert usage["total_tokens"] == usage["prompt_tokens"] + usage["completion_tokens"]
+        assert fake.prompt_tokens + fake.completion_tokens == usage["total_tokens"]
+
+    with FakeOpenAIServer(latency=0, jitter=0, rate_limit_rate=1.0) as limited:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post_json(limited.base_url + "/chat/completions", payload)
+        assert error.value.code == 429 and error.value.headers["Retry-After"] == "1"
+        assert limited.calls == 1 and limited.rate_limited == 1
@@ -0,0 +1,44 @@
+from utils.brochure_fetcher import rank_brochure_candidates
+
+
+def test_rank_prefers_brochure_keywords_and_drops_legal_links():
+    base = "https://academia.example/curso/python/"
+    candidates = [
+        {"href": "/docs/terminos-y-condiciones.pdf", "text": "Términos y condiciones", "footer": True},
+        {"href": "/docs/horarios.pdf", "text": "Horarios", "footer": False},
+        {"href": "/docs/python-brochure.pdf", "text": "Descarga el brochure", "footer": False},
+        {"href": "/docs/privacidad.pdf", "text": "Política de privacidad", "footer": False},
+        {"href": "/docs/mapa.pdf", "text": "Sede", "footer": True},
+    ]
+    ranked = rank_brochure_candidates(candidates, base)
+    assert ranked[0] == "https://academia.example/docs/python-brochure.pdf"
+    assert ranked[1:] == ["https://academia.example/docs/horarios.pdf"]  # Legales y footer fuera
+
+
+class FakePool:
+    def session(self, watchdog, on_page=None):
+        from contextlib import nullcontext
+
+        class Session:
+            page = None
+        return nullcontext(Session())
+
+
+def test_fetcher_is_closed_when_the_site_fails(tmp_path, monkeypatch):
+    import pytest
+    from scrapers.enhanced_universal_scraper import EnhancedUniversalScraper
+
+    monkeypatch.chdir(tmp_path)
+    scraper = EnhancedUniversalScraper("Academia", "https://academia.example/cursos", "academia",
+                                       browser_pool=FakePool())
+    closed = []
+    scraper.brochure_fetcher.close = lambda: closed.append(True)
+    scraper.reuse_discovery = lambda page: True
+
+    def extract_courses(session):
+        raise RuntimeError("sitio caído")
+
+    scraper.extract_courses = extract_courses
+    with pytest.raises(RuntimeError):
+        scraper.parse_catalog()
+    assert closed == [True]
@@ -0,0 +1,64 @@
+from utils.brochure_rules import (
+    find_duration, find_start_date, find_certification, find_section, extract_brochure_fields
+)
+
+BROCHURE = """Especialización en Data Science
+Duración: 120 horas académicas
+Inicio: 21 de enero de 2026
+Obtendrás 2 certificados digitales a nombre de la universidad.
+
+Metodología:
+Clases en vivo con casos reales, laboratorios prácticos y un proyecto final aplicado.
+
+Temario:
+Módulo 1: Python para análisis de datos
+Módulo 2: Estadística y machine learning supervisado
+
+Inversión:
+S/ 3,500
+"""
+
+
+def test_duration_prefers_hours_over_weeks():
+    assert find_duration("Programa de 8 semanas, 96 horas lectivas") == "96 horas lectivas"
+    assert find_duration("Duración: 6 meses") == "6 meses"
+    assert find_duration("3 módulos") is None
+
+
+def test_duration_short_hour_forms():
+    assert find_duration("Duración: 96 h") == "96 h"
+    assert find_duration("48 h. cronológicas") == "48 h. cronológicas"
+    assert find_duration("120 HRS ACADÉMICAS") == "120 HRS ACADÉMICAS"
+    assert find_duration("Para 30 hombres y mujeres") is None
+
+
+def test_start_date_formats():
+    assert find_start_date("Fecha de inicio: lunes, 5 de marzo de 2026") == "lunes, 5 de marzo de 2026"
+    assert find_start_date("Inicio 21/01/2026") == "21/01/2026"
+    assert find_start_date("Sin fecha definida") is None
+
+
+def test_certification_count_and_line():
+    assert find_certification("Recibirás doble certificado internacional.") == "doble certificado internacional"
+    assert find_certification("Certificado digital a nombre del alumno") == "Certificado digital a nombre del alumno"
+    assert find_certification("Sin certificados") is None
+
+
+def test_section_stops_at_next_heading():
+    content = find_section(BROCHURE, "content")
+    assert content.startswith("Módulo 1: Python")
+    assert "S/ 3,500" not in content
+
+
+def test_short_section_is_not_a_summary():
+    assert find_section("Metodología:\nOnline\nInversión:\nS/ 100", "methodology") is None
+
+
+def test_extract_brochure_fields_only_returns_found_fields():
+    fields = extract_brochure_fields(BROCHURE)
+    assert fields["duration"] == "120 horas académicas"
+    assert fields["start_date"] == "21 de enero de 2026"
+    assert fields["certification"].startswith("2 certificados digitales")
+    assert "methodology" in fields and "content" in fields
+    assert "instructor" not in fields
+    assert extract_brochure_fields("") == {}
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from utils.brochure_store import BrochureStore, useful_extraction
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BrochureStore(str(tmp_path / "_store"))
+
+
+def test_same_content_is_stored_once(store):
+    first = store.add_bytes(b"%PDF-1.4 brochure", "https://x.com/c/1")
+    second = store.add_bytes(b"%PDF-1.4 brochure", "https://x.com/c/2")
+    assert first == second
+    assert store.stats()["brochures"] == 1 and store.stats()["courses"] == 2
+    assert store.path_for_url("https://x.com/c/2") == first
+    assert store.source_for_url("https://x.com/c/1") == "Downloaded via Form"
+
+
+def test_index_survives_a_restart(store):
+    path = store.add_bytes(b"%PDF-1.4 uno", "https://x.com/c/1")
+    reopened = BrochureStore(store.store_dir)
+    assert reopened.path_for_url("https://x.com/c/1") == path
+
+
+def test_extraction_is_memoized_per_content(store):
+    path = store.add_bytes(b"%PDF-1.4 brochure", "https://x.com/c/1")
+    calls, hits = [], []
+
+    def extractor(pdf_path):
+        calls.append(pdf_path)
+        return {"duration": "96 horas"}
+
+    assert store.extract_cached(path, extractor) == {"duration": "96 horas"}
+    assert store.extract_cached(path, extractor, on_hit=lambda: hits.append(1)) == {"duration": "96 horas"}
+    assert len(calls) == 1 and hits == [1]
+
+
+def test_failed_extractions_are_not_memoized(store):
+    path = store.add_bytes(b"%PDF-1.4 brochure", "https://x.com/c/1")
+    results = iter([{"duration": "N/A"}, {"duration": "40 horas"}])
+    assert store.extract_cached(path, lambda p: next(results)) == {"duration": "N/A"}
+    assert store.extract_cached(path, lambda p: next(results)) == {"duration": "40 horas"}
+    assert not useful_extraction({}) and not useful_extraction({"a": "N/A", "b": ""})
+
+
+def test_one_extraction_in_flight_per_brochure(store):
+    path = store.add_bytes(b"%PDF-1.4 brochure", "https://x.com/c/1")
+    calls = []
+
+    def slow_extractor(pdf_path):
+        calls.append(pdf_path)
+        time.sleep(0.1)
+        return {"duration": "96 horas"}
+
+    threads = [threading.Thread(target=store.extract_cached, args=(path, slow_extractor)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1  # Los demás workers esperan y usan la memo
+
+
+def test_evicts_least_recently_used(store):
+    store.add_bytes(b"a" * 100, "https://x.com/c/old")
+    store.add_bytes(b"b" * 100, "https://x.com/c/new")
+    store.index["blobs"][store.hash_for_url("https://x.com/c/old")]["last_access"] = 0
+    assert store.evict(150) == 1
+    assert store.path_for_url("https://x.com/c/old") is None
+    assert store.path_for_url("https://x.com/c/new") is not None
+    assert store.total_size() == 100
@@ -0,0 +1,71 @@
+import os
+import json
+
+import pytest
+
+from utils.brochure_strategy import BrochureStrategyMemo, STRATEGY_DIRECT, STRATEGY_FORM, STRATEGY_NONE
+
+
+@pytest.fixture
+def memo_file(tmp_path):
+    return str(tmp_path / "strategies.json")
+
+
+def test_form_success_is_replayed_in_the_next_run(memo_file):
+    memo = BrochureStrategyMemo("academia", memo_file=memo_file)
+    memo.record_success(STRATEGY_FORM, keyword="Brochure", fields={"email": "#mail"})
+    memo.flush()
+
+    again = BrochureStrategyMemo("academia", memo_file=memo_file)
+    assert again.state["strategy"] == STRATEGY_FORM
+    assert again.preferred_keywords(["Descargar", "Brochure"]) == ["Brochure", "Descargar"]
+    assert again.form_mapping() == {"email": "#mail"}
+
+
+def test_site_without_brochures_is_marked_none_and_reprobed(memo_file):
+    memo = BrochureStrategyMemo("academia", memo_file=memo_file, give_up_after=3, reprobe_every=4)
+    for _ in range(3):
+        assert memo.should_try_form()
+        memo.record_failure()
+    assert memo.state["strategy"] == STRATEGY_NONE
+    # Solo el primer curso y luego uno de cada `reprobe_every` vuelve a probar el formulario
+    assert [memo.should_try_form() for _ in range(8)] == [True, False, False, False, True, False, False, False]
+
+
+def test_direct_success_does_not_undo_a_failed_form(memo_file):
+    memo = BrochureStrategyMemo("academia", memo_file=memo_file, give_up_after=2)
+    memo.record_failure()
+    memo.record_failure()
+    memo.record_success(STRATEGY_DIRECT)
+    assert memo.state["strategy"] == STRATEGY_NONE
+    assert memo.stats(STRATEGY_DIRECT)["successes"] == 1
+    assert memo.stats(STRATEGY_FORM)["failures"] == 2
+
+
+def test_download_timeout_is_short_until_the_form_works(memo_file):
+    memo = BrochureStrategyMemo("academia", memo_file=memo_file, fast_timeout=4000)
+    assert memo.download_timeout(30000) == 30000  # Sin historia todavía
+    memo.record_failure()
+    assert memo.download_timeout(30000) == 4000
+    memo.record_success(STRATEGY_FORM)
+    assert memo.download_timeout(30000) == 30000
+
+
+def test_writes_are_batched_until_flush(memo_file):
+    memo = BrochureStrategyMemo("academia", memo_file=memo_file, save_every=3)
+    memo.record_failure()
+    memo.record_failure()
+    assert not os.path.exists(memo_file)
+    memo.record_failure()
+    assert json.load(open(memo_file))["academia"]["stats"][STRATEGY_FORM]["failures"] == 3
+    memo.record_success(STRATEGY_DIRECT)
+    memo.flush()
+    assert json.load(open(memo_file))["academia"]["stats"][STRATEGY_DIRECT]["successes"] == 1
+
+
+def test_old_format_counters_are_kept_as_form_stats(memo_file):
+    with open(memo_file, "w") as f:
+        json.dump({"academia": {"strategy": "form", "successes": 2, "failures": 1, "consecutive_failures": 0}}, f)
+    memo = BrochureStrategyMemo("academia", memo_file=memo_file)
+    assert memo.stats(STRATEGY_FORM) == {"successes": 2, "failures": 1, "consecutive_failures": 0}
+    assert memo.stats(STRATEGY_DIRECT)["successes"] == 0
@@ -0,0 +1,85 @@
+import pytest
+
+from utils.browser_pool import BrowserPool, ContextLeases
+
+
+class FakeContext:
+    def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self, responsive=True):
+        self.responsive = responsive
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    def new_context(self, **options):
+        if not self.responsive:
+            raise RuntimeError("Target closed")
+        return FakeContext()
+
+
+def fake_start(pool):
+    def start():
+        if pool.browser is None:
+            pool.browser = FakeBrowser()
+            pool.launches += 1
+        return pool.browser
+    return start
+
+
+def test_first_launch_is_not_reported_as_a_failure(capsys):
+    pool = BrowserPool()
+    pool.start = fake_start(pool)
+    pool.ensure_healthy()
+    assert pool.launches == 1
+    assert "sin respuesta" not in capsys.readouterr().out
+
+
+def test_unresponsive_browser_is_relaunched(capsys):
+    pool = BrowserPool(health_interval=0)
+    pool.start = fake_start(pool)
+    pool.ensure_healthy()
+    pool.browser.responsive = False
+    pool.ensure_healthy()
+    assert pool.launches == 2 and pool.browser.responsive
+    assert "sin respuesta" in capsys.readouterr().out
+
+
+def test_context_slots_are_released(tmp_path):
+    pool = BrowserPool(max_contexts=1, acquire_timeout=0.01)
+    pool.start = fake_start(pool)
+    with pool.context():
+        assert pool.open_contexts == 1
+        with pytest.raises(TimeoutError):
+            with pool.context():
+                pass
+    with pool.context():
+        pass
+    assert pool.open_contexts == 0 and pool.contexts_opened == 2
+
+
+def test_leases_cap_contexts_across_processes(tmp_path):
+    db_file = str(tmp_path / "leases.db")
+    leases = ContextLeases("http://localhost:9222", db_file=db_file, poll_seconds=0.01)
+    other = ContextLeases("http://localhost:9222", db_file=db_file, poll_seconds=0.01)
+    first = leases.acquire(2, timeout=0)
+    other.acquire(2, timeout=0)
+    with pytest.raises(TimeoutError):
+        leases.acquire(2, timeout=0)
+
+    leases.release(first)
+    assert leases.acquire(2, timeout=0)
+
+
+def test_leases_of_dead_processes_are_freed(tmp_path):
+    leases = ContextLeases("http://localhost:9222", db_file=str(tmp_path / "leases.db"))
+    leases._conn().execute(
+        "INSERT INTO context_leases (lease, endpoint, pid, acquired_at) VALUES ('muerto', ?, ?, 0)",
+        ("http://localhost:9222", 2 ** 22 + 1)  # Por encima de pid_max: no existe
+    )
+    assert leases.acquire(1, timeout=0)
+    assert leases._conn().execute("SELECT COUNT(*) FROM context_leases").fetchone()[0] == 1
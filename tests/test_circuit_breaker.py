@@ -0,0 +1,112 @@
+from utils.circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+
+
+def trip(breaker, failures):
+    for _ in range(failures):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("site", max_consecutive=3, probe_after=2)
+    trip(breaker, 2)
+    assert breaker.state == STATE_CLOSED
+    trip(breaker, 1)
+    assert breaker.state == STATE_OPEN
+    assert breaker.trips == 1
+
+
+def test_success_resets_consecutive_count():
+    breaker = CircuitBreaker("site", max_consecutive=3, min_calls=100)
+    trip(breaker, 2)
+    breaker.record_success()
+    trip(breaker, 2)
+    assert breaker.state == STATE_CLOSED
+
+
+def test_opens_on_error_rate():
+    breaker = CircuitBreaker("site", max_consecutive=100, max_error_rate=0.5, window=10, min_calls=10)
+    for _ in range(5):
+        breaker.record_success()
+        breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+
+def test_half_open_probe_closes_on_success():
+    breaker = CircuitBreaker("site", max_consecutive=1, probe_after=3)
+    trip(breaker, 1)
+    assert [breaker.allow() for _ in range(2)] == [False, False]
+    assert breaker.allow()  # Tercer rechazo: pasa la prueba
+    assert breaker.state == STATE_HALF_OPEN
+    assert not breaker.allow()  # Solo una prueba a la vez
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.probe_after == 3
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_with_backoff():
+    breaker = CircuitBreaker("site", max_consecutive=1, probe_after=2, max_probe_after=5)
+    trip(breaker, 1)
+    breaker.allow()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert breaker.trips == 2
+    assert breaker.probe_after == 4
+    for _ in range(3):
+        assert not breaker.allow()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.probe_after == 5  # Tope max_probe_after
+    assert breaker.skipped == 4  # 1 antes de la primera prueba + 3 antes de la segunda
+
+
+class FakeSession:
+    page = None
+
+    def broken(self):
+        return False
+
+    def page_done(self):
+        pass
+
+
+def test_half_open_probe_is_resolved_before_the_next_course(tmp_path, monkeypatch):
+    """Una prueba exitosa cierra el circuito antes de reclamar el siguiente curso."""
+    import time
+    from scrapers.enhanced_universal_scraper import EnhancedUniversalScraper
+    from utils.frontier import KIND_COURSE, STATE_DONE, STATE_FAILED, STATE_SKIPPED
+
+    monkeypatch.chdir(tmp_path)
+    scraper = EnhancedUniversalScraper("Academia", "https://academia.example/cursos", "academia",
+                                       llm_workers=2, browser_pool=object())
+    scraper.breaker = CircuitBreaker("academia", max_consecutive=1, probe_after=1)
+    scraper.frontier.start_run()
+    for n in range(5):
+        scraper.frontier.add(f"https://academia.example/curso/{n}")
+
+    fetches = []
+
+    def fetch_course(page, url):
+        fetches.append(url)
+        if len(fetches) == 1:
+            return None  # Primer curso falla: el circuito se abre
+        return {"url": url}
+
+    def extract_course(job):
+        time.sleep(0.05)  # El LLM tarda: el éxito llega tarde si el job va por el pipeline
+        return job
+
+    scraper.fetch_course = fetch_course
+    scraper.reduce_course = lambda job: job
+    scraper.extract_course = extract_course
+    scraper.merge_course = lambda job: dict(job, item={"url": job["url"], "course_name": "Curso"})
+
+    scraper.extract_courses(FakeSession())
+
+    counts = scraper.frontier.counts(KIND_COURSE)
+    assert counts.get(STATE_DONE) == 5  # El que falló se reintenta al final (max_retries=1)
+    assert not counts.get(STATE_SKIPPED) and not counts.get(STATE_FAILED)
+    assert len(fetches) == 6
+    assert scraper.breaker.state == STATE_CLOSED and scraper.breaker.trips == 1
@@ -0,0 +1,86 @@
+import pytest
+from utils.course_store import CourseStore
+
+
+def course(url, name, price="S/ 100", site="Academia"):
+    return {"url": url, "course_name": name, "price_raw": price, "source_site": site}
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    return str(tmp_path / "courses.db")
+
+
+def test_upsert_outcomes_and_change_tracking(db_file):
+    store = CourseStore(db_file, run_id="r1")
+    assert store.upsert("academia", course("https://x.com/c/1", "A")) == "inserted"
+    first = store.get("https://x.com/c/1")[0]
+    # La misma URL con tracking o barra final no es un cambio
+    assert store.upsert("academia", course("https://x.com/c/1/?utm_source=mail", "A")) == "unchanged"
+    assert store.get("https://x.com/c/1")[0]["changed_at"] == first["changed_at"]
+    assert store.upsert("academia", course("https://x.com/c/1", "A", price="S/ 200")) == "updated"
+    row = store.get("https://x.com/c/1")[0]
+    assert row["price_raw"] == "S/ 200" and row["changed_at"] >= first["changed_at"]
+    assert store.upsert("academia", {"url": "N/A", "course_name": "sin url"}) is None
+    assert store.stats == {"inserted": 1, "updated": 1, "unchanged": 1, "retired": 0}
+
+
+def test_view_dedupes_by_canonical_url_keeping_first_site(db_file):
+    store = CourseStore(db_file, run_id="r1")
+    store.upsert("pucp_a", course("https://pucp.edu.pe/curso/x", "X", site="PUCP A"))
+    store.upsert("pucp_b", course("https://pucp.edu.pe/curso/x/", "X", site="PUCP B"))
+    store.upsert("pucp_b", course("https://pucp.edu.pe/curso/y", "Y", site="PUCP B"))
+    frame = store.master_frame()
+    assert store.count() == 3
+    assert sorted(zip(frame["course_name"], frame["source_site"])) == [("X", "PUCP A"), ("Y", "PUCP B")]
+
+
+def test_view_only_has_live_rows(db_file):
+    CourseStore(db_file, run_id="r1").upsert("academia", course("https://x.com/c/1", "A"))
+    CourseStore(db_file, run_id="r1").upsert("academia", course("https://x.com/c/2", "B"))
+    CourseStore(db_file, run_id="r1").upsert("otro", course("https://otro.com/c/9", "Z"))
+
+    second = CourseStore(db_file, run_id="r2")
+    second.upsert("academia", course("https://x.com/c/1", "A"))
+    assert second.retire_unseen("academia") == 1
+    assert sorted(second.master_frame()["course_name"]) == ["A", "Z"]  # Otro sitio no se toca
+    assert [row["course_name"] for row in second.courses(site="academia")] == ["A"]
+    assert second.get("https://x.com/c/2")[0]["retired_at"] is not None
+
+    # Si el curso reaparece vuelve a la vista
+    third = CourseStore(db_file, run_id="r3")
+    third.upsert("academia", course("https://x.com/c/2", "B"))
+    assert "B" in set(third.master_frame()["course_name"])
+
+
+def test_retire_keeps_urls_the_run_found_but_could_not_save(db_file):
+    first = CourseStore(db_file, run_id="r1")
+    for n in (1, 2, 3):
+        first.upsert("academia", course(f"https://x.com/c/{n}", f"C{n}"))
+
+    second = CourseStore(db_file, run_id="r2")
+    second.upsert("academia", course("https://x.com/c/1", "C1"))
+    # c/2 falló en la extracción (la frontera la vio); c/3 ya no está en el catálogo
+    assert second.retire_unseen("academia", keep=["https://x.com/c/2/?utm_source=mail"]) == 1
+    assert second.get("https://x.com/c/2")[0]["retired_at"] is None
+    assert second.get("https://x.com/c/3")[0]["retired_at"] is not None
+
+
+def test_scrapers_do_not_open_the_store_unless_given_one(tmp_path, monkeypatch):
+    from scrapers.enhanced_universal_scraper import EnhancedUniversalScraper
+
+    monkeypatch.chdir(tmp_path)
+    scraper = EnhancedUniversalScraper("Academia", "https://academia.example/cursos", "academia",
+                                       browser_pool=object())
+    scraper.add_item(course("https://academia.example/c/1", "A"))
+    assert scraper.course_store is None
+    assert not (tmp_path / "output" / "courses.db").exists()
+
+    store = CourseStore(str(tmp_path / "courses.db"), run_id="r1")
+    sample = EnhancedUniversalScraper("Academia", "https://academia.example/cursos", "academia",
+                                      browser_pool=object(), max_courses=2, course_store=store)
+    assert sample.course_store is None  # Una muestra (--test) no escribe en el almacén
+    full = EnhancedUniversalScraper("Academia", "https://academia.example/cursos", "academia",
+                                    browser_pool=object(), course_store=store)
+    full.add_item(course("https://academia.example/c/1", "A"))
+    assert store.count() == 1
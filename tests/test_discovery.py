@@ -0,0 +1,115 @@
+import pytest
+
+from scrapers.enhanced_universal_scraper import EnhancedUniversalScraper
+from utils.frontier import KIND_CATALOG, STATE_PENDING
+
+CATALOG = "https://academia.example/cursos"
+
+
+def page_url(number):
+    return CATALOG if number == 1 else f"{CATALOG}?page={number}"
+
+
+def courses(*numbers):
+    return [f"https://academia.example/curso/{n}" for n in numbers]
+
+
+@pytest.fixture
+def make_scraper(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def make(catalog, **options):
+        """`catalog`: número de página → URLs de cursos; cada página enlaza a la siguiente."""
+        scraper = EnhancedUniversalScraper("Academia", CATALOG, "academia", browser_pool=object(), **options)
+        scraper.visited = []
+
+        def analyze_catalog_page(page, url):
+            number = next(n for n in catalog if page_url(n) == url)
+            scraper.visited.append(number)
+            return catalog[number], page_url(number + 1) if number + 1 in catalog else None
+
+        scraper.analyze_catalog_page = analyze_catalog_page
+        scraper.frontier.start_run(seed_urls=[CATALOG])
+        return scraper
+    return make
+
+
+def test_pagination_stops_after_pages_without_new_courses(make_scraper):
+    catalog = {1: courses(1, 2), 2: courses(3), 3: courses(1, 2), 4: courses(3), 5: courses(4), 6: courses(5)}
+    scraper = make_scraper(catalog, max_pagination=10, max_zero_yield_pages=2)
+    scraper.discover_courses(None)
+    assert scraper.visited == [1, 2, 3, 4]
+    assert len(scraper.frontier.urls()) == 3
+    assert scraper.frontier.counts(KIND_CATALOG).get(STATE_PENDING) == 1  # Página 5 conocida sin cargar
+
+
+def test_repeated_page_content_counts_as_no_yield(make_scraper):
+    # La página 2 repite la 1 (misma lista con otra query string) aunque la 3 traiga cursos nuevos
+    catalog = {1: courses(1, 2), 2: courses(2, 1), 3: courses(3)}
+    scraper = make_scraper(catalog, max_pagination=10, max_zero_yield_pages=1)
+    scraper.discover_courses(None)
+    assert scraper.visited == [1, 2]
+
+
+def test_a_productive_page_resets_the_streak(make_scraper):
+    catalog = {1: courses(1), 2: courses(1), 3: courses(2), 4: courses(2), 5: courses(3)}
+    scraper = make_scraper(catalog, max_pagination=10, max_zero_yield_pages=2)
+    scraper.discover_courses(None)
+    assert scraper.visited == [1, 2, 3, 4, 5]
+    assert len(scraper.frontier.urls()) == 3
+
+
+def test_max_pagination_still_caps_discovery(make_scraper):
+    catalog = {n: courses(n) for n in range(1, 8)}
+    scraper = make_scraper(catalog, max_pagination=3)
+    scraper.discover_courses(None)
+    assert scraper.visited == [1, 2, 3]
+
+
+def test_catalog_fingerprint_ignores_order_and_tracking(make_scraper):
+    scraper = make_scraper({1: []})
+    assert scraper.catalog_fingerprint(["https://a.com/c/1", "https://a.com/c/2"]) == \
+        scraper.catalog_fingerprint(["https://a.com/c/2/?utm_source=x", "https://a.com/c/1"])
+    assert scraper.catalog_fingerprint(["https://a.com/c/1"]) != scraper.catalog_fingerprint(["https://a.com/c/2"])
+
+
+def test_discovery_cache_skips_phase_one_within_ttl(make_scraper):
+    catalog = {1: courses(1, 2), 2: courses(3)}
+    first = make_scraper(catalog, max_zero_yield_pages=1)
+    first.discover_courses(None)
+    assert first.frontier.load_discovery()["urls"] == sorted(courses(1, 2, 3))
+
+    again = make_scraper(catalog)
+    assert again.reuse_discovery(None)
+    assert again.visited == []  # Ni siquiera la primera página
+    assert sorted(again.frontier.urls()) == sorted(courses(1, 2, 3))
+
+
+def test_expired_cache_is_reused_if_the_first_page_did_not_change(make_scraper):
+    catalog = {1: courses(1, 2), 2: courses(3)}
+    make_scraper(catalog, max_zero_yield_pages=1).discover_courses(None)
+
+    again = make_scraper(catalog, discovery_ttl=0)
+    assert again.reuse_discovery(None)
+    assert again.visited == [1]
+
+    changed = make_scraper({1: courses(1, 2, 9), 2: courses(3)}, discovery_ttl=0)
+    assert not changed.reuse_discovery(None)
+
+
+def test_rediscover_and_resume_ignore_the_cache(make_scraper):
+    catalog = {1: courses(1)}
+    make_scraper(catalog, max_zero_yield_pages=1).discover_courses(None)
+    assert not make_scraper(catalog, rediscover=True).reuse_discovery(None)
+    assert not make_scraper(catalog, resume=True).reuse_discovery(None)
+
+
+def test_failed_first_page_is_not_cached(make_scraper):
+    scraper = make_scraper({1: courses(1)})
+
+    def broken(page, url):
+        raise RuntimeError("timeout")
+
+    scraper.analyze_catalog_page = broken
+    scraper.discover_courses(None)
+    assert scraper.frontier.load_discovery() is None
@@ -0,0 +1,61 @@
+from utils.extraction_eval import (field_matches, score_fields, extract_html_selectors, extract_html_rules,
+                                   evaluate, format_report, is_missing, KIND_HTML)
+
+PAGE = """<html><head><title>Curso | Academia</title></head><body>
+<h1>Diplomado en Ciencia de Datos</h1>
+<p class="price"><del><span class="woocommerce-Price-amount">S/ 2,500</span></del>
+<ins><span class="woocommerce-Price-amount">S/ 1,990</span></ins></p>
+<p>Modalidad online en vivo. Duración: 96 horas académicas.</p>
+</body></html>"""
+
+
+def test_missing_values():
+    assert is_missing(None) and is_missing(" N/A ") and is_missing("nan")
+    assert not is_missing("0")
+
+
+def test_field_matching_rules():
+    assert field_matches("price_raw", "S/ 1,990.00", "S/1990")           # Solo importan los dígitos
+    assert not field_matches("price_raw", "S/ 1,990", "S/ 1,890")
+    assert field_matches("course_name", "Diplomado en Ciencia de Datos", "diplomado en ciencia de datos")
+    assert field_matches("course_type", "Diplomado", "Diplomado de especialización")  # Contención
+    assert field_matches("content", "python pandas sql visualizacion", "python pandas sql y visualizacion")
+    assert not field_matches("content", "python pandas sql", "excel avanzado")
+
+
+def test_wrong_value_counts_as_false_positive_and_negative():
+    expected = {"course_name": "SQL", "price_raw": "S/ 100", "duration": "N/A", "modality": "Online"}
+    predicted = {"course_name": "SQL", "price_raw": "S/ 200", "duration": "40 horas"}
+    assert score_fields(["course_name", "price_raw", "duration", "modality"], expected, predicted) == {
+        "course_name": (1, 0, 0), "price_raw": (0, 1, 1), "duration": (0, 1, 0), "modality": (0, 0, 1)
+    }
+
+
+def test_deterministic_html_extractors():
+    selectors = extract_html_selectors(PAGE)
+    assert selectors["course_name"] == "Diplomado en Ciencia de Datos"
+    assert selectors["price_raw"] == "S/ 1,990" and selectors["price_original"] == "S/ 2,500"
+    assert selectors["course_type"] == "Diplomado" and selectors["modality"] == "En vivo"
+    assert extract_html_rules(PAGE)["price_raw"] == "S/ 2,500"  # Primer precio del texto
+
+
+class NoLLM:
+    tokens = 0
+    cost_usd = 0.0
+
+
+def test_evaluate_scores_strategies_against_the_golden_set(tmp_path):
+    (tmp_path / "page.html").write_text(PAGE, encoding="utf-8")
+    samples = [{
+        "id": "academia-1", "kind": KIND_HTML, "file": "page.html", "url": "https://academia.example/c/1",
+        "expected": {"course_name": "Diplomado en Ciencia de Datos", "price_raw": "S/ 1,990",
+                     "price_original": "S/ 2,500", "course_type": "Diplomado", "modality": "Online"},
+    }]
+    report = evaluate(samples, NoLLM(), golden_dir=str(tmp_path), selected=["selectors", "html:rules"])
+    assert set(report[KIND_HTML]) == {"selectors", "rules"}
+    selectors = report[KIND_HTML]["selectors"]
+    assert selectors["fields"]["price_raw"]["recall"] == 1.0
+    assert selectors["fields"]["modality"]["fp"] == 1  # "En vivo" ≠ "Online"
+    assert selectors["cost_usd"] == 0 and selectors["errors"] == 0
+    assert report[KIND_HTML]["rules"]["fields"]["price_raw"]["recall"] == 0.0
+    assert "selectors" in format_report(report)
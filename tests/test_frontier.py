@@ -0,0 +1,54 @@
+import pytest
+from utils.frontier import (
+    CrawlFrontier, canonicalize_url, KIND_COURSE, STATE_DONE, STATE_PENDING
+)
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://Example.com/cursos/python/", "https://example.com/cursos/python"),
+    ("https://example.com:443/a#temario", "https://example.com/a"),
+    ("http://example.com:80/", "http://example.com/"),
+    ("https://example.com/a?utm_source=x&b=2&a=1&gclid=z", "https://example.com/a?a=1&b=2"),
+    ("  https://example.com/a?ref=home  ", "https://example.com/a"),
+    ("//example.com/a", "https://example.com/a"),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_canonicalize_url_keeps_meaningful_query():
+    assert canonicalize_url("https://example.com/cursos?page=2") != canonicalize_url("https://example.com/cursos")
+
+
+def test_frontier_dedupes_canonical_urls_and_orders_by_priority(tmp_path):
+    frontier = CrawlFrontier("site", db_file=str(tmp_path / "frontier.db"))
+    frontier.start_run()
+    assert frontier.add("https://example.com/curso/a/")
+    assert not frontier.add("https://example.com/curso/a?utm_campaign=x")
+    frontier.add("https://example.com/curso/b")
+    frontier.complete(frontier.claim())
+    frontier.complete(frontier.claim())
+
+    # Corrida siguiente: lo que cambió va antes que lo nuevo, y lo nuevo antes que lo conocido
+    frontier.mark_changed("https://example.com/curso/b/")
+    frontier.start_run()
+    for url in ("https://example.com/curso/a", "https://example.com/curso/b", "https://example.com/curso/c"):
+        assert frontier.add(url)  # Vista en esta ejecución (redescubierta)
+    order = [frontier.claim() for _ in range(3)]
+    assert order == ["https://example.com/curso/b", "https://example.com/curso/c", "https://example.com/curso/a"]
+    assert frontier.claim() is None
+    for url in order:
+        frontier.complete(url)
+    assert frontier.counts(KIND_COURSE).get(STATE_DONE) == 3
+    assert not frontier.counts(KIND_COURSE).get(STATE_PENDING)
+    frontier.close()
+
+
+def test_courses_not_rediscovered_are_not_claimed(tmp_path):
+    frontier = CrawlFrontier("site", db_file=str(tmp_path / "frontier.db"))
+    frontier.start_run()
+    frontier.add("https://example.com/curso/a")
+    frontier.complete(frontier.claim())
+    frontier.start_run()
+    assert frontier.claim() is None
+    frontier.close()
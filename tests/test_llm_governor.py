@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from utils.llm_governor import LLMGovernor, LLMBudgetExhausted, WINDOW_SECONDS, STALE_RESERVATION
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    return str(tmp_path / "llm_governor.db")
+
+
+def test_settle_replaces_the_reservation(db_file):
+    governor = LLMGovernor(run_key="r1", db_file=db_file)
+    call_id = governor.admit("academia", "gpt-4o", est_tokens=1000, est_cost=0.5)
+    assert governor.spent() == 0.5
+    governor.settle(call_id, tokens=300, cost=0.1)
+    usage = governor.usage()
+    assert usage["calls"] == 1 and usage["tokens"] == 300 and usage["cost_usd"] == 0.1
+
+
+def test_budget_is_shared_by_run_key(db_file):
+    first = LLMGovernor(max_usd=1.0, run_key="r1", db_file=db_file)
+    first.settle(first.admit("academia", "gpt-4o", 100), tokens=100, cost=1.0)
+
+    # Otro proceso (o un --resume) con la misma clave ve el gasto acumulado
+    resumed = LLMGovernor(max_usd=1.0, run_key="r1", db_file=db_file)
+    with pytest.raises(LLMBudgetExhausted):
+        resumed.admit("otro", "gpt-4o", 100)
+    assert resumed.exhausted
+
+    other_run = LLMGovernor(max_usd=1.0, run_key="r2", db_file=db_file)
+    assert other_run.admit("otro", "gpt-4o", 100)
+
+
+def test_prune_keeps_run_totals(db_file):
+    governor = LLMGovernor(run_key="r1", db_file=db_file)
+    conn = governor._conn()
+    now = time.time()
+    for started_at, settled in ((now - WINDOW_SECONDS - 5, 1),      # Fuera de la ventana: se poda
+                                (now - WINDOW_SECONDS - 5, 0),      # En curso: se espera
+                                (now - STALE_RESERVATION - 5, 0),   # Proceso caído: se poda
+                                (now - 1, 1)):                      # Dentro de la ventana
+        conn.execute(
+            "INSERT INTO llm_calls (run_key, site, model, started_at, tokens, cost, settled) "
+            "VALUES ('r1', 'academia', 'gpt-4o', ?, 100, 0.25, ?)", (started_at, settled)
+        )
+    before = governor.usage()
+
+    governor._prune(conn, now)
+    governor._prune(conn, now)  # Idempotente
+
+    assert conn.execute("SELECT COUNT(*) FROM llm_calls").fetchone()[0] == 2
+    after = governor.usage()
+    assert (after["calls"], after["tokens"], after["cost_usd"]) == (4, 400, 1.0)
+    assert (after["calls"], after["tokens"], after["cost_usd"]) == \
+        (before["calls"], before["tokens"], before["cost_usd"])
+
+
+def test_admit_prunes_old_calls(db_file):
+    governor = LLMGovernor(run_key="r1", db_file=db_file)
+    conn = governor._conn()
+    conn.execute(
+        "INSERT INTO llm_calls (run_key, site, model, started_at, tokens, cost, settled) "
+        "VALUES ('r1', 'academia', 'gpt-4o', ?, 100, 0.25, 1)", (time.time() - WINDOW_SECONDS - 5,)
+    )
+    governor.admit("academia", "gpt-4o", 100, est_cost=0.25)
+    assert conn.execute("SELECT COUNT(*) FROM llm_calls").fetchone()[0] == 1
+    assert governor.spent() == 0.5
+
+
+def test_rpm_limit_waits_for_the_window(db_file):
+    governor = LLMGovernor(max_rpm=1, run_key="r1", db_file=db_file)
+    conn = governor._conn()
+    now = time.time()
+    assert governor._try_admit(conn, "t1", "academia", "gpt-4o", 100, 0.0, now) is not None
+    assert governor._try_admit(conn, "t2", "academia", "gpt-4o", 100, 0.0, now) is None
+    assert governor._try_admit(conn, "t3", "academia", "gpt-4o", 100, 0.0, now + WINDOW_SECONDS + 1) is not None
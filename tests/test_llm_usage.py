@@ -0,0 +1,46 @@
+import json
+
+from utils.llm_usage import (LLMUsageLog, OUTCOME_PARSED, OUTCOME_PARSE_ERROR, OUTCOME_RULES,
+                             CACHE_MEMO, CACHE_PROMPT)
+
+
+def test_calls_are_logged_and_rolled_up(tmp_path):
+    log_file = tmp_path / "llm_calls.jsonl"
+    log = LLMUsageLog(run_id="r1", log_file=str(log_file), live_every=0)
+    log.record("academia", "extract_from_html", "gpt-4o", prompt_tokens=1000, completion_tokens=200,
+               cached_tokens=500, cost_usd=0.01, latency=2.0, cache=CACHE_PROMPT)
+    log.record("academia", "extract_from_html", "gpt-4o", prompt_tokens=800, completion_tokens=100,
+               cost_usd=0.008, latency=4.0, outcome=OUTCOME_PARSE_ERROR)
+    log.record("academia", "extract_from_pdf", cache=CACHE_MEMO)  # Memo: sin llamada
+    log.record("otro", "extract_from_pdf", outcome=OUTCOME_RULES)
+
+    lines = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert len(lines) == 4 and {line["run_id"] for line in lines} == {"r1"}
+
+    report = log.report()
+    total = report["total"]
+    assert total["calls"] == 2 and total["avoided_calls"] == 2
+    assert total["prompt_tokens"] == 1800 and total["cached_tokens"] == 500
+    assert total["cost_usd"] == 0.018
+    assert (total["latency_p50"], total["latency_p95"]) == (2.0, 4.0)
+    assert total["outcomes"] == {OUTCOME_PARSED: 2, OUTCOME_PARSE_ERROR: 1, OUTCOME_RULES: 1}
+
+    academia = report["by_site"]["academia"]
+    assert academia["total"]["calls"] == 2
+    assert academia["by_method"]["extract_from_pdf"]["cache"] == {CACHE_MEMO: 1}
+    assert report["by_site"]["otro"]["total"]["calls"] == 0
+    assert report["by_method"]["extract_from_html"]["completion_tokens"] == 300
+
+
+def test_live_summary_every_n_calls(tmp_path, capsys):
+    log = LLMUsageLog(log_file=str(tmp_path / "llm_calls.jsonl"), live_every=2)
+    log.record("academia", "extract_from_html", "gpt-4o", prompt_tokens=100, cost_usd=0.5)
+    assert "LLM acumulado" not in capsys.readouterr().out
+    log.record("academia", "extract_from_html", "gpt-4o", prompt_tokens=100, cost_usd=0.5)
+    assert "2 llamadas | 200 tokens | $1.00" in capsys.readouterr().out
+
+
+def test_export_writes_the_report(tmp_path):
+    log = LLMUsageLog(run_id="r1", log_file=str(tmp_path / "llm_calls.jsonl"))
+    path = log.export(str(tmp_path / "report.json"))
+    assert json.load(open(path))["run_id"] == "r1"
@@ -0,0 +1,96 @@
+import subprocess
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+from utils.memory_watch import MemoryWatchdog, browser_tree_rss, MB
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="lee /proc")
+def test_tree_rss_counts_child_processes():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        usage = browser_tree_rss()
+        assert usage["processes"] >= 1 and usage["total"] > 0
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_recycles_after_max_pages():
+    watchdog = MemoryWatchdog(max_pages=3, max_rss_mb=None)
+    assert [watchdog.page_done(remote=True) for _ in range(3)] == [None, None, "pages"]
+    watchdog.recycled("pages")
+    assert watchdog.pages == 0 and watchdog.total_pages == 3 and watchdog.recycles == {"pages": 1}
+
+
+def test_memory_is_checked_every_n_pages():
+    watchdog = MemoryWatchdog(max_pages=None, max_rss_mb=100, check_every=2)
+    readings = iter([50 * MB, 150 * MB])
+    watchdog.sample = lambda page=None, remote=False: next(readings)
+    watchdog.peak_bytes = 1  # Ya medido al abrir la sesión
+    assert watchdog.page_done() is None      # Página 1: no se mide
+    assert watchdog.page_done() is None      # Página 2: 50 MB
+    assert watchdog.page_done() is None      # Página 3: no se mide
+    assert watchdog.page_done() == "memory"  # Página 4: 150 MB
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def is_closed(self):
+        return self.closed
+
+
+class FakeBrowser:
+    def is_connected(self):
+        return True
+
+
+class FakePool:
+    endpoint = None
+
+    def __init__(self):
+        self.browser = FakeBrowser()
+        self.contexts = 0
+        self.restarts = 0
+
+    @contextmanager
+    def context(self, **options):
+        self.contexts += 1
+        pages = self
+
+        class Context:
+            def new_page(self):
+                pages.page = FakePage()
+                return pages.page
+        yield Context()
+
+    def restart(self):
+        self.restarts += 1
+        return True
+
+
+def test_session_recycles_the_context_and_recovers_from_crashes():
+    from utils.browser_pool import PageSession
+
+    pool = FakePool()
+    seen = []
+    session = PageSession(pool, MemoryWatchdog(max_pages=2, max_rss_mb=None), on_page=seen.append)
+    session.open()
+    first = session.page
+    assert session.page_done() is None
+    assert session.page_done() == "pages"
+    assert session.page is not first and pool.contexts == 2 and pool.restarts == 0
+
+    session.page.handlers["crash"](session.page)  # El renderer se cae
+    assert session.page_done() == "crash"
+    assert pool.contexts == 3 and not session.crashed
+    assert len(seen) == 3  # on_page con cada página nueva
+    session.close()
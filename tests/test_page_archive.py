@@ -0,0 +1,49 @@
+import pytest
+
+from utils.page_archive import (PageArchive, ArchiveReader, RECORD_CATALOG, RECORD_COURSE,
+                                RECORD_BROCHURE, RECORD_CARRIED)
+
+
+def test_records_round_trip_by_offset(tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    archive = PageArchive("r1", "academia", archive_dir=archive_dir)
+    archive.add(RECORD_CATALOG, "https://x.com/cursos", "<html>catálogo</html>")
+    archive.add(RECORD_COURSE, "https://x.com/c/1", "<html>v1</html>")
+    archive.add(RECORD_COURSE, "https://x.com/c/1", "<html>v2</html>")
+    archive.add(RECORD_BROCHURE, "https://x.com/b.pdf", b"%PDF-1.4", "application/pdf", course_url="https://x.com/c/1")
+
+    reader = ArchiveReader("r1", archive_dir=archive_dir)
+    assert reader.sites() == ["academia"]
+    assert archive.records == 4 and len(reader.index("academia")) == 4
+
+    pages = reader.latest("academia", RECORD_COURSE)
+    assert list(pages) == ["https://x.com/c/1"]
+    assert reader.read_text("academia", pages["https://x.com/c/1"]) == "<html>v2</html>"
+    # Los brochures se indexan por el curso al que pertenecen
+    brochure = reader.latest("academia", RECORD_BROCHURE)["https://x.com/c/1"]
+    assert brochure["url"] == "https://x.com/b.pdf" and reader.read("academia", brochure) == b"%PDF-1.4"
+    assert reader.read_text("academia", reader.index("academia")[0]) == "<html>catálogo</html>"
+
+
+def test_unknown_run_is_an_error(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ArchiveReader("no-existe", archive_dir=str(tmp_path))
+
+
+def test_replay_reextracts_archived_pages_offline(tmp_path, monkeypatch):
+    from scrapers.replay_scraper import ArchiveReplayScraper
+
+    monkeypatch.chdir(tmp_path)
+    archive = PageArchive("r1", "academia")
+    archive.add(RECORD_COURSE, "https://x.com/c/1", "<h1>Python</h1>")
+    archive.add(RECORD_COURSE, "https://x.com/c/2", "<h1>SQL</h1>")
+    archive.add(RECORD_CARRIED, "https://x.com/c/3", b"")
+
+    scraper = ArchiveReplayScraper("Academia", "academia", "r1", max_workers=2)
+    assert scraper.course_store is None  # Un replay no es el estado actual del catálogo
+    scraper.llm_helper.extract_from_html = lambda html, url: {"course_name": html[4:-5], "price_raw": "N/A"}
+    # El curso que respondió 304 en la ejecución original conserva su última fila
+    scraper.page_cache.record("https://x.com/c/3", "fresh", "huella", {"course_name": "Excel", "url": "https://x.com/c/3"})
+
+    scraper.parse_catalog()
+    assert sorted(item["course_name"] for item in scraper.data) == ["Excel", "Python", "SQL"]
@@ -0,0 +1,84 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from utils.page_cache import (CoursePageCache, content_fingerprint,
+                              STATUS_FRESH, STATUS_UNCHANGED, STATUS_CHANGED)
+from utils.politeness import PolitenessScheduler
+
+ETAG = '"v1"'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CoursePageCache("academia", db_file=str(tmp_path / "cache.db"),
+                           scheduler=PolitenessScheduler(respect_robots=False))
+
+
+@pytest.fixture
+def server():
+    """Sitio que responde 304 si el cliente manda el ETag vigente."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = b"<html>curso</html>"
+            self.send_response(200)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fingerprint_ignores_whitespace_and_case():
+    assert content_fingerprint("Curso  de\nPython") == content_fingerprint("curso de python ")
+    assert content_fingerprint("Curso de Python") != content_fingerprint("Curso de SQL")
+
+
+def test_compare_detects_fresh_unchanged_and_changed(cache):
+    url = "https://academia.example/curso/1"
+    fingerprint = content_fingerprint("Curso de Python")
+    assert cache.compare(url, fingerprint) == (STATUS_FRESH, None)
+
+    cache.record(url, STATUS_FRESH, fingerprint, {"course_name": "Python"})
+    assert cache.compare(url, fingerprint) == (STATUS_UNCHANGED, {"course_name": "Python"})
+    status, previous = cache.compare(url, content_fingerprint("Curso de Python 2"))
+    assert status == STATUS_CHANGED and previous == {"course_name": "Python"}
+    assert cache.stats[STATUS_FRESH] == 1
+
+
+def test_revalidate_reuses_the_row_on_304(cache, server):
+    url = server + "/curso/1"
+    assert cache.revalidate(url) is None  # Sin validadores guardados no se pregunta
+    cache.record(url, STATUS_FRESH, "huella", {"course_name": "Python"}, headers={"ETag": ETAG})
+    assert cache.revalidate(url) == {"course_name": "Python"}
+    assert cache.stats[STATUS_UNCHANGED] == 1
+
+
+def test_revalidate_falls_through_when_the_page_changed(cache, server):
+    url = server + "/curso/1"
+    cache.record(url, STATUS_FRESH, "huella", {"course_name": "Python"}, headers={"ETag": '"v0"'})
+    assert cache.revalidate(url) is None
+
+
+def test_unchanged_record_keeps_changed_at(cache):
+    url = "https://academia.example/curso/1"
+    conn = cache._conn()
+    cache.record(url, STATUS_FRESH, "a", {"course_name": "Python"})
+    conn.execute("UPDATE course_pages SET changed_at = 1")
+    cache.record(url, STATUS_UNCHANGED, "a", {"course_name": "Python"})
+    assert conn.execute("SELECT changed_at FROM course_pages").fetchone()[0] == 1
+    cache.record(url, STATUS_CHANGED, "b", {"course_name": "Python 2"})
+    assert conn.execute("SELECT changed_at FROM course_pages").fetchone()[0] > 1
@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.pipeline import Pipeline, Stage
+
+
+def test_items_flow_through_every_stage_in_order():
+    seen = []
+    pipeline = Pipeline([
+        Stage("double", lambda x: x * 2, workers=2),
+        Stage("sink", seen.append),
+    ])
+    for n in range(10):
+        pipeline.submit(n)
+    pipeline.close()
+    assert sorted(seen) == [n * 2 for n in range(10)]
+    stages = {s["stage"]: s for s in pipeline.metrics()["stages"]}
+    assert stages["fetch"]["processed"] == 10
+    assert stages["double"]["processed"] == 10 and stages["sink"]["processed"] == 10
+
+
+def test_none_drops_the_item_and_errors_reach_on_error():
+    errors, seen = [], []
+
+    def check(x):
+        if x == 3:
+            raise ValueError("malo")
+        return x if x % 2 else None
+
+    pipeline = Pipeline([Stage("check", check), Stage("sink", seen.append)],
+                        on_error=lambda item, e: errors.append((item, str(e))))
+    for n in range(6):
+        pipeline.submit(n)
+    pipeline.close()
+    assert seen == [1, 5]
+    assert errors == [(3, "malo")]
+    assert {s["stage"]: s["errors"] for s in pipeline.metrics()["stages"]}["check"] == 1
+
+
+def test_failing_on_error_does_not_kill_the_worker():
+    seen = []
+
+    def on_error(item, e):
+        raise RuntimeError("callback roto")
+
+    pipeline = Pipeline([Stage("boom", lambda x: 1 / x), Stage("sink", seen.append)], on_error=on_error)
+    for n in (0, 1, 2):
+        pipeline.submit(n)
+    pipeline.close()  # No se cuelga: el worker sigue vivo
+    assert sorted(seen) == [0.5, 1.0]
+
+
+def test_full_queue_blocks_the_producer():
+    release = threading.Event()
+    pipeline = Pipeline([Stage("slow", lambda x: release.wait(), workers=1, queue_size=1)])
+    pipeline.submit(1)  # Lo toma el worker
+    time.sleep(0.05)
+    pipeline.submit(2)  # Llena la cola
+
+    blocked = threading.Thread(target=pipeline.submit, args=(3,))
+    blocked.start()
+    blocked.join(0.1)
+    assert blocked.is_alive()  # Back-pressure hasta el productor
+
+    release.set()
+    blocked.join(1)
+    assert not blocked.is_alive()
+    pipeline.close()
+
+
+class FakePage:
+    def content(self):
+        return "<html><body>Curso</body></html>"
+
+
+def done_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def test_form_fallback_runs_when_direct_link_yields_nothing(tmp_path, monkeypatch):
+    """Con un link directo que no entrega PDF, el formulario se intenta con la página aún abierta."""
+    import scrapers.enhanced_universal_scraper as module
+
+    monkeypatch.chdir(tmp_path)
+    scraper = module.EnhancedUniversalScraper("Academia", "https://academia.example/cursos", "academia",
+                                              force_refresh=True, browser_pool=object())
+    monkeypatch.setattr(module, "main_content_text", lambda page: "Curso")
+    monkeypatch.setattr(module, "find_direct_brochure_urls", lambda page: ["https://academia.example/b.pdf"])
+    scraper.load_page = lambda page, url, kind: None
+    scraper.brochure_fetcher.submit = lambda urls, course_url: done_future(None)
+    scraper.find_brochure_button = lambda page: (object(), "brochure")
+    forms = []
+
+    def attempt_brochure_download(page, btn, url, keyword):
+        forms.append(url)
+        return str(tmp_path / "form.pdf")
+
+    scraper.attempt_brochure_download = attempt_brochure_download
+
+    job = scraper.fetch_course(FakePage(), "https://academia.example/curso/1")
+    assert forms == ["https://academia.example/curso/1"]
+    assert job["pdf_path"] == str(tmp_path / "form.pdf")
+    assert job["brochure_url"] == "Downloaded via Form"
+    assert "brochure_future" not in job
+
+
+def test_direct_link_success_skips_the_form(tmp_path, monkeypatch):
+    import scrapers.enhanced_universal_scraper as module
+
+    monkeypatch.chdir(tmp_path)
+    scraper = module.EnhancedUniversalScraper("Academia", "https://academia.example/cursos", "academia",
+                                              force_refresh=True, browser_pool=object())
+    monkeypatch.setattr(module, "main_content_text", lambda page: "Curso")
+    monkeypatch.setattr(module, "find_direct_brochure_urls", lambda page: ["https://academia.example/b.pdf"])
+    scraper.load_page = lambda page, url, kind: None
+    scraper.brochure_fetcher.submit = lambda urls, course_url: done_future(str(tmp_path / "direct.pdf"))
+    scraper.find_brochure_button = lambda page: (_ for _ in ()).throw(AssertionError("no debía buscar el formulario"))
+
+    job = scraper.fetch_course(FakePage(), "https://academia.example/curso/1")
+    assert job["pdf_path"] == str(tmp_path / "direct.pdf")
+    assert "brochure_future" not in job
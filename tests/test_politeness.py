@@ -0,0 +1,59 @@
+import time
+import threading
+from utils.politeness import TokenBucket, PolitenessScheduler, domain_key, DEFAULT_RATE
+
+
+def test_bucket_serves_burst_without_waiting():
+    bucket = TokenBucket(rate=1, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_bucket_waits_for_refill():
+    bucket = TokenBucket(rate=20, burst=1)
+    bucket.acquire()
+    start = time.monotonic()
+    waited = bucket.acquire()
+    assert waited > 0
+    assert time.monotonic() - start >= 0.04
+
+
+def test_bucket_reconfigure_caps_tokens():
+    bucket = TokenBucket(rate=1, burst=5)
+    bucket.reconfigure(rate=2, burst=2)
+    assert bucket.tokens <= 2 and bucket.rate == 2
+
+
+def test_domain_key():
+    assert domain_key("https://infopucp.pucp.edu.pe/cursos") == "pucp.edu.pe"
+    assert domain_key("https://www.platzi.com/cursos/") == "platzi.com"
+    assert domain_key("http://127.0.0.1:8001/catalogo/") == "127.0.0.1"
+
+
+def test_configure_keeps_policy_and_only_clamps_explicit_values():
+    scheduler = PolitenessScheduler(respect_robots=False)
+    policy = scheduler.configure("https://a.pucp.edu.pe", rate=5, concurrency=4)
+    policy.requests = 7
+    same = scheduler.configure("https://b.pucp.edu.pe")  # Sin host_*: no vuelve al default
+    assert same is policy and policy.rate == 5 and policy.requests == 7
+    scheduler.configure("https://c.pucp.edu.pe", rate=2)
+    assert policy.rate == 2 and policy.bucket.rate == 2
+    fresh = scheduler.configure("https://otro.com")
+    assert fresh.rate == DEFAULT_RATE
+
+
+def test_shrinking_concurrency_does_not_break_held_slots():
+    scheduler = PolitenessScheduler(respect_robots=False)
+    policy = scheduler.configure("https://example.com", concurrency=2, rate=1000, burst=1000)
+    with scheduler.slot("https://example.com/a"):
+        scheduler.configure("https://example.com", concurrency=1)
+        entered = threading.Event()
+
+        def worker():
+            with scheduler.slot("https://example.com/b"):
+                entered.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert not entered.wait(0.2)  # El tope nuevo ya aplica
+    thread.join(2)
+    assert entered.is_set() and policy.slots.in_use == 0
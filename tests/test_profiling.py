@@ -0,0 +1,70 @@
+import pstats
+import threading
+import time
+
+import pytest
+
+from utils.profiling import Profiler, StackSampler, MODE_CPROFILE, _thread_label
+
+
+def busy_wait(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+
+def worker_busy_wait():
+    busy_wait(0.2)
+
+
+def test_thread_labels_group_worker_pools():
+    assert _thread_label("extract-0") == _thread_label("extract-3") == "extract"
+    assert _thread_label("MainThread") == "MainThread"
+    assert _thread_label("fake-openai") == "fake-openai"
+
+
+def test_sampler_builds_collapsed_stacks_and_pstats(tmp_path):
+    sampler = StackSampler(interval=0.002)
+    sampler.start()
+    worker = threading.Thread(target=worker_busy_wait, name="extract-0")
+    worker.start()
+    worker.join()
+    sampler.stop()
+    assert sampler.samples > 0
+
+    path = str(tmp_path / "site.collapsed")
+    sampler.write_collapsed(path)
+    lines = open(path).read().splitlines()
+    assert any(line.startswith("extract;") and "busy_wait" in line for line in lines)
+
+    stats = sampler.pstats_dict()
+    busy = next(value for key, value in stats.items() if key[2] == "busy_wait")
+    outer = next(value for key, value in stats.items() if key[2] == "worker_busy_wait")
+    assert busy[2] > 0 and outer[3] >= busy[3]  # Propio en la hoja, acumulado en los llamadores
+
+
+@pytest.mark.parametrize("mode", ["sample", MODE_CPROFILE])
+def test_site_writes_loadable_artifacts(tmp_path, mode):
+    profiler = Profiler("r1", mode=mode, profile_dir=str(tmp_path), interval=0.002)
+    with profiler.site("academia"):
+        worker = threading.Thread(target=worker_busy_wait, name="extract-0")
+        worker.start()
+        worker.join()
+    pstats_path, collapsed_path = profiler.artifacts["academia"]
+    names = {key[2] for key in pstats.Stats(pstats_path).stats}
+    assert "busy_wait" in names  # También lo que corre en hilos del pipeline
+    assert "busy_wait" in open(collapsed_path).read()
+
+
+def test_artifacts_are_written_even_if_the_site_fails(tmp_path):
+    profiler = Profiler("r1", profile_dir=str(tmp_path), interval=0.002)
+    with pytest.raises(RuntimeError):
+        with profiler.site("academia"):
+            busy_wait(0.02)
+            raise RuntimeError("sitio caído")
+    assert "academia" in profiler.artifacts
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        Profiler("r1", mode="perf", profile_dir=str(tmp_path))
@@ -0,0 +1,51 @@
+from utils.run_history import RunHistory, MODE_TEST, MODE_RESUMED
+
+
+def history_with(tmp_path, runs):
+    history = RunHistory(str(tmp_path / "run_history.jsonl"))
+    for run_id, metrics in runs:
+        history.record(run_id, "Academia", **metrics)
+    return history
+
+
+def test_compare_flags_regressions_against_median(tmp_path):
+    history = history_with(tmp_path, [
+        ("20260101_000000", {"duration_seconds": 100, "courses": 50}),
+        ("20260102_000000", {"duration_seconds": 120, "courses": 52}),
+        ("20260103_000000", {"duration_seconds": 110, "courses": 48}),
+        ("20260104_000000", {"duration_seconds": 400, "courses": 20}),
+    ])
+    regressions = {(site, metric): (reference, value) for site, metric, reference, value, _ in history.compare()}
+    assert regressions == {("Academia", "duration_seconds"): (110, 400), ("Academia", "courses"): (50, 20)}
+
+
+def test_compare_ignores_small_absolute_changes(tmp_path):
+    history = history_with(tmp_path, [
+        ("20260101_000000", {"errors": 1}),
+        ("20260102_000000", {"errors": 3}),  # +200%, pero menos de 3 errores de diferencia
+    ])
+    assert history.compare() == []
+
+
+def test_compare_uses_only_earlier_runs_and_the_last_n(tmp_path):
+    history = history_with(tmp_path, [
+        ("20260101_000000", {"courses": 10}),
+        ("20260102_000000", {"courses": 100}),
+        ("20260103_000000", {"courses": 100}),
+        ("20260104_000000", {"courses": 20}),
+    ])
+    assert history.compare("20260104_000000", last=2)[0][2] == 100
+    assert history.compare("20260101_000000") == []
+
+
+def test_test_and_resumed_runs_are_not_compared(tmp_path):
+    history = history_with(tmp_path, [
+        ("20260101_000000", {"courses": 100}),
+        ("20260102_000000", {"courses": 100}),
+    ])
+    history.record("20260103_000000", "Academia", mode=MODE_TEST, courses=2)
+    history.record("20260104_000000", "Academia", mode=MODE_RESUMED, courses=30)
+    assert history.compare("20260103_000000") == []
+    assert history.compare("20260104_000000") == []
+    history.record("20260105_000000", "Academia", courses=98)
+    assert history.compare("20260105_000000") == []  # Las corridas marcadas no bajan la mediana
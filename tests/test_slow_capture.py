@@ -0,0 +1,118 @@
+import json
+import os
+
+import pytest
+
+from utils.slow_capture import SlowPageCapture, INDEX_FILE
+
+
+class FakeTracing:
+    def __init__(self):
+        self.chunks = []
+
+    def start(self, **options):
+        pass
+
+    def start_chunk(self):
+        pass
+
+    def stop_chunk(self, path=None):
+        self.chunks.append(path)
+        if path:
+            with open(path, "wb") as f:
+                f.write(b"PK")
+
+
+class FakeContext:
+    def __init__(self):
+        self.tracing = FakeTracing()
+
+
+class FakePage:
+    def __init__(self):
+        self.context = FakeContext()
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+
+class FakeRequest:
+    method = "GET"
+    resource_type = "xhr"
+    timing = {}
+    failure = None
+
+    def __init__(self, url):
+        self.url = url
+
+    def response(self):
+        return None
+
+
+@pytest.fixture
+def capture_dir(tmp_path):
+    return str(tmp_path / "slow_pages")
+
+
+def load(capture, page, url, seconds, requests=(), finished=(), error=None):
+    capture.begin(page)
+    for request in requests:
+        page.handlers["request"](request)
+    for request in finished:
+        page.handlers["requestfinished"](request)
+    return capture.end(page, url, seconds, error=error)
+
+
+def test_threshold_uses_the_floor_until_there_is_history(capture_dir):
+    capture = SlowPageCapture("academia", capture_dir=capture_dir, floor_seconds=2, min_samples=5,
+                              percentile=0.95, sample_rate=0)
+    page = FakePage()
+    capture.attach(page)
+    assert capture.threshold() == 2
+    for seconds in (1, 1, 1, 1, 10):
+        load(capture, page, "https://x.com/c/ok", seconds)
+    assert capture.threshold() == 10
+
+
+def test_slow_page_keeps_har_trace_and_pending_requests(capture_dir):
+    capture = SlowPageCapture("academia", capture_dir=capture_dir, floor_seconds=2, sample_rate=1.0, seed=1)
+    page = FakePage()
+    capture.attach(page)
+
+    assert load(capture, page, "https://x.com/c/rapida", 0.5) is None
+    assert page.context.tracing.chunks == [None]  # Chunk descartado
+
+    done, hanging = FakeRequest("https://x.com/app.js"), FakeRequest("https://analytics.example/beacon")
+    record = load(capture, page, "https://x.com/c/lenta", 5.0, requests=[done, hanging], finished=[done])
+    assert record["pending_requests"] == ["https://analytics.example/beacon"]
+    assert record["trace"].endswith(".trace.zip") and os.path.exists(record["trace"])
+    har = json.load(open(record["har"]))
+    assert [entry["_pending"] for entry in har["log"]["entries"]] == [False, True]
+    index = [json.loads(line) for line in open(os.path.join(capture_dir, INDEX_FILE))]
+    assert [entry["url"] for entry in index] == ["https://x.com/c/lenta"]
+
+
+def test_failures_are_captured_and_captures_are_capped(capture_dir):
+    capture = SlowPageCapture("academia", capture_dir=capture_dir, floor_seconds=2, sample_rate=0, max_captures=1)
+    page = FakePage()
+    capture.attach(page)
+    record = load(capture, page, "https://x.com/c/1", 0.5, error=TimeoutError("Timeout 30000ms"))
+    assert record["error"] == "Timeout 30000ms" and record["trace"] is None
+    assert load(capture, page, "https://x.com/c/2", 9.0) is None
+    assert capture.captures == 1
+
+
+def test_storage_cap_removes_oldest_captures_and_their_index_entries(capture_dir):
+    capture = SlowPageCapture("academia", capture_dir=capture_dir, floor_seconds=0, sample_rate=0)
+    page = FakePage()
+    capture.attach(page)
+    first = load(capture, page, "https://x.com/c/1", 1.0)
+    os.utime(first["har"], (1, 1))  # La más vieja
+    har_size = os.path.getsize(first["har"])
+
+    capture.max_bytes = har_size + 10  # Solo entra una captura
+    second = load(capture, page, "https://x.com/c/2", 1.0)
+    assert not os.path.exists(first["har"]) and os.path.exists(second["har"])
+    index = [json.loads(line) for line in open(os.path.join(capture_dir, INDEX_FILE))]
+    assert [entry["url"] for entry in index] == ["https://x.com/c/2"]
@@ -0,0 +1,43 @@
+import json
+import threading
+
+import pytest
+
+from utils.spans import SpanRecorder
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    return SpanRecorder(run_id="r1", event_file=str(tmp_path / "events.jsonl"),
+                        prom_file=str(tmp_path / "metrics.prom"))
+
+
+def test_span_records_duration_and_attributes(recorder):
+    with recorder.span("academia", "course_goto", url="https://x.com/c/1"):
+        pass
+    event = json.loads(open(recorder.event_file).read())
+    assert event["run_id"] == "r1" and event["phase"] == "course_goto" and event["outcome"] == "ok"
+    assert event["url"] == "https://x.com/c/1" and event["thread"] == threading.current_thread().name
+
+
+def test_exceptions_are_recorded_and_reraised(recorder):
+    with pytest.raises(TimeoutError):
+        with recorder.span("academia", "course_goto"):
+            raise TimeoutError("lento")
+    assert recorder.stats()[("academia", "course_goto")]["errors"] == 1
+    assert json.loads(open(recorder.event_file).read())["outcome"] == "TimeoutError"
+
+
+def test_stats_and_prometheus_export(recorder):
+    for seconds in (1.0, 2.0, 3.0, 4.0):
+        recorder.record("academia", "llm_call", seconds)
+    recorder.record('sitio "raro"', "goto", 0.5)
+    stats = recorder.stats()[("academia", "llm_call")]
+    assert (stats["count"], stats["total"], stats["p50"], stats["p95"]) == (4, 10.0, 2.0, 4.0)
+
+    text = open(recorder.export_prometheus()).read()
+    assert 'scraper_phase_seconds{site="academia",phase="llm_call",quantile="0.95"} 4.0000' in text
+    assert 'scraper_phase_seconds_count{site="academia",phase="llm_call"} 4' in text
+    assert 'site="sitio \\"raro\\""' in text  # Etiquetas escapadas
+    assert 'scraper_phase_errors_total{site="academia",phase="llm_call"} 0' in text
+    assert "llm_call" in recorder.summary()
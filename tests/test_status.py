@@ -0,0 +1,83 @@
+import json
+import socket
+import urllib.error
+import urllib.request
+
+import pytest
+
+from utils.status import RunStatus, PHASE_EXTRACTION, PHASE_DONE, STOP_REASON
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def status(tmp_path):
+    return RunStatus(run_id="r1", status_file=str(tmp_path / "status.json"), interval=60, spend_fn=lambda: 1.23456)
+
+
+def test_snapshot_reports_progress_rate_and_eta(status):
+    status.site_started("academia", "Academia", probe=lambda: {"frontier": {"done": 4, "pending": 6}})
+    status.set_phase("academia", PHASE_EXTRACTION)
+    status.sites["academia"].extraction_started_at -= 60  # Un minuto extrayendo
+    for _ in range(4):
+        status.course_done("academia")
+    status.error("academia", "HTTP 429")
+
+    snapshot = status.snapshot()
+    site = snapshot["sites"]["academia"]
+    assert snapshot["llm_spend_usd"] == 1.2346 and snapshot["active"] == ["academia"]
+    assert site["courses_done"] == 4 and site["remaining"] == 6 and site["frontier_size"] == 10
+    assert 3.5 < site["rate_per_min"] <= 4.0
+    assert 85 < site["eta_seconds"] < 105  # 6 cursos a ~4 por minuto
+    assert site["error_count"] == 1 and site["recent_errors"][0]["message"] == "HTTP 429"
+
+
+def test_probe_errors_do_not_break_the_snapshot(status):
+    def broken():
+        raise RuntimeError("sqlite ocupado")
+
+    status.site_started("academia", "Academia", probe=broken)
+    assert status.snapshot()["sites"]["academia"]["probe_error"] == "sqlite ocupado"
+
+
+def test_finished_site_writes_the_file(status):
+    status.site_started("academia", "Academia")
+    status.site_finished("academia", "ok")
+    written = json.load(open(status.status_file))
+    assert written["sites"]["academia"]["phase"] == PHASE_DONE and written["active"] == []
+
+
+def test_stop_file_requests_a_stop(status, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    status.site_started("academia", "Academia")
+    assert status.stop_requested("academia") is None
+    (tmp_path / "output").mkdir()
+    (tmp_path / "output" / "stop_academia").write_text("")
+    assert status.stop_requested("academia") == STOP_REASON
+    assert not (tmp_path / "output" / "stop_academia").exists()
+
+
+def test_http_endpoint_serves_status_and_stop(status):
+    port = free_port()
+    status.site_started("academia", "Academia")
+    status.start(port=port)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        with urllib.request.urlopen(base + "/status", timeout=5) as response:
+            assert json.load(response)["run_id"] == "r1"
+
+        request = urllib.request.Request(base + "/stop?site=academia", data=b"", method="POST")
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert json.load(response)["stop_requested"] is True
+        assert status.stop_requested("academia") == STOP_REASON
+
+        unknown = urllib.request.Request(base + "/stop?site=otro", data=b"", method="POST")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(unknown, timeout=5)
+        assert error.value.code == 404
+    finally:
+        status.close()
@@ -0,0 +1,132 @@
+"""
+Timeouts por sitio aprendidos de la latencia observada.
+Guarda en output/.site_timeouts.json una ventana de latencias por operación
+(goto / networkidle, catálogo / curso) y calcula el timeout como
+p95 × factor, acotado entre un piso y un techo. Los timeouts se registran
+como muestras (censuradas) para que un sitio lento suba su límite.
+"""
+import os
+import json
+import time
+import threading
+from utils.stats import percentile
+
+DEFAULT_HISTORY_FILE = "output/.site_timeouts.json"
+
+# Operaciones medidas: (default en frío, piso, techo) en milisegundos
+OPERATIONS = {
+    "catalog_goto": (90000, 15000, 180000),
+    "catalog_idle": (60000, 5000, 120000),
+    "course_goto": (60000, 10000, 120000),
+    "course_idle": (20000, 3000, 60000),
+}
+
+_file_lock = threading.Lock()
+
+
+def is_timeout_error(error):
+    """True para TimeoutError de Playwright (o del stdlib) sin importar playwright."""
+    return isinstance(error, TimeoutError) or type(error).__name__ == "TimeoutError"
+
+
+class AdaptiveTimeouts:
+    def __init__(self, site_key, history_file=DEFAULT_HISTORY_FILE, defaults=None, factor=3.0,
+                 window=200, min_samples=5):
+        """
+        `defaults`: {operación: ms} para arrancar en frío (sin historia suficiente).
+        `factor`: margen sobre el p95. `window`: muestras que se conservan por operación.
+        """
+        self.site_key = site_key
+        self.history_file = history_file
+        self.defaults = {op: spec[0] for op, spec in OPERATIONS.items()}
+        self.defaults.update(defaults or {})
+        self.factor = factor
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+        state = self._load_all().get(site_key, {})
+        self.samples = {op: list(state.get("samples", {}).get(op, [])) for op in OPERATIONS}
+        # Estadísticas de esta ejecución
+        self.waited = {op: 0.0 for op in OPERATIONS}     # Segundos esperando en total
+        self.timeouts = {op: 0 for op in OPERATIONS}     # Cantidad de timeouts
+        self.timeout_wait = 0.0                          # Segundos perdidos en timeouts
+        self.losses = 0                                  # Páginas perdidas por timeout
+
+    def _load_all(self):
+        if os.path.exists(self.history_file):
+            try:
+                with open(self.history_file, "r") as f:
+                    return json.load(f)
+            except Exception:
+                pass
+        return {}
+
+    def save(self):
+        with _file_lock:
+            all_sites = self._load_all()
+            all_sites[self.site_key] = {
+                "samples": self.samples,
+                "timeouts_ms": {op: self.timeout(op) for op in OPERATIONS},
+                "last_run": self.report(),
+                "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            directory = os.path.dirname(self.history_file)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.history_file, "w") as f:
+                json.dump(all_sites, f, indent=2)
+
+    # === Timeouts ===
+    def timeout(self, op):
+        """Timeout en ms para la operación: p95 × factor acotado, o el default en frío."""
+        default, floor, ceiling = OPERATIONS[op]
+        with self._lock:
+            samples = list(self.samples[op])
+        if len(samples) < self.min_samples:
+            return self.defaults.get(op, default)
+        p95_ms = percentile(samples, 0.95) * 1000
+        return int(min(max(p95_ms * self.factor, floor), ceiling))
+
+    def observe(self, op, seconds, timed_out=False):
+        with self._lock:
+            self.samples[op].append(round(seconds, 3))
+            del self.samples[op][:-self.window]
+            self.waited[op] += seconds
+            if timed_out:
+                self.timeouts[op] += 1
+                self.timeout_wait += seconds
+
+    def measure(self, op, func):
+        """Ejecuta `func(timeout_ms)` midiendo su latencia; re-lanza los errores."""
+        timeout_ms = self.timeout(op)
+        start = time.time()
+        try:
+            result = func(timeout_ms)
+        except Exception as e:
+            if is_timeout_error(e):
+                self.observe(op, timeout_ms / 1000, timed_out=True)
+            raise
+        self.observe(op, time.time() - start)
+        return result
+
+    def record_loss(self):
+        """Una página (curso o catálogo) que se perdió por un timeout."""
+        with self._lock:
+            self.losses += 1
+
+    # === Reporte ===
+    def report(self):
+        return {
+            "waited_seconds": {op: round(value, 1) for op, value in self.waited.items()},
+            "timeouts": dict(self.timeouts),
+            "timeout_wait_seconds": round(self.timeout_wait, 1),
+            "losses": self.losses,
+        }
+
+    def summary(self):
+        waited = sum(self.waited.values())
+        timeouts = sum(self.timeouts.values())
+        limits = " ".join(f"{op}={self.timeout(op) / 1000:.0f}s" for op in OPERATIONS)
+        return (f"⏱️  Espera total {waited:.0f}s | {timeouts} timeouts ({self.timeout_wait:.0f}s perdidos) | "
+                f"{self.losses} páginas perdidas por timeout\n   Próximos timeouts: {limits}")
@@ -0,0 +1,197 @@
+"""
+Descarga directa de brochures (sin formularios).
+Busca en el DOM enlaces .pdf, links de Google Drive y atributos data-*,
+y los descarga con un cliente HTTP con pool de conexiones, en paralelo y
+con reanudación (Range) de descargas parciales.
+"""
+import os
+import re
+import hashlib
+import unicodedata
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin
+from utils.politeness import get_scheduler
+
+# JS que recolecta candidatos a brochure directo en la página, con el texto que los describe
+FIND_BROCHURE_LINKS_JS = """() => {
+    const found = [];
+    const isBrochure = (v) => v && (/\\.pdf(\\?|#|$)/i.test(v) || v.includes('drive.google.com'));
+    const describe = (el) => [el.innerText, el.getAttribute('aria-label'), el.getAttribute('title'),
+                              el.getAttribute('download')].filter(Boolean).join(' ').slice(0, 200);
+
+    document.querySelectorAll('a[href]').forEach(a => {
+        const href = a.getAttribute('href');
+        if (isBrochure(href)) found.push({href: href, text: describe(a), footer: !!a.closest('footer')});
+    });
+
+    // data-href, data-url, data-file, data-pdf, data-brochure, data-download...
+    document.querySelectorAll('*').forEach(el => {
+        for (const attr of el.attributes) {
+            if (attr.name.startsWith('data-') && isBrochure(attr.value)) {
+                found.push({href: attr.value, text: attr.name + ' ' + describe(el), footer: !!el.closest('footer')});
+            }
+        }
+    });
+    return found;
+}"""
+
+# Palabras que suben un candidato (en la URL o en el texto / aria-label del enlace)
+BROCHURE_KEYWORDS = ["brochure", "temario", "plan de estudios", "plan-de-estudios", "plan_de_estudios",
+                     "malla", "syllabus", "silabo", "programa", "ficha", "descargar", "download"]
+# Enlaces legales o de pie de página que nunca son el brochure del curso
+# (frases completas: "legal" o "politica" solos descartarían brochures de Derecho o Ciencia Política)
+EXCLUDED_KEYWORDS = ["terminos", "condiciones", "privacidad", "privacy", "cookies", "reglamento",
+                     "reclamaciones", "aviso legal", "aviso-legal", "tyc", "terms"]
+
+DRIVE_FILE_RE = re.compile(r'drive\.google\.com/(?:file/d/|open\?id=|uc\?(?:export=download&)?id=)([a-zA-Z0-9_-]+)')
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+
+def _normalize(text):
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def rank_brochure_candidates(candidates, base_url):
+    """
+    Ordena los candidatos ({href, text, footer}) por palabras de brochure en la URL
+    o el texto; descarta los legales y los del footer. Devuelve URLs absolutas sin duplicados.
+    """
+    scored = []
+    for position, candidate in enumerate(candidates):
+        href = (candidate.get("href") or "").strip()
+        if not href or href.startswith("javascript:") or href.startswith("mailto:"):
+            continue
+        absolute = urljoin(base_url, href)
+        haystack = _normalize(f"{absolute} {candidate.get('text', '')}")
+        if candidate.get("footer") or any(word in haystack for word in EXCLUDED_KEYWORDS):
+            continue
+        score = sum(1 for word in BROCHURE_KEYWORDS if word in haystack)
+        scored.append((-score, position, absolute))
+
+    urls = []
+    for _, _, absolute in sorted(scored):
+        if absolute not in urls:
+            urls.append(absolute)
+    return urls
+
+
+def find_direct_brochure_urls(page):
+    """Devuelve las URLs absolutas de brochures directos en la página, las más probables primero."""
+    try:
+        candidates = page.evaluate(FIND_BROCHURE_LINKS_JS)
+    except Exception:
+        return []
+    return rank_brochure_candidates(candidates, page.url)
+
+
+def drive_download_url(url):
+    """Convierte un link de Google Drive a su URL de descarga directa."""
+    match = DRIVE_FILE_RE.search(url)
+    if match:
+        return f"https://drive.google.com/uc?export=download&id={match.group(1)}"
+    return url
+
+
+class BrochureFetcher:
+    def __init__(self, brochure_store, max_workers=4, timeout=30, scheduler=None):
+        self.brochure_store = brochure_store
+        self.timeout = timeout
+        self.scheduler = scheduler or get_scheduler()  # Límites por dominio
+        self.partial_dir = os.path.join(brochure_store.store_dir, "partial")
+        if not os.path.exists(self.partial_dir):
+            os.makedirs(self.partial_dir)
+
+        # Sesión compartida: reutiliza conexiones keep-alive por host
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_workers * 2, max_retries=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="brochure")
+
+    def submit(self, candidate_urls, course_url):
+        """Programa la descarga en segundo plano; devuelve un Future con la ruta (o None)."""
+        return self.executor.submit(self.fetch_first, candidate_urls, course_url)
+
+    def fetch_first(self, candidate_urls, course_url):
+        """Prueba los candidatos en orden y devuelve el primero que sea un PDF válido."""
+        for url in candidate_urls:
+            pdf_path = self.fetch(url, course_url)
+            if pdf_path:
+                return pdf_path
+        return None
+
+    def fetch(self, url, course_url):
+        """Descarga `url` al almacén de brochures, reanudando si hay un parcial."""
+        download_url = drive_download_url(url)
+        part_path = os.path.join(
+            self.partial_dir, hashlib.sha1(download_url.encode("utf-8")).hexdigest() + ".part"
+        )
+
+        try:
+            # El lugar en el dominio se conserva durante toda la descarga
+            with self.scheduler.slot(download_url):
+                response = self._open(download_url, part_path)
+                if response is None:
+                    return None
+
+                mode = "ab" if response.status_code == 206 else "wb"
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(65536):
+                        if chunk:
+                            f.write(chunk)
+                response.close()
+
+            with open(part_path, "rb") as f:
+                if f.read(5) != b"%PDF-":
+                    # HTML de login/aviso, no un PDF
+                    os.remove(part_path)
+                    return None
+
+            return self.brochure_store.add_file(part_path, course_url, source_url=url)
+
+        except Exception as e:
+            print(f"    ⚠️  Descarga directa falló ({url[:60]}): {e}")
+            return None
+
+    def _open(self, download_url, part_path):
+        headers = {}
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        response = self.session.get(download_url, headers=headers, stream=True, timeout=self.timeout)
+
+        # Google Drive pide confirmación para archivos grandes
+        for key, value in response.cookies.items():
+            if key.startswith("download_warning"):
+                response.close()
+                response = self.session.get(
+                    download_url, params={"confirm": value}, headers=headers,
+                    stream=True, timeout=self.timeout
+                )
+                break
+
+        if response.status_code == 416:
+            # El parcial ya estaba completo
+            response.close()
+            response = self.session.get(download_url, stream=True, timeout=self.timeout)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+        if response.status_code not in (200, 206):
+            response.close()
+            return None
+        return response
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
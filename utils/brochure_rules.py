@@ -0,0 +1,140 @@
+"""
+Extractor basado en reglas para brochures de cursos en español.
+Llena duración, fecha de inicio, certificación y resúmenes por sección
+a partir del texto del PDF, antes de recurrir al LLM.
+"""
+import re
+
+# Campos que LLMHelper.extract_from_pdf devuelve
+PDF_FIELDS = ["duration", "start_date", "certification", "methodology", "instructor", "content"]
+
+MESES = (
+    "enero|febrero|marzo|abril|mayo|junio|julio|agosto|"
+    "septiembre|setiembre|octubre|noviembre|diciembre"
+)
+
+# "120 horas académicas", "120 HRS ACADÉMICAS", "48 horas cronológicas", "96 h"
+DURATION_HOURS_RE = re.compile(
+    r'(\d{1,4})\s*(?:horas|hrs\b\.?|h\b\.?)\s*(acad[ée]micas|cronol[óo]gicas|lectivas|pedag[óo]gicas)?',
+    re.IGNORECASE
+)
+# "8 semanas", "6 meses", "3 módulos" (solo semanas/meses cuentan como duración)
+DURATION_SPAN_RE = re.compile(r'(\d{1,3})\s*(semanas|meses)\b', re.IGNORECASE)
+
+# "Inicio: 21 de enero", "Fecha de inicio 5 de marzo de 2026", "Inicio: 21/01/2026"
+START_DATE_RE = re.compile(
+    r'(?:fecha\s+de\s+)?inicio\s*(?:de\s+clases)?\s*[:\-]?\s*'
+    r'((?:lunes|martes|mi[ée]rcoles|jueves|viernes|s[áa]bado|domingo)?\s*,?\s*'
+    r'\d{1,2}\s*(?:de\s+)?(?:' + MESES + r')(?:\s*(?:de(?:l)?\s*)?\d{4})?'
+    r'|\d{1,2}/\d{1,2}/\d{2,4})',
+    re.IGNORECASE
+)
+
+# "2 certificados", "Certificado digital", "doble certificación"
+CERT_COUNT_RE = re.compile(
+    r'(\d+|un|una|dos|tres|doble|triple)\s+(certificad[oa]s?|certificaciones?|constancias?|diplomas?)'
+    r'([^\n.]{0,80})',
+    re.IGNORECASE
+)
+CERT_LINE_RE = re.compile(
+    r'((?:certificado|certificaci[óo]n|diploma|constancia)\s+(?:digital|de\s+[a-záéíóúñ]+|a\s+nombre)[^\n.]{0,80})',
+    re.IGNORECASE
+)
+
+# Encabezados de sección típicos de los brochures
+SECTION_HEADINGS = {
+    "methodology": ["metodología", "metodologia", "¿cómo aprenderás?", "modalidad de estudio"],
+    "instructor": ["docentes", "docente", "instructores", "instructor", "plana docente", "expositores"],
+    "content": ["temario", "plan de estudios", "malla curricular", "contenido", "módulos", "modulos"],
+}
+
+# Cualquier encabezado conocido corta la sección anterior
+_ALL_HEADINGS = [h for headings in SECTION_HEADINGS.values() for h in headings] + [
+    "inversión", "inversion", "certificación", "certificacion", "requisitos",
+    "dirigido a", "objetivos", "beneficios", "horarios", "inicio"
+]
+
+MAX_SECTION_CHARS = 400
+
+
+def find_duration(text):
+    """Devuelve la duración tal como aparece en el texto, o None."""
+    match = DURATION_HOURS_RE.search(text)
+    if match:
+        return match.group(0).strip()
+    match = DURATION_SPAN_RE.search(text)
+    if match:
+        return match.group(0).strip()
+    return None
+
+
+def find_start_date(text):
+    """Devuelve la fecha de inicio ("21 de enero"), o None."""
+    match = START_DATE_RE.search(text)
+    if match:
+        return re.sub(r'\s+', ' ', match.group(1)).strip(" ,")
+    return None
+
+
+def find_certification(text):
+    """Devuelve la descripción de certificados ("2 certificados digitales"), o None."""
+    match = CERT_COUNT_RE.search(text)
+    if match:
+        return re.sub(r'\s+', ' ', match.group(0)).strip(" ,:")
+    match = CERT_LINE_RE.search(text)
+    if match:
+        return re.sub(r'\s+', ' ', match.group(1)).strip(" ,:")
+    return None
+
+
+def find_section(text, field):
+    """
+    Devuelve el texto bajo el primer encabezado de la sección `field`
+    (methodology, instructor, content), recortado a MAX_SECTION_CHARS.
+    """
+    lines = [line.strip() for line in text.splitlines()]
+    headings = SECTION_HEADINGS.get(field, [])
+
+    for i, line in enumerate(lines):
+        if line.lower().rstrip(":") not in headings:
+            continue
+
+        body = []
+        for next_line in lines[i + 1:]:
+            if next_line.lower().rstrip(":") in _ALL_HEADINGS:
+                break
+            if next_line:
+                body.append(next_line)
+            if sum(len(b) for b in body) >= MAX_SECTION_CHARS:
+                break
+
+        summary = " ".join(body).strip()
+        # Un par de palabras sueltas no es un resumen útil
+        if len(summary) >= 40:
+            return summary[:MAX_SECTION_CHARS]
+    return None
+
+
+def extract_brochure_fields(text):
+    """
+    Aplica todas las reglas al texto del brochure.
+    Devuelve solo los campos encontrados (los faltantes no aparecen en el dict).
+    """
+    if not text:
+        return {}
+
+    finders = {
+        "duration": find_duration,
+        "start_date": find_start_date,
+        "certification": find_certification,
+        "methodology": lambda t: find_section(t, "methodology"),
+        "instructor": lambda t: find_section(t, "instructor"),
+        "content": lambda t: find_section(t, "content"),
+    }
+
+    found = {}
+    for field, finder in finders.items():
+        value = finder(text)
+        if value:
+            found[field] = value
+    return found
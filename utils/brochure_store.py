@@ -0,0 +1,192 @@
+"""
+Almacén de brochures direccionado por contenido.
+Cada PDF se guarda una sola vez como <sha256>.pdf; un índice JSON relaciona
+la URL del curso con el hash, lleva la cuenta de tamaños y memoiza la
+extracción (reglas + LLM) por hash.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+
+DEFAULT_STORE_DIR = "scrapers/downloads/_store"
+
+
+def useful_extraction(data):
+    """True si la extracción trae al menos un campo distinto de "N/A"."""
+    return bool(data) and any(value not in ("N/A", "", None) for value in data.values())
+
+
+def file_sha256(path):
+    """Hash SHA-256 de un archivo, leído por bloques."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BrochureStore:
+    def __init__(self, store_dir=DEFAULT_STORE_DIR, max_bytes=None):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes  # None = sin desalojo
+        self.index_file = os.path.join(store_dir, "index.json")
+        self._lock = threading.RLock()
+        self._inflight = {}  # digest → Lock: una sola extracción en curso por brochure
+
+        if not os.path.exists(self.store_dir):
+            os.makedirs(self.store_dir)
+
+        self.index = {"urls": {}, "sources": {}, "blobs": {}, "extractions": {}}
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, "r") as f:
+                    self.index.update(json.load(f))
+            except Exception as e:
+                print(f"⚠️  Índice de brochures ilegible, se reconstruye: {e}")
+
+    # === Índice ===
+    def _save_index(self):
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    def blob_path(self, digest):
+        return os.path.join(self.store_dir, f"{digest}.pdf")
+
+    def hash_for_url(self, course_url):
+        return self.index["urls"].get(course_url)
+
+    def source_for_url(self, course_url):
+        """De dónde salió el brochure del curso (URL directa o "Downloaded via Form")."""
+        return self.index["sources"].get(course_url, "Downloaded via Form")
+
+    def path_for_url(self, course_url):
+        """Ruta del brochure ya almacenado para ese curso, o None."""
+        with self._lock:
+            digest = self.hash_for_url(course_url)
+            if digest and os.path.exists(self.blob_path(digest)):
+                self.index["blobs"][digest]["last_access"] = time.time()
+                return self.blob_path(digest)
+            return None
+
+    # === Alta de archivos ===
+    def add_file(self, src_path, course_url, source_url=None):
+        """
+        Mueve `src_path` al almacén (si el contenido ya existe, lo descarta)
+        y asocia la URL del curso al hash. Devuelve la ruta almacenada.
+        """
+        digest = file_sha256(src_path)
+        dest_path = self.blob_path(digest)
+
+        with self._lock:
+            if os.path.exists(dest_path):
+                os.remove(src_path)
+                print(f"    ♻️  Brochure duplicado ({digest[:10]}), reutilizado")
+            else:
+                shutil.move(src_path, dest_path)
+
+            blob = self.index["blobs"].setdefault(digest, {
+                "size": os.path.getsize(dest_path),
+                "added": time.time(),
+                "urls": []
+            })
+            blob["last_access"] = time.time()
+            if course_url not in blob["urls"]:
+                blob["urls"].append(course_url)
+            self.index["urls"][course_url] = digest
+            if source_url:
+                self.index["sources"][course_url] = source_url
+            else:
+                self.index["sources"].pop(course_url, None)
+
+            if self.max_bytes:
+                self.evict(self.max_bytes, keep=digest)
+            self._save_index()
+
+        return dest_path
+
+    def add_bytes(self, data, course_url):
+        fd, tmp_path = tempfile.mkstemp(suffix=".pdf", dir=self.store_dir)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return self.add_file(tmp_path, course_url)
+
+    def save_download(self, download, course_url):
+        """Guarda un `Download` de Playwright directamente en el almacén."""
+        fd, tmp_path = tempfile.mkstemp(suffix=".pdf", dir=self.store_dir)
+        os.close(fd)
+        download.save_as(tmp_path)
+        return self.add_file(tmp_path, course_url)
+
+    # === Memo de extracción ===
+    def extract_cached(self, pdf_path, extractor, on_hit=None):
+        """
+        Devuelve la extracción memoizada para el contenido de `pdf_path`;
+        si no existe, llama a `extractor(pdf_path)` y la guarda.
+        `on_hit()` se llama cuando se sirve desde la memo (contabilidad LLM).
+        """
+        if os.path.dirname(os.path.abspath(pdf_path)) == os.path.abspath(self.store_dir):
+            digest = os.path.splitext(os.path.basename(pdf_path))[0]
+        else:
+            digest = file_sha256(pdf_path)
+
+        with self._lock:
+            inflight = self._inflight.setdefault(digest, threading.Lock())
+
+        # Con varios workers, el segundo que pide el mismo brochure espera al primero y usa su memo
+        with inflight:
+            with self._lock:
+                cached = self.index["extractions"].get(digest)
+            if useful_extraction(cached):
+                print(f"    ♻️  Extracción de brochure en caché ({digest[:10]})")
+                if on_hit:
+                    on_hit()
+                return dict(cached)
+
+            data = extractor(pdf_path)
+            # No memoizar fallos: extract_from_pdf devuelve {} o todo "N/A" ante errores
+            # de lectura o del LLM, y pueden ser transitorios
+            if useful_extraction(data):
+                with self._lock:
+                    self.index["extractions"][digest] = data
+                    self._save_index()
+            return data
+
+    # === Tamaño y desalojo ===
+    def total_size(self):
+        return sum(blob.get("size", 0) for blob in self.index["blobs"].values())
+
+    def evict(self, max_bytes, keep=None):
+        """Elimina los brochures menos usados hasta quedar bajo `max_bytes`."""
+        with self._lock:
+            evicted = 0
+            by_age = sorted(self.index["blobs"].items(), key=lambda kv: kv[1].get("last_access", 0))
+            for digest, blob in by_age:
+                if self.total_size() <= max_bytes:
+                    break
+                if digest == keep:
+                    continue
+                path = self.blob_path(digest)
+                if os.path.exists(path):
+                    os.remove(path)
+                for url in blob.get("urls", []):
+                    if self.index["urls"].get(url) == digest:
+                        del self.index["urls"][url]
+                del self.index["blobs"][digest]
+                evicted += 1
+            if evicted:
+                self._save_index()
+            return evicted
+
+    def stats(self):
+        return {
+            "brochures": len(self.index["blobs"]),
+            "courses": len(self.index["urls"]),
+            "bytes": self.total_size(),
+            "extractions": len(self.index["extractions"])
+        }
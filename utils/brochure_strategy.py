@@ -0,0 +1,143 @@
+"""
+Memoria por sitio de la estrategia de brochure que funcionó.
+Guarda en output/.brochure_strategies.json el keyword del botón, el mapeo de
+campos del formulario o "no hay brochures aquí", para repetirlo en los
+siguientes cursos sin volver a pagar el timeout completo.
+"""
+import os
+import json
+import time
+import threading
+
+DEFAULT_MEMO_FILE = "output/.brochure_strategies.json"
+
+# Estrategias posibles
+STRATEGY_DIRECT = "direct"  # Link directo en el DOM
+STRATEGY_FORM = "form"      # Botón + formulario
+STRATEGY_NONE = "none"      # El sitio no entrega brochures
+
+_file_lock = threading.Lock()
+
+
+def _empty_stats():
+    return {"successes": 0, "failures": 0, "consecutive_failures": 0}
+
+
+class BrochureStrategyMemo:
+    def __init__(self, site_key, memo_file=DEFAULT_MEMO_FILE, give_up_after=3, reprobe_every=25,
+                 fast_timeout=4000, save_every=20):
+        self.site_key = site_key
+        self.memo_file = memo_file
+        self.give_up_after = give_up_after  # Fallos seguidos sin ningún éxito -> "none"
+        self.reprobe_every = reprobe_every  # Cada cuántos cursos se re-prueba un sitio "none"
+        self.fast_timeout = fast_timeout    # Timeout de descarga para sitios sin éxitos
+        self.save_every = save_every        # Registros entre escrituras del archivo (y flush al final)
+        self.skipped = 0
+        self._pending = 0
+        self._lock = threading.Lock()  # Los éxitos directos llegan desde la etapa extract
+
+        self.state = {
+            "strategy": None, "keyword": None, "fields": None,
+            "stats": {STRATEGY_DIRECT: _empty_stats(), STRATEGY_FORM: _empty_stats()}, "updated": None
+        }
+        saved = self._load_all().get(site_key, {})
+        if "stats" not in saved and "successes" in saved:
+            # Formato anterior: contadores mezclados; se conservan como los del formulario
+            saved["stats"] = {STRATEGY_FORM: {key: saved.pop(key) for key in _empty_stats()}}
+        for strategy, stats in saved.pop("stats", {}).items():
+            self.state["stats"].setdefault(strategy, _empty_stats()).update(stats)
+        self.state.update(saved)
+
+    def _load_all(self):
+        if os.path.exists(self.memo_file):
+            try:
+                with open(self.memo_file, "r") as f:
+                    return json.load(f)
+            except Exception:
+                pass
+        return {}
+
+    def _save(self):
+        self.state["updated"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        with _file_lock:
+            all_memos = self._load_all()
+            all_memos[self.site_key] = self.state
+            directory = os.path.dirname(self.memo_file)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.memo_file, "w") as f:
+                json.dump(all_memos, f, indent=2, ensure_ascii=False)
+
+    def _changed(self):
+        """Escribe el archivo cada `save_every` registros (el resto lo guarda flush)."""
+        self._pending += 1
+        if self._pending >= self.save_every:
+            self._save()
+            self._pending = 0
+
+    def flush(self):
+        """Guarda lo pendiente (al terminar el sitio)."""
+        with self._lock:
+            if self._pending:
+                self._save()
+                self._pending = 0
+
+    def stats(self, strategy):
+        return self.state["stats"].setdefault(strategy, _empty_stats())
+
+    # === Consultas ===
+    def should_try_form(self):
+        """False si el sitio está marcado "none" (salvo re-prueba periódica)."""
+        if self.state["strategy"] != STRATEGY_NONE:
+            return True
+        self.skipped += 1
+        # El primer curso de cada ejecución y luego cada N cursos se vuelve a probar
+        return self.skipped % self.reprobe_every == 1
+
+    def preferred_keywords(self, keywords):
+        """Lista de keywords con el que funcionó antes al principio."""
+        keyword = self.state.get("keyword")
+        if keyword:
+            return [keyword] + [k for k in keywords if k != keyword]
+        return keywords
+
+    def form_mapping(self):
+        """Selectores del formulario que ya funcionó (o None)."""
+        return self.state.get("fields")
+
+    def download_timeout(self, default_timeout):
+        """Timeout completo solo si el sitio alguna vez entregó un brochure por formulario."""
+        form = self.stats(STRATEGY_FORM)
+        never_worked = form["successes"] == 0 and form["failures"] > 0
+        if never_worked or form["consecutive_failures"] >= self.give_up_after:
+            return min(default_timeout, self.fast_timeout)
+        return default_timeout
+
+    # === Registro ===
+    def record_success(self, strategy, keyword=None, fields=None):
+        with self._lock:
+            # Un link directo no dice nada del formulario: no revierte un "none" del formulario
+            if strategy == STRATEGY_FORM or self.state["strategy"] is None:
+                self.state["strategy"] = strategy
+            if keyword:
+                self.state["keyword"] = keyword
+            if fields:
+                self.state["fields"] = fields
+            stats = self.stats(strategy)
+            stats["successes"] += 1
+            stats["consecutive_failures"] = 0
+            self._changed()
+
+    def record_failure(self, strategy=STRATEGY_FORM):
+        with self._lock:
+            stats = self.stats(strategy)
+            stats["failures"] += 1
+            stats["consecutive_failures"] += 1
+            streak = stats["consecutive_failures"]
+            # Un sitio que antes funcionaba necesita una racha más larga para darse por perdido
+            limit = self.give_up_after if stats["successes"] == 0 else self.give_up_after * 5
+            if strategy == STRATEGY_FORM and streak >= limit:
+                if self.state["strategy"] != STRATEGY_NONE:
+                    print(f"    🚫 Sin brochures en {self.site_key}: se omite el formulario en los siguientes cursos")
+                self.state["strategy"] = STRATEGY_NONE
+            self._changed()
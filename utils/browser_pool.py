@@ -0,0 +1,365 @@
+"""
+Pool de navegador compartido.
+Chromium se lanza una sola vez y cada scraper/worker recibe un contexto
+aislado (cookies, caché y storage propios) que se cierra al terminar.
+Si los workers son procesos separados, uno levanta el navegador con
+`python -m utils.browser_pool --serve` y el resto se conecta por CDP
+(variable BROWSER_POOL_ENDPOINT o parámetro `endpoint`).
+"""
+import os
+import sys
+import time
+import uuid
+import atexit
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from playwright.sync_api import sync_playwright
+from utils.memory_watch import MemoryWatchdog
+from utils.singleton import ProcessSingleton
+
+DEFAULT_MAX_CONTEXTS = 4
+DEFAULT_CDP_PORT = 9222
+ENDPOINT_ENV = "BROWSER_POOL_ENDPOINT"
+DEFAULT_LEASES_DB = "output/browser_leases.db"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ContextLeases:
+    """
+    Tope de contextos compartido entre procesos conectados al mismo navegador por CDP.
+    `browser.contexts` de una conexión CDP solo ve los contextos que abrió ella misma,
+    así que cada proceso registra sus contextos en SQLite; los de procesos muertos se liberan.
+    """
+
+    def __init__(self, endpoint, db_file=DEFAULT_LEASES_DB, poll_seconds=0.5):
+        self.endpoint = endpoint
+        self.db_file = db_file
+        self.poll_seconds = poll_seconds
+        self._local = threading.local()
+        directory = os.path.dirname(db_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn().execute("""
+            CREATE TABLE IF NOT EXISTS context_leases (
+                lease TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                acquired_at REAL NOT NULL
+            )
+        """)
+
+    def _conn(self):
+        """Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, max_contexts, timeout):
+        """Bloquea hasta que haya menos de `max_contexts` contextos en el endpoint; devuelve el lease."""
+        conn = self._conn()
+        lease = uuid.uuid4().hex
+        deadline = time.time() + timeout
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute("SELECT lease, pid FROM context_leases WHERE endpoint = ?",
+                                    (self.endpoint,)).fetchall()
+                dead = [(row[0],) for row in rows if not _pid_alive(row[1])]
+                conn.executemany("DELETE FROM context_leases WHERE lease = ?", dead)
+                acquired = len(rows) - len(dead) < max_contexts
+                if acquired:
+                    conn.execute("INSERT INTO context_leases (lease, endpoint, pid, acquired_at) VALUES (?, ?, ?, ?)",
+                                 (lease, self.endpoint, os.getpid(), time.time()))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            if acquired:
+                return lease
+            if time.time() > deadline:
+                raise TimeoutError(f"Sin contextos libres en {self.endpoint} (máx {max_contexts} entre todos los procesos)")
+            time.sleep(self.poll_seconds)
+
+    def release(self, lease):
+        self._conn().execute("DELETE FROM context_leases WHERE lease = ?", (lease,))
+
+
+class BrowserPool:
+    def __init__(self, max_contexts=DEFAULT_MAX_CONTEXTS, headless=True, endpoint=None,
+                 health_interval=60, acquire_timeout=300, launch_args=None):
+        """
+        `max_contexts`: contextos abiertos a la vez (en modo CDP cuenta también
+        los de otros procesos conectados al mismo navegador).
+        `endpoint`: URL CDP (ej. http://localhost:9222); None = lanzar localmente.
+        `launch_args`: flags extra de Chromium (ej. --host-resolver-rules en el benchmark).
+        """
+        self.max_contexts = max_contexts
+        self.headless = headless
+        self.launch_args = launch_args or []
+        self.endpoint = endpoint or os.environ.get(ENDPOINT_ENV)
+        self.health_interval = health_interval  # Segundos entre chequeos de salud
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(max_contexts)
+        # En modo CDP el tope es global: los contextos de todos los procesos se registran en SQLite
+        self.leases = ContextLeases(self.endpoint) if self.endpoint else None
+        self._lock = threading.Lock()
+        self._playwright = None
+        self.browser = None
+        self._last_check = 0
+        self.launches = 0
+        self.contexts_opened = 0
+        self.open_contexts = 0
+
+    # === Ciclo de vida ===
+    def start(self):
+        """Lanza (o conecta) el navegador si todavía no está disponible."""
+        with self._lock:
+            if self.browser is not None and self.browser.is_connected():
+                return self.browser
+            if self._playwright is None:
+                self._playwright = sync_playwright().start()
+            if self.endpoint:
+                self.browser = self._playwright.chromium.connect_over_cdp(self.endpoint)
+                print(f"🔌 Conectado al navegador compartido en {self.endpoint}")
+            else:
+                self.browser = self._playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+            self.launches += 1
+            self._last_check = time.time()
+            return self.browser
+
+    def close(self):
+        with self._lock:
+            if self.browser is not None and not self.endpoint:
+                # En modo CDP el navegador es de otro proceso: solo nos desconectamos
+                try:
+                    self.browser.close()
+                except Exception:
+                    pass
+            self.browser = None
+            if self._playwright is not None:
+                self._playwright.stop()
+                self._playwright = None
+
+    def restart(self):
+        """
+        Relanza el navegador local (libera la memoria acumulada por Chromium).
+        En modo CDP o con otros contextos abiertos no se puede: devuelve False.
+        """
+        with self._lock:
+            if self.endpoint or self.open_contexts > 0:
+                return False
+            if self.browser is not None:
+                try:
+                    self.browser.close()
+                except Exception:
+                    pass
+                self.browser = None
+        self.start()
+        return True
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # === Salud ===
+    def healthy(self):
+        """Abre y cierra un contexto de prueba; False si el navegador no responde."""
+        if self.browser is None or not self.browser.is_connected():
+            return False
+        try:
+            context = self.browser.new_context()
+            context.close()
+            return True
+        except Exception:
+            return False
+
+    def ensure_healthy(self):
+        """Relanza (o reconecta) el navegador si se cayó."""
+        if self.browser is not None and time.time() - self._last_check < self.health_interval \
+                and self.browser.is_connected():
+            return
+        if self.browser is not None and not self.healthy():
+            print("⚠️  Navegador sin respuesta, relanzando...")
+            with self._lock:
+                self.browser = None
+        self.start()  # Primer uso o navegador caído: lo lanza; sano: no hace nada
+        self._last_check = time.time()
+
+    # === Contextos ===
+    @contextmanager
+    def context(self, **options):
+        """Contexto aislado del navegador compartido; se cierra al salir."""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"Sin contextos libres (máx {self.max_contexts})")
+        context = None
+        lease = None
+        try:
+            self.ensure_healthy()
+            if self.leases:
+                lease = self.leases.acquire(self.max_contexts, self.acquire_timeout)
+            context = self.browser.new_context(**options)
+            self.contexts_opened += 1
+            self.open_contexts += 1
+            yield context
+        finally:
+            if context is not None:
+                self.open_contexts -= 1
+                try:
+                    context.close()
+                except Exception:
+                    pass
+            if lease:
+                self.leases.release(lease)
+            self._slots.release()
+
+    @contextmanager
+    def page(self, **options):
+        """Atajo: una página dentro de un contexto nuevo."""
+        with self.context(**options) as context:
+            yield context.new_page()
+
+    @contextmanager
+    def session(self, watchdog=None, on_page=None, **options):
+        """Página renovable (ver PageSession); se cierra al salir."""
+        session = PageSession(self, watchdog, on_page, **options)
+        try:
+            session.open()
+            yield session
+        finally:
+            session.close()
+
+    def stats(self):
+        return {"launches": self.launches, "contexts_opened": self.contexts_opened,
+                "max_contexts": self.max_contexts, "endpoint": self.endpoint}
+
+
+class PageSession:
+    """
+    Página de larga duración para crawls de cientos de cursos. Cuenta páginas
+    y mide memoria (MemoryWatchdog); al superar el límite cierra el contexto
+    y abre otro, o relanza el navegador si el problema es la memoria. También
+    se recupera si el renderer se cae. El llamador siempre usa `session.page`.
+    """
+
+    def __init__(self, pool, watchdog=None, on_page=None, **options):
+        self.pool = pool
+        self.watchdog = watchdog or MemoryWatchdog()
+        self.on_page = on_page  # Se llama con cada página nueva (listeners, etc.)
+        self.options = options
+        self.page = None
+        self.crashed = False
+        self._context_cm = None
+
+    def open(self):
+        self._context_cm = self.pool.context(**self.options)
+        context = self._context_cm.__enter__()
+        self.page = context.new_page()
+        self.crashed = False
+        self.page.on("crash", self._on_crash)
+        if self.on_page:
+            self.on_page(self.page)
+        self._sample()
+
+    def _sample(self):
+        """Mide la memoria al abrir y cerrar la sesión, además de cada `check_every` páginas."""
+        if self.page is not None and not self.crashed:
+            try:
+                self.watchdog.sample(self.page, remote=bool(self.pool.endpoint))
+            except Exception:
+                pass
+
+    def close(self):
+        self._sample()
+        if self._context_cm is not None:
+            self._context_cm.__exit__(None, None, None)
+            self._context_cm = None
+            self.page = None
+
+    def _on_crash(self, page):
+        self.crashed = True
+
+    def broken(self):
+        """True si el renderer se cayó, la página se cerró o se perdió el navegador."""
+        browser = self.pool.browser
+        return self.crashed or self.page is None or self.page.is_closed() \
+            or browser is None or not browser.is_connected()
+
+    def recycle(self, reason):
+        """Cierra el contexto actual y abre uno nuevo (con "memory", relanza Chromium)."""
+        self.close()
+        restarted = reason == "memory" and self.pool.restart()
+        self.watchdog.recycled(reason)
+        print(f"    ♻️  Navegador reciclado ({reason}, "
+              f"{'navegador relanzado' if restarted else 'contexto nuevo'}, "
+              f"{self.watchdog.last_bytes / 1024 / 1024:.0f} MB)")
+        self.open()
+
+    def page_done(self):
+        """Llamar tras cada página; recicla si hace falta. Devuelve el motivo o None."""
+        if self.broken():
+            reason = "crash"
+        else:
+            reason = self.watchdog.page_done(self.page, remote=bool(self.pool.endpoint))
+        if reason:
+            self.recycle(reason)
+        return reason
+
+
+_shared = ProcessSingleton(BrowserPool, on_create=lambda pool: atexit.register(pool.close))
+
+
+def get_browser_pool(max_contexts=DEFAULT_MAX_CONTEXTS, headless=True):
+    """Pool único del proceso; se lanza al primer uso y se cierra al salir."""
+    return _shared.get(max_contexts=max_contexts, headless=headless)
+
+
+def serve(port=DEFAULT_CDP_PORT, headless=True, health_interval=30):
+    """
+    Mantiene un Chromium con CDP expuesto para que otros procesos se conecten
+    (BROWSER_POOL_ENDPOINT=http://localhost:<port>). Lo relanza si se cae.
+    """
+    with sync_playwright() as p:
+        browser = None
+        try:
+            while True:
+                if browser is None or not browser.is_connected():
+                    browser = p.chromium.launch(
+                        headless=headless, args=[f"--remote-debugging-port={port}"]
+                    )
+                    print(f"🌐 Navegador compartido en http://localhost:{port} "
+                          f"(export {ENDPOINT_ENV}=http://localhost:{port})")
+                time.sleep(health_interval)
+        except KeyboardInterrupt:
+            print("\n🛑 Navegador compartido detenido")
+        finally:
+            if browser is not None and browser.is_connected():
+                browser.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Navegador compartido para los workers de scraping')
+    parser.add_argument('--serve', action='store_true', help='Lanzar Chromium y exponerlo por CDP')
+    parser.add_argument('--port', type=int, default=DEFAULT_CDP_PORT, help='Puerto CDP (default 9222)')
+    parser.add_argument('--headed', action='store_true', help='Mostrar la ventana del navegador')
+    args = parser.parse_args()
+    if not args.serve:
+        parser.print_help()
+        sys.exit(1)
+    serve(args.port, headless=not args.headed)
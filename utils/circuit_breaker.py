@@ -0,0 +1,128 @@
+"""
+Circuit breaker y presupuesto por sitio.
+Cuando un sitio nos bloquea o cambia su layout, cada curso falla pagando los
+timeouts completos. El breaker se abre tras K fallos seguidos o una tasa de
+error alta; mientras está abierto los cursos se saltan (se conserva su
+última fila) y cada cierto número de cursos deja pasar uno de prueba
+(half-open). El presupuesto corta el sitio por tiempo o por gasto en LLM.
+"""
+import time
+import threading
+from collections import deque
+
+# Estados
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name, max_consecutive=5, max_error_rate=0.6, window=20, min_calls=10,
+                 probe_after=10, max_probe_after=80):
+        """
+        `max_consecutive`: fallos seguidos que abren el circuito.
+        `max_error_rate`: tasa de error en las últimas `window` llamadas (con al menos `min_calls`).
+        `probe_after`: llamadas rechazadas antes de la prueba half-open; se duplica
+        (hasta `max_probe_after`) cada vez que la prueba falla.
+        """
+        self.name = name
+        self.max_consecutive = max_consecutive
+        self.max_error_rate = max_error_rate
+        self.min_calls = min_calls
+        self.base_probe_after = probe_after
+        self.max_probe_after = max_probe_after
+        self.probe_after = probe_after
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.recent = deque(maxlen=window)  # True = éxito
+        self.rejected = 0                   # Llamadas rechazadas desde que se abrió
+        self.trips = 0
+        self.skipped = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True si se puede intentar la llamada (cerrado, o la prueba half-open)."""
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_HALF_OPEN:
+                # Ya hay una prueba en curso
+                self.skipped += 1
+                return False
+            self.rejected += 1
+            if self.rejected >= self.probe_after:
+                self.state = STATE_HALF_OPEN
+                print(f"   🔌 Circuito {self.name}: half-open, probando un curso...")
+                return True
+            self.skipped += 1
+            return False
+
+    @property
+    def probing(self):
+        """True mientras la llamada de prueba half-open está en curso."""
+        return self.state == STATE_HALF_OPEN
+
+    def record_success(self):
+        with self._lock:
+            self.recent.append(True)
+            self.consecutive_failures = 0
+            if self.state != STATE_CLOSED:
+                print(f"   ✅ Circuito {self.name}: cerrado (el sitio responde de nuevo)")
+                self.state = STATE_CLOSED
+                self.probe_after = self.base_probe_after
+                self.recent.clear()
+
+    def record_failure(self):
+        with self._lock:
+            self.recent.append(False)
+            self.consecutive_failures += 1
+            if self.state == STATE_HALF_OPEN:
+                self.probe_after = min(self.probe_after * 2, self.max_probe_after)
+                self._open("falló la prueba")
+            elif self.state == STATE_CLOSED:
+                if self.consecutive_failures >= self.max_consecutive:
+                    self._open(f"{self.consecutive_failures} fallos seguidos")
+                elif len(self.recent) >= self.min_calls and self.error_rate() >= self.max_error_rate:
+                    self._open(f"tasa de error {self.error_rate() * 100:.0f}%")
+
+    def error_rate(self):
+        if not self.recent:
+            return 0.0
+        return sum(1 for ok in self.recent if not ok) / len(self.recent)
+
+    def _open(self, reason):
+        self.state = STATE_OPEN
+        self.rejected = 0
+        self.trips += 1
+        self.opened_at = time.time()
+        print(f"   ⛔ Circuito {self.name}: abierto ({reason}); próxima prueba en {self.probe_after} cursos")
+
+    def summary(self):
+        return f"🔌 Circuito: {self.state} | aperturas: {self.trips} | cursos saltados: {self.skipped}"
+
+
+class SiteBudget:
+    def __init__(self, max_minutes=None, max_llm_usd=None, cost_fn=None):
+        """
+        `max_minutes`: tiempo de reloj máximo para el sitio.
+        `max_llm_usd`: gasto LLM máximo; `cost_fn()` devuelve el gasto acumulado.
+        """
+        self.max_seconds = max_minutes * 60 if max_minutes else None
+        self.max_llm_usd = max_llm_usd
+        self.cost_fn = cost_fn
+        self.started_at = time.time()
+        self.exhausted = None  # Motivo, si se agotó
+
+    def elapsed(self):
+        return time.time() - self.started_at
+
+    def check(self):
+        """Devuelve el motivo si el presupuesto se agotó, o None."""
+        if self.exhausted:
+            return self.exhausted
+        if self.max_seconds and self.elapsed() >= self.max_seconds:
+            self.exhausted = f"tiempo agotado ({self.elapsed() / 60:.0f} min)"
+        elif self.max_llm_usd and self.cost_fn and self.cost_fn() >= self.max_llm_usd:
+            self.exhausted = f"presupuesto LLM agotado (${self.cost_fn():.2f})"
+        return self.exhausted
@@ -0,0 +1,266 @@
+"""
+Almacén maestro de cursos (SQLite).
+Una fila por (sitio, URL canónica) con las columnas homologadas, que los
+scrapers actualizan (upsert) a medida que producen cada curso. Al terminar una
+corrida completa de un sitio, sus filas no vistas se retiran (`retired_at`):
+el curso desapareció del catálogo. El CSV/Parquet maestro es una exportación
+de la vista `master_courses` (solo filas vigentes), sin reconstruir nada:
+    python -m utils.course_store --url https://platzi.com/cursos/python/   # Estado actual de un curso
+    python -m utils.course_store --site platzi --currency USD               # Consultas por índice
+    python -m utils.course_store --export output/MASTER_courses_database.csv
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from utils.frontier import canonicalize_url
+from utils.singleton import ProcessSingleton
+
+DEFAULT_DB_FILE = "output/courses.db"
+
+# Columnas homologadas del CSV maestro (en este orden)
+STANDARD_COLUMNS = [
+    'source_site', 'course_name', 'course_type', 'price_raw',
+    'price_currency', 'price_original', 'duration', 'start_date',
+    'instructor', 'modality', 'certification', 'methodology',
+    'content', 'url', 'brochure_url'
+]
+
+MASTER_VIEW = "master_courses"
+
+
+def row_hash(values):
+    return hashlib.sha256(json.dumps(values, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class CourseStore:
+    def __init__(self, db_file=DEFAULT_DB_FILE, run_id=None):
+        self.db_file = db_file
+        self.run_id = run_id
+        self._local = threading.local()
+        self.stats = {"inserted": 0, "updated": 0, "unchanged": 0, "retired": 0}
+        self._stats_lock = threading.Lock()
+
+        directory = os.path.dirname(db_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        columns = ",\n".join(f"                {col} TEXT" for col in STANDARD_COLUMNS)
+        conn = self._conn()
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS courses (
+                site TEXT NOT NULL,
+                canonical_url TEXT NOT NULL,
+{columns},
+                row_json TEXT,
+                row_hash TEXT,
+                run_id TEXT,
+                first_seen REAL,
+                last_seen REAL,
+                changed_at REAL,
+                retired_at REAL,
+                PRIMARY KEY (site, canonical_url)
+            )
+        """)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(courses)")}
+        if "retired_at" not in existing:
+            conn.execute("ALTER TABLE courses ADD COLUMN retired_at REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_courses_site ON courses (source_site)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_courses_type ON courses (course_type)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_courses_currency ON courses (price_currency)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_courses_url ON courses (canonical_url)")
+        # El mismo curso publicado por dos entradas (ej. las de PUCP) sale una sola vez: la primera guardada.
+        # Se recrea siempre para que una base anterior tome la definición vigente
+        conn.execute(f"DROP VIEW IF EXISTS {MASTER_VIEW}")
+        conn.execute(f"""
+            CREATE VIEW {MASTER_VIEW} AS
+            SELECT {', '.join(STANDARD_COLUMNS)} FROM courses
+            WHERE rowid IN (SELECT MIN(rowid) FROM courses WHERE retired_at IS NULL GROUP BY canonical_url)
+            ORDER BY source_site, course_name
+        """)
+
+    def _conn(self):
+        """Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, site, row):
+        """
+        Guarda la fila de un curso. Si ya existía y no cambió solo se actualiza
+        `last_seen`; `changed_at` marca el último cambio real de contenido.
+        Una fila retirada que vuelve a verse queda vigente otra vez.
+        """
+        url = row.get("url")
+        if not url or url == "N/A":
+            return None
+        values = [str(row.get(col, "N/A")) if row.get(col) is not None else "N/A" for col in STANDARD_COLUMNS]
+        canonical = canonicalize_url(url)
+        # La misma URL con otro tracking o barra final no es un cambio de contenido
+        digest = row_hash([canonical if col == "url" else value for col, value in zip(STANDARD_COLUMNS, values)])
+        now = time.time()
+        conn = self._conn()
+        previous = conn.execute(
+            "SELECT row_hash FROM courses WHERE site = ? AND canonical_url = ?", (site, canonical)
+        ).fetchone()
+        placeholders = ", ".join("?" for _ in STANDARD_COLUMNS)
+        updates = ", ".join(f"{col} = excluded.{col}" for col in STANDARD_COLUMNS)
+        conn.execute(
+            f"INSERT INTO courses (site, canonical_url, {', '.join(STANDARD_COLUMNS)}, row_json, row_hash, run_id, "
+            f"first_seen, last_seen, changed_at) VALUES (?, ?, {placeholders}, ?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT(site, canonical_url) DO UPDATE SET {updates}, row_json = excluded.row_json, "
+            "row_hash = excluded.row_hash, run_id = excluded.run_id, last_seen = excluded.last_seen, retired_at = NULL, "
+            "changed_at = CASE WHEN courses.row_hash = excluded.row_hash THEN courses.changed_at ELSE excluded.changed_at END",
+            (site, canonical, *values, json.dumps(row, ensure_ascii=False, default=str), digest,
+             self.run_id, now, now, now)
+        )
+        outcome = "inserted" if previous is None else ("unchanged" if previous[0] == digest else "updated")
+        with self._stats_lock:
+            self.stats[outcome] += 1
+        return outcome
+
+    def retire_unseen(self, site, keep=()):
+        """
+        Retira las filas de `site` que esta ejecución (run_id) no volvió a ver.
+        `keep`: URLs que la corrida sí encontró en el catálogo pero no llegó a
+        guardar (fetch o extracción fallida); conservan su última fila.
+        Llamar solo tras una corrida completa del sitio. Devuelve cuántas se retiraron.
+        """
+        if self.run_id is None:
+            return 0
+        keep = {canonicalize_url(url) for url in keep}
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            unseen = [row[0] for row in conn.execute(
+                "SELECT canonical_url FROM courses WHERE site = ? AND retired_at IS NULL "
+                "AND (run_id IS NULL OR run_id != ?)", (site, self.run_id)
+            ) if row[0] not in keep]
+            now = time.time()
+            conn.executemany(
+                "UPDATE courses SET retired_at = ? WHERE site = ? AND canonical_url = ?",
+                [(now, site, url) for url in unseen]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._stats_lock:
+            self.stats["retired"] += len(unseen)
+        return len(unseen)
+
+    def import_csv(self, site, csv_file):
+        """Carga un CSV por sitio de ejecuciones anteriores (migración al almacén)."""
+        import pandas as pd
+        df = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            for row in df.to_dict("records"):
+                self.upsert(site, row)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(df)
+
+    # === Consultas ===
+    def get(self, url, site=None):
+        """Estado actual de un curso (por URL, en cualquier forma)."""
+        query = f"SELECT site, {', '.join(STANDARD_COLUMNS)}, run_id, first_seen, last_seen, changed_at, retired_at " \
+                "FROM courses WHERE canonical_url = ?"
+        params = [canonicalize_url(url)]
+        if site:
+            query += " AND site = ?"
+            params.append(site)
+        conn = self._conn()
+        cursor = conn.execute(query + " ORDER BY rowid", params)
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def courses(self, site=None, source_site=None, course_type=None, currency=None):
+        """Filas vigentes del almacén filtradas por los campos indexados."""
+        filters = {"site": site, "source_site": source_site, "course_type": course_type, "price_currency": currency}
+        where = [(f"{col} = ?", value) for col, value in filters.items() if value is not None]
+        query = f"SELECT {', '.join(STANDARD_COLUMNS)} FROM courses WHERE retired_at IS NULL"
+        for clause, _ in where:
+            query += " AND " + clause
+        cursor = self._conn().execute(query + " ORDER BY source_site, course_name", [value for _, value in where])
+        return [dict(zip(STANDARD_COLUMNS, row)) for row in cursor.fetchall()]
+
+    def count(self, site=None):
+        if site is None:
+            return self._conn().execute("SELECT COUNT(*) FROM courses").fetchone()[0]
+        return self._conn().execute("SELECT COUNT(*) FROM courses WHERE site = ?", (site,)).fetchone()[0]
+
+    # === Exportaciones (vistas) ===
+    def master_frame(self):
+        import pandas as pd
+        return pd.read_sql_query(f"SELECT * FROM {MASTER_VIEW}", self._conn())
+
+    def export_csv(self, path, df=None):
+        df = self.master_frame() if df is None else df
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+        return path
+
+    def export_parquet(self, path, df=None):
+        """Parquet del maestro; None si no hay motor de parquet instalado (pyarrow / fastparquet)."""
+        df = self.master_frame() if df is None else df
+        try:
+            df.to_parquet(path, index=False)
+        except ImportError as e:
+            print(f"   ⚠️  Parquet omitido ({e})")
+            return None
+        return path
+
+    def summary(self):
+        return (f"🗃️  Almacén de cursos: {self.stats['inserted']} nuevos | {self.stats['updated']} actualizados | "
+                f"{self.stats['unchanged']} sin cambios | {self.stats['retired']} retirados | {self.count()} en total")
+
+
+# Almacén del proceso (output/courses.db si nadie lo configuró)
+_shared = ProcessSingleton(CourseStore)
+configure_course_store = _shared.configure
+get_course_store = _shared.get
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Consultar o exportar el almacén maestro de cursos')
+    parser.add_argument('--db', default=DEFAULT_DB_FILE, help='Base de datos (default output/courses.db)')
+    parser.add_argument('--url', default=None, help='Estado actual de un curso por URL')
+    parser.add_argument('--site', default=None, help='Filtrar por sitio (dir_name)')
+    parser.add_argument('--type', default=None, help='Filtrar por course_type')
+    parser.add_argument('--currency', default=None, help='Filtrar por price_currency')
+    parser.add_argument('--export', default=None, help='Exportar la vista maestra a .csv o .parquet')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ No existe {args.db}")
+        sys.exit(1)
+    store = CourseStore(args.db)
+    if args.url:
+        matches = store.get(args.url, site=args.site)
+        if not matches:
+            print(f"❌ Sin registro para {args.url}")
+            sys.exit(1)
+        for match in matches:
+            print(json.dumps(match, indent=2, ensure_ascii=False))
+    elif args.export:
+        path = store.export_parquet(args.export) if args.export.endswith(".parquet") else store.export_csv(args.export)
+        if not path:
+            sys.exit(1)
+        print(f"💾 {path}")
+    else:
+        rows = store.courses(site=args.site, course_type=args.type, currency=args.currency)
+        for row in rows:
+            print(f"   • [{row['source_site']}] {row['course_name']} | {row['course_type']} | "
+                  f"{row['price_raw']} {row['price_currency']} | {row['url']}")
+        print(f"📊 {len(rows)} cursos")
@@ -0,0 +1,320 @@
+"""
+Evaluación de extracción: precisión/recall por campo vs. latencia y costo.
+El golden set (benchmarks/golden/golden.jsonl) tiene una muestra por página de
+curso (HTML archivado) y por brochure, con los valores esperados. Se siembra a
+partir de output/archive/: las páginas se etiquetan con las filas de
+output/*_database.csv y los brochures con la extracción memoizada del PDF en
+el almacén de brochures (solo del PDF, no la fila ya fusionada con el HTML).
+Las produjo el pipeline, así que son etiquetas "silver" (verified: false)
+hasta que alguien las revise y marque verified: true.
+"""
+import os
+import re
+import json
+import glob
+import time
+import hashlib
+import unicodedata
+import pandas as pd
+from bs4 import BeautifulSoup
+from utils.brochure_rules import extract_brochure_fields, PDF_FIELDS
+from utils.llm_helper import HTML_FIELDS
+from utils.stats import percentile
+from utils.page_archive import ArchiveReader, RECORD_COURSE, RECORD_BROCHURE
+from utils.brochure_store import BrochureStore, DEFAULT_STORE_DIR, useful_extraction
+
+DEFAULT_GOLDEN_DIR = "benchmarks/golden"
+GOLDEN_FILE = "golden.jsonl"
+
+KIND_HTML = "html"
+KIND_PDF = "pdf"
+
+FIELDS = {KIND_HTML: HTML_FIELDS, KIND_PDF: PDF_FIELDS}
+
+PRICE_FIELDS = {"price_raw", "price_original"}
+TEXT_FIELDS = {"methodology", "content", "instructor"}  # Resúmenes: se comparan por solapamiento de palabras
+TEXT_MATCH_F1 = 0.5
+MISSING_VALUES = {"", "n/a", "na", "none", "null", "-", "nan"}
+
+PRICE_RE = re.compile(r'(S/\.?\s?\d[\d.,]*|US\$\s?\d[\d.,]*|\$\s?\d[\d.,]*|\d[\d.,]*\s?(?:soles|USD|PEN))', re.IGNORECASE)
+COURSE_TYPES = ["Bootcamp", "Especialización", "Diplomado", "Maestría", "Programa", "Certificación", "Taller", "Curso"]
+MODALITIES = {"en vivo": "En vivo", "online": "Online", "virtual": "Online",
+              "presencial": "Presencial", "híbrido": "Híbrido", "hibrido": "Híbrido"}
+
+
+# === Golden set ===
+def seed_golden(site_configs, golden_dir=DEFAULT_GOLDEN_DIR, csv_dir="output", archive_dir="output/archive",
+                per_site=20, store_dir=DEFAULT_STORE_DIR):
+    """
+    Agrega al golden set hasta `per_site` cursos por sitio con HTML archivado (y su
+    brochure si el almacén tiene su extracción). Las muestras ya verificadas a mano
+    no se pisan. Devuelve {sitio: muestras}.
+    """
+    dir_by_name = {config["name"]: config["dir_name"] for config in site_configs}
+    pages, brochures = _archived_records(archive_dir, set(dir_by_name.values()))
+    # La fila del CSV mezcla HTML y PDF: los brochures se etiquetan con la extracción del PDF solo
+    pdf_extractions = BrochureStore(store_dir).index["extractions"] if os.path.isdir(store_dir) else {}
+
+    existing = {sample["id"]: sample for sample in load_golden(golden_dir)}
+    files_dir = os.path.join(golden_dir, "files")
+    if not os.path.exists(files_dir):
+        os.makedirs(files_dir)
+
+    counts = {}
+    for csv_path in sorted(glob.glob(os.path.join(csv_dir, "*_database.csv"))):
+        if os.path.basename(csv_path).startswith("MASTER_"):
+            continue
+        df = pd.read_csv(csv_path, encoding="utf-8-sig", dtype=str).fillna("N/A")
+        for row in df.to_dict("records"):
+            site = dir_by_name.get(row.get("source_site"))
+            url = row.get("url")
+            if not site or counts.get(site, 0) >= per_site or (site, url) not in pages:
+                continue
+            for kind, record in ((KIND_HTML, pages[(site, url)]), (KIND_PDF, brochures.get((site, url)))):
+                if record is None:
+                    continue
+                reader, entry = record
+                sample_id = f"{site}:{kind}:{hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]}"
+                if existing.get(sample_id, {}).get("verified"):
+                    continue
+                content = reader.read(site, entry)
+                if kind == KIND_HTML:
+                    labels = row
+                else:
+                    labels = pdf_extractions.get(hashlib.sha256(content).hexdigest())
+                    if not useful_extraction(labels):
+                        continue  # Sin extracción del PDF no hay etiqueta que no venga del HTML
+                name = sample_id.replace(":", "_") + (".html" if kind == KIND_HTML else ".pdf")
+                with open(os.path.join(files_dir, name), "wb") as f:
+                    f.write(content)
+                existing[sample_id] = {
+                    "id": sample_id, "site": site, "kind": kind, "url": url, "file": f"files/{name}",
+                    "expected": {field: labels.get(field, "N/A") for field in FIELDS[kind]},
+                    "verified": False,
+                }
+            counts[site] = counts.get(site, 0) + 1
+
+    with open(os.path.join(golden_dir, GOLDEN_FILE), "w", encoding="utf-8") as f:
+        for sample in sorted(existing.values(), key=lambda s: s["id"]):
+            f.write(json.dumps(sample, ensure_ascii=False) + "\n")
+    return counts
+
+
+def _archived_records(archive_dir, sites):
+    """Último HTML de curso y brochure de cada (sitio, url) entre todas las ejecuciones archivadas."""
+    pages, brochures = {}, {}
+    if not os.path.isdir(archive_dir):
+        return pages, brochures
+    for run_id in sorted(os.listdir(archive_dir)):
+        if not os.path.isdir(os.path.join(archive_dir, run_id)):
+            continue
+        reader = ArchiveReader(run_id, archive_dir)
+        for site in set(reader.sites()) & sites:
+            for url, entry in reader.latest(site, RECORD_COURSE).items():
+                pages[(site, url)] = (reader, entry)
+            for url, entry in reader.latest(site, RECORD_BROCHURE).items():
+                brochures[(site, url)] = (reader, entry)
+    return pages, brochures
+
+
+def load_golden(golden_dir=DEFAULT_GOLDEN_DIR):
+    path = os.path.join(golden_dir, GOLDEN_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# === Extractores deterministas del HTML ===
+def _price_text(element):
+    match = PRICE_RE.search(element.get_text(" ", strip=True)) if element else None
+    return match.group(1).strip() if match else None
+
+
+def extract_html_selectors(html):
+    """Selectores del DOM (como los scrapers legacy): h1, precios WooCommerce ins/del, palabras clave."""
+    soup = BeautifulSoup(html, "html.parser")
+    data = {}
+    h1 = soup.find("h1")
+    title = h1.get_text(" ", strip=True) if h1 else (soup.title.get_text(strip=True) if soup.title else "")
+    if title:
+        data["course_name"] = title
+
+    current = _price_text(soup.select_one("ins .woocommerce-Price-amount")) or \
+        _price_text(soup.select_one(".woocommerce-Price-amount")) or \
+        _price_text(soup.select_one("[class*=price]"))
+    original = _price_text(soup.select_one("del .woocommerce-Price-amount")) or \
+        _price_text(soup.select_one("del, s, strike, [class*=antes], [class*=regular]"))
+    if current:
+        data["price_raw"] = current
+    if original:
+        data["price_original"] = original
+
+    for course_type in COURSE_TYPES:
+        if course_type.lower() in title.lower():
+            data["course_type"] = course_type
+            break
+    text = soup.get_text(" ", strip=True).lower()
+    for keyword, modality in MODALITIES.items():
+        if keyword in text:
+            data["modality"] = modality
+            break
+    return data
+
+
+def extract_html_rules(html):
+    """Regex sobre el texto visible (las reglas de los brochures + precios)."""
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup(["script", "style"]):
+        element.decompose()
+    text = soup.get_text("\n", strip=True)
+    found = extract_brochure_fields(text)
+    data = {field: found[field] for field in HTML_FIELDS if field in found}
+    prices = PRICE_RE.findall(text)
+    if prices:
+        data["price_raw"] = prices[0].strip()
+        if len(prices) > 1:
+            data["price_original"] = prices[1].strip()
+    return data
+
+
+# === Estrategias ===
+def _read(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def strategies(helper):
+    """{kind: {nombre: func(ruta, url) → dict}} con todas las estrategias de extracción."""
+    return {
+        KIND_HTML: {
+            "llm:gpt-4o-mini": lambda path, url: helper.extract_from_html(_read(path), url, model="gpt-4o-mini"),
+            "llm:gpt-4o": lambda path, url: helper.extract_from_html(_read(path), url, model="gpt-4o"),
+            "selectors": lambda path, url: extract_html_selectors(_read(path)),
+            "rules": lambda path, url: extract_html_rules(_read(path)),
+        },
+        KIND_PDF: {
+            "rules": lambda path, url: extract_brochure_fields(helper.read_pdf_text(path)),
+            "rules+gpt-4o-mini": lambda path, url: helper.extract_from_pdf(path, model="gpt-4o-mini"),
+            "rules+gpt-4o": lambda path, url: helper.extract_from_pdf(path, model="gpt-4o"),
+            "llm:gpt-4o-mini": lambda path, url: helper.extract_from_pdf(path, model="gpt-4o-mini", use_rules=False),
+            "llm:gpt-4o": lambda path, url: helper.extract_from_pdf(path, model="gpt-4o", use_rules=False),
+        },
+    }
+
+
+# === Comparación ===
+def is_missing(value):
+    return value is None or str(value).strip().lower() in MISSING_VALUES
+
+
+def _normalize(value):
+    text = unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s/.$]", " ", text.lower())).strip()
+
+
+def _token_f1(expected, predicted):
+    expected_tokens, predicted_tokens = set(expected.split()), set(predicted.split())
+    common = len(expected_tokens & predicted_tokens)
+    if not common:
+        return 0.0
+    precision, recall = common / len(predicted_tokens), common / len(expected_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def field_matches(field, expected, predicted):
+    if field in PRICE_FIELDS:
+        digits = lambda value: re.sub(r"[.,](\d{2})$", "", re.sub(r"\s", "", str(value)))
+        return re.sub(r"\D", "", digits(expected)) == re.sub(r"\D", "", digits(predicted))
+    expected, predicted = _normalize(expected), _normalize(predicted)
+    if field in TEXT_FIELDS:
+        return _token_f1(expected, predicted) >= TEXT_MATCH_F1
+    return expected == predicted or (min(len(expected), len(predicted)) >= 3 and
+                                     (expected in predicted or predicted in expected))
+
+
+def score_fields(fields, expected, predicted):
+    """
+    {campo: (tp, fp, fn)}. Un valor predicho incorrecto cuenta como falso
+    positivo y falso negativo a la vez (como en llenado de slots).
+    """
+    scores = {}
+    for field in fields:
+        want, got = expected.get(field), predicted.get(field)
+        if is_missing(got):
+            scores[field] = (0, 0, 0 if is_missing(want) else 1)
+        elif is_missing(want):
+            scores[field] = (0, 1, 0)
+        elif field_matches(field, want, got):
+            scores[field] = (1, 0, 0)
+        else:
+            scores[field] = (0, 1, 1)
+    return scores
+
+
+def _rates(tp, fp, fn):
+    precision = tp / (tp + fp) if tp + fp else None
+    recall = tp / (tp + fn) if tp + fn else None
+    f1 = 2 * precision * recall / (precision + recall) if precision and recall else 0.0
+    return {"tp": tp, "fp": fp, "fn": fn, "precision": precision, "recall": recall, "f1": round(f1, 3)}
+
+
+def evaluate(samples, helper, golden_dir=DEFAULT_GOLDEN_DIR, selected=None):
+    """
+    Corre cada estrategia sobre las muestras de su tipo. `selected`: nombres de
+    estrategia a correr (None = todas). Devuelve {kind: {estrategia: reporte}}.
+    """
+    report = {}
+    for kind, funcs in strategies(helper).items():
+        kind_samples = [sample for sample in samples if sample["kind"] == kind]
+        if not kind_samples:
+            continue
+        for name, func in funcs.items():
+            if selected and name not in selected and f"{kind}:{name}" not in selected:
+                continue
+            print(f"   🧪 {kind} / {name} ({len(kind_samples)} muestras)")
+            totals = {field: [0, 0, 0] for field in FIELDS[kind]}
+            latencies, errors = [], 0
+            tokens_before, cost_before = helper.tokens, helper.cost_usd
+            for sample in kind_samples:
+                start = time.time()
+                try:
+                    predicted = func(os.path.join(golden_dir, sample["file"]), sample["url"]) or {}
+                except Exception as e:
+                    print(f"      ❌ {sample['id']}: {e}")
+                    predicted, errors = {}, errors + 1
+                latencies.append(time.time() - start)
+                for field, counts in score_fields(FIELDS[kind], sample["expected"], predicted).items():
+                    for i, count in enumerate(counts):
+                        totals[field][i] += count
+            n = len(kind_samples)
+            cost = helper.cost_usd - cost_before
+            report.setdefault(kind, {})[name] = {
+                "samples": n,
+                "errors": errors,
+                **_rates(*[sum(counts[i] for counts in totals.values()) for i in range(3)]),
+                "fields": {field: _rates(*counts) for field, counts in totals.items()},
+                "latency_p50": round(percentile(latencies, 0.5), 3),
+                "latency_p95": round(percentile(latencies, 0.95), 3),
+                "tokens_per_sample": round((helper.tokens - tokens_before) / n, 1),
+                "cost_usd": round(cost, 4),
+                "cost_per_1k_samples": round(cost / n * 1000, 2),
+            }
+    return report
+
+
+def format_report(report):
+    def pct(value):
+        return f"{value * 100:5.1f}%" if value is not None else "    -"
+
+    lines = []
+    for kind, by_strategy in report.items():
+        lines.append(f"\n   {kind.upper():<22} {'prec':>6} {'recall':>6} {'F1':>5} {'p50':>7} {'tokens':>7} {'$/1k':>7}")
+        for name, r in sorted(by_strategy.items(), key=lambda item: -item[1]["f1"]):
+            lines.append(f"   {name:<22} {pct(r['precision'])} {pct(r['recall'])} {r['f1']:5.2f} "
+                         f"{r['latency_p50']:6.2f}s {r['tokens_per_sample']:7.0f} {r['cost_per_1k_samples']:7.2f}")
+        fields = FIELDS[kind]
+        lines.append(f"   {'recall por campo':<22} " + " ".join(f"{field[:10]:>10}" for field in fields))
+        for name, r in sorted(by_strategy.items()):
+            lines.append(f"   {name:<22} " + " ".join(f"{pct(r['fields'][field]['recall']):>10}" for field in fields))
+    return "\n".join(lines)
@@ -0,0 +1,149 @@
+"""
+Endpoint local compatible con la API de OpenAI (POST /v1/chat/completions)
+para el benchmark offline. Responde JSON plausible para los prompts de
+LLMHelper, con latencia configurable y 429 inyectados, y devuelve `usage`
+(tokens estimados) para que la contabilidad de tokens y costo funcione igual.
+El cliente de OpenAI lo usa con OPENAI_BASE_URL=<base_url>.
+"""
+import re
+import json
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from utils.llm_helper import HTML_FIELDS
+
+
+def _tokens(text):
+    return max(1, len(text) // 4)
+
+
+def fake_completion(prompt):
+    """Contenido de la respuesta según el tipo de prompt."""
+    requested = re.search(r"Return ONLY raw JSON with keys: ([^\n]+?)\.\s*$", prompt, flags=re.MULTILINE)
+    if requested:
+        return {key.strip(): "N/A" for key in requested.group(1).split(",")}
+    if "course_urls" in prompt:
+        return {"course_urls": [], "pagination_next": None, "total_found": 0}
+    if "course_name" in prompt:
+        data = {field: "N/A" for field in HTML_FIELDS}
+        data["course_type"] = "Curso"
+        title = re.search(r"<h1[^>]*>(.*?)</h1>", prompt, flags=re.DOTALL | re.IGNORECASE) or \
+            re.search(r"<title[^>]*>(.*?)</title>", prompt, flags=re.DOTALL | re.IGNORECASE)
+        if title:
+            data["course_name"] = " ".join(re.sub(r"<[^>]+>", " ", title.group(1)).split()) or "N/A"
+        price = re.search(r"(S/\.?\s?[\d.,]+|US\$\s?[\d.,]+|\$\s?[\d.,]+)", prompt)
+        if price:
+            data["price_raw"] = price.group(1)
+        return data
+    return {}
+
+
+class FakeOpenAIServer:
+    def __init__(self, latency=0.5, jitter=0.2, rate_limit_rate=0.0, seed=0, bind="127.0.0.1", port=0):
+        """
+        `latency` ± `jitter`: segundos por llamada.
+        `rate_limit_rate`: fracción de llamadas que responden 429.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.bind = bind
+        self.port = port
+        self._random = random.Random(seed)  # Misma secuencia de latencias y 429 en cada corrida
+        self._lock = threading.Lock()
+        self.server = None
+        self.calls = 0
+        self.rate_limited = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @property
+    def base_url(self):
+        return f"http://{self.bind}:{self.port}/v1"
+
+    def start(self):
+        self.server = ThreadingHTTPServer((self.bind, self.port), self._handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="fake-openai", daemon=True).start()
+        return self
+
+    def close(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _next_call(self):
+        """(segundos de latencia, si se responde 429)."""
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            limited = self._random.random() < self.rate_limit_rate
+            if limited:
+                self.rate_limited += 1
+        return delay, limited
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._json(400, {"error": {"message": "invalid JSON", "type": "invalid_request_error"}})
+                    return
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._json(404, {"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}})
+                    return
+
+                delay, limited = fake._next_call()
+                time.sleep(delay)
+                if limited:
+                    self._json(429, {"error": {"message": "Rate limit reached (benchmark)", "type": "requests",
+                                               "code": "rate_limit_exceeded"}}, {"Retry-After": "1"})
+                    return
+
+                prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+                content = json.dumps(fake_completion(prompt), ensure_ascii=False)
+                prompt_tokens, completion_tokens = _tokens(prompt), _tokens(content)
+                with fake._lock:
+                    fake.prompt_tokens += prompt_tokens
+                    fake.completion_tokens += completion_tokens
+                self._json(200, {
+                    "id": f"chatcmpl-bench-{fake.calls}", "object": "chat.completion",
+                    "created": int(time.time()), "model": request.get("model", "gpt-4o-mini"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens,
+                              "prompt_tokens_details": {"cached_tokens": 0}},
+                })
+
+            def _json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def summary(self):
+        return (f"🤖 OpenAI simulado: {self.calls} llamadas ({self.rate_limited} con 429) | "
+                f"{self.prompt_tokens + self.completion_tokens:,} tokens | latencia {self.latency}±{self.jitter}s")
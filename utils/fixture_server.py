@@ -0,0 +1,277 @@
+"""
+Sitios de prueba locales para el benchmark offline.
+Los fixtures se graban desde un archivo de ejecución (output/archive/<run_id>/,
+ver utils/page_archive.py): páginas de catálogo, de curso, XHR y brochures de
+cada sitio quedan en benchmarks/fixtures/<sitio>/ con un manifest.json.
+FixtureServer levanta un servidor HTTP local por host original y reescribe los
+links absolutos al host local, así el scraper navega el sitio grabado sin red.
+synthetic_fixtures escribe un sitio sintético en el mismo formato (sin archivo real).
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from utils.page_archive import ArchiveReader, RECORD_CATALOG, RECORD_COURSE, RECORD_XHR, RECORD_BROCHURE
+
+DEFAULT_FIXTURES_DIR = "benchmarks/fixtures"
+MANIFEST_FILE = "manifest.json"
+
+EXTENSIONS = {"text/html": ".html", "application/json": ".json", "application/pdf": ".pdf"}
+# Contenidos donde se reescriben los links al host local
+TEXT_TYPES = ("text/", "application/json", "application/javascript")
+
+
+def _resource_key(url):
+    """host + path + query (sin esquema ni fragmento): clave de un recurso grabado."""
+    parts = urlsplit(url)
+    key = (parts.hostname or "") + (parts.path or "/")
+    if parts.query:
+        key += "?" + parts.query
+    return key
+
+
+def _strip_scripts(html):
+    # El archivo guarda el DOM ya renderizado: sin scripts la página es determinista
+    return re.sub(r"<script\b[^>]*>.*?</script>", "", html, flags=re.DOTALL | re.IGNORECASE)
+
+
+def record_fixtures(run_id, site_configs, fixtures_dir=DEFAULT_FIXTURES_DIR, archive_dir="output/archive"):
+    """
+    Graba los fixtures de cada sitio de `site_configs` (entradas de SCRAPERS_CONFIG)
+    presente en el archivo `run_id`. Devuelve {sitio: recursos grabados}.
+    """
+    reader = ArchiveReader(run_id, archive_dir)
+    archived = set(reader.sites())
+    recorded = {}
+    for config in site_configs:
+        site = config["dir_name"]
+        if site not in archived:
+            continue
+        site_dir = os.path.join(fixtures_dir, site)
+        files_dir = os.path.join(site_dir, "files")
+        if not os.path.exists(files_dir):
+            os.makedirs(files_dir)
+
+        resources = {}
+        for entry in reader.index(site):
+            if entry["kind"] not in (RECORD_CATALOG, RECORD_COURSE, RECORD_XHR, RECORD_BROCHURE):
+                continue
+            content = reader.read(site, entry)
+            content_type = entry["content_type"]
+            if content_type.startswith("text/html"):
+                content = _strip_scripts(content.decode("utf-8", errors="replace")).encode("utf-8")
+            name = hashlib.sha1(entry["url"].encode("utf-8")).hexdigest()[:16]
+            name += EXTENSIONS.get(content_type.split(";")[0], ".bin")
+            with open(os.path.join(files_dir, name), "wb") as f:
+                f.write(content)
+            # La última versión de cada URL gana (igual que ArchiveReader.latest)
+            resources[_resource_key(entry["url"])] = {
+                "url": entry["url"], "file": name, "content_type": content_type, "kind": entry["kind"]
+            }
+
+        manifest = {
+            "site": site, "name": config["name"], "catalog_url": config["catalog_url"],
+            "max_pages": config.get("max_pages", 10), "run_id": run_id, "resources": resources,
+        }
+        with open(os.path.join(site_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        recorded[site] = len(resources)
+    return recorded
+
+
+SYNTHETIC_SITE = "academia_demo"
+SYNTHETIC_HOST = "academia-demo.example"
+SYNTHETIC_COURSES = [
+    ("Python para Análisis de Datos", "S/ 1,200", "8 semanas", "Online"),
+    ("Power BI desde Cero", "S/ 890", "6 semanas", "En vivo"),
+    ("Machine Learning Aplicado", "S/ 2,400", "12 semanas", "Híbrido"),
+    ("SQL para Negocios", "S/ 650", "4 semanas", "Online"),
+    ("Estadística con R", "S/ 980", "8 semanas", "Presencial"),
+    ("Excel Avanzado", "S/ 450", "5 semanas", "Online"),
+    ("Data Engineering con Spark", "S/ 2,900", "10 semanas", "En vivo"),
+    ("Visualización con Tableau", "S/ 790", "6 semanas", "Online"),
+    ("Deep Learning con PyTorch", "S/ 3,100", "14 semanas", "Híbrido"),
+    ("Gestión de Proyectos Ágiles", "S/ 1,050", "8 semanas", "Presencial"),
+    ("Cloud para Analítica", "S/ 1,750", "9 semanas", "Online"),
+    ("Storytelling con Datos", "S/ 520", "3 semanas", "En vivo"),
+]
+
+
+def _slug(text):
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"[^a-z0-9]+", "-", text).strip("-")
+
+
+def synthetic_fixtures(fixtures_dir=DEFAULT_FIXTURES_DIR, per_page=6):
+    """
+    Sitio sintético y determinista (catálogo paginado + páginas de curso) con el
+    mismo formato que record_fixtures, para correr el benchmark sin un archivo
+    de ejecución real. Devuelve la cantidad de recursos escritos.
+    """
+    site_dir = os.path.join(fixtures_dir, SYNTHETIC_SITE)
+    files_dir = os.path.join(site_dir, "files")
+    if not os.path.exists(files_dir):
+        os.makedirs(files_dir)
+    base = f"https://{SYNTHETIC_HOST}"
+    catalog_url = f"{base}/catalogo/"
+    pages = [SYNTHETIC_COURSES[i:i + per_page] for i in range(0, len(SYNTHETIC_COURSES), per_page)]
+
+    documents = {}
+    for number, courses in enumerate(pages, start=1):
+        url = catalog_url if number == 1 else f"{catalog_url}page/{number}/"
+        cards = "\n".join(
+            f'      <article class="card"><a href="{base}/curso/{_slug(name)}/">{name}</a></article>'
+            for name, _, _, _ in courses
+        )
+        next_link = f'\n    <nav><a class="page-link" href="{catalog_url}page/{number + 1}/">Siguiente</a></nav>' \
+            if number < len(pages) else ""
+        documents[url] = (RECORD_CATALOG, f"<html><head><title>Catálogo | Academia Demo</title></head><body>\n"
+                          f"  <main>\n    <h1>Cursos</h1>\n{cards}{next_link}\n  </main>\n"
+                          f'  <footer><a href="{base}/terminos/">Términos y condiciones</a></footer>\n</body></html>\n')
+        for name, price, duration, modality in courses:
+            documents[f"{base}/curso/{_slug(name)}/"] = (RECORD_COURSE, (
+                f"<html><head><title>{name} | Academia Demo</title></head><body>\n  <main>\n"
+                f"    <h1>{name}</h1>\n    <p class=\"price\">Inversión: {price}</p>\n"
+                f"    <ul>\n      <li>Duración: {duration}</li>\n      <li>Modalidad: {modality}</li>\n"
+                f"      <li>Inicio: 15 de marzo</li>\n    </ul>\n"
+                f"    <p>Programa práctico de {name.lower()} con proyectos reales y certificado digital.</p>\n"
+                f"  </main>\n</body></html>\n"))
+
+    resources = {}
+    for url, (kind, html) in documents.items():
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".html"
+        with open(os.path.join(files_dir, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        resources[_resource_key(url)] = {
+            "url": url, "file": name, "content_type": "text/html; charset=utf-8", "kind": kind
+        }
+    manifest = {
+        "site": SYNTHETIC_SITE, "name": "Academia Demo (sintético)", "catalog_url": catalog_url,
+        "max_pages": len(pages) + 1, "run_id": "synthetic", "resources": resources,
+    }
+    with open(os.path.join(site_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return len(resources)
+
+
+def load_manifests(fixtures_dir=DEFAULT_FIXTURES_DIR):
+    manifests = {}
+    if not os.path.isdir(fixtures_dir):
+        return manifests
+    for site in sorted(os.listdir(fixtures_dir)):
+        path = os.path.join(fixtures_dir, site, MANIFEST_FILE)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                manifests[site] = json.load(f)
+    return manifests
+
+
+class FixtureServer:
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, latency=0.0, bind="127.0.0.1"):
+        """`latency`: segundos de espera por petición (simula un sitio lento)."""
+        self.fixtures_dir = os.path.abspath(fixtures_dir)
+        self.latency = latency
+        self.bind = bind
+        self.manifests = load_manifests(self.fixtures_dir)
+        self.resources = {}  # clave → (ruta del archivo, content-type)
+        for site, manifest in self.manifests.items():
+            for key, resource in manifest["resources"].items():
+                path = os.path.join(self.fixtures_dir, site, "files", resource["file"])
+                self.resources[key] = (path, resource["content_type"])
+        self.hosts = sorted({key.split("/", 1)[0] for key in self.resources} |
+                            {urlsplit(m["catalog_url"]).hostname for m in self.manifests.values()})
+        self.ports = {}    # host original → puerto local
+        self.servers = []
+        self.requests = 0
+        self.not_found = 0
+        self._lock = threading.Lock()
+        self._host_pattern = None
+
+    def start(self):
+        for host in self.hosts:
+            server = ThreadingHTTPServer((self.bind, 0), self._handler_for(host))
+            server.daemon_threads = True
+            self.ports[host] = server.server_address[1]
+            threading.Thread(target=server.serve_forever, name=f"fixtures-{host}", daemon=True).start()
+            self.servers.append(server)
+        if self.hosts:
+            # Links absolutos (http, https o //) a cualquier host grabado
+            alternatives = "|".join(re.escape(host) for host in sorted(self.hosts, key=len, reverse=True))
+            self._host_pattern = re.compile(rf"(?:https?:)?//({alternatives})(?![\w.-])")
+        return self
+
+    def close(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.servers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def local_url(self, url):
+        """URL local equivalente a una URL original grabada."""
+        return self.rewrite(url)
+
+    def rewrite(self, text):
+        if not self._host_pattern:
+            return text
+        return self._host_pattern.sub(lambda m: f"http://{self.bind}:{self.ports[m.group(1)]}", text)
+
+    def lookup(self, host, path):
+        key = host + path
+        candidates = [key, key.rstrip("/"), key + "/"] if not key.endswith("/") else [key, key.rstrip("/")]
+        for candidate in candidates:
+            if candidate in self.resources:
+                return self.resources[candidate]
+        return None
+
+    def _handler_for(self, host):
+        fixtures = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._serve(send_body=True)
+
+            def do_HEAD(self):
+                self._serve(send_body=False)
+
+            def _serve(self, send_body):
+                if fixtures.latency:
+                    time.sleep(fixtures.latency)
+                resource = fixtures.lookup(host, self.path)
+                with fixtures._lock:
+                    fixtures.requests += 1
+                    if resource is None:
+                        fixtures.not_found += 1
+                if resource is None:
+                    self.send_error(404)
+                    return
+                path, content_type = resource
+                with open(path, "rb") as f:
+                    body = f.read()
+                if content_type.startswith(TEXT_TYPES):
+                    body = fixtures.rewrite(body.decode("utf-8", errors="replace")).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def summary(self):
+        return (f"🗂️  Fixtures: {len(self.manifests)} sitios, {len(self.resources)} recursos en "
+                f"{len(self.hosts)} hosts | {self.requests} peticiones, {self.not_found} sin fixture (404)")
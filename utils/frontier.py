@@ -0,0 +1,304 @@
+"""
+Frontera de crawling persistente en SQLite.
+Canonicaliza URLs (fragmentos, slash final, utm_/gad_source...), ordena por
+prioridad (cursos nuevos y cambiados primero) y guarda estado y reintentos
+por URL. Varios workers (hilos o procesos) pueden reclamar trabajo a la vez.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_DB_FILE = "output/frontier.db"
+
+# Parámetros de tracking que no cambian el contenido de la página
+TRACKING_PARAMS = {"gad_source", "gclid", "fbclid", "msclkid", "yclid", "_ga", "_gl", "ref", "mc_cid", "mc_eid"}
+
+# Tipos de URL
+KIND_CATALOG = "catalog"
+KIND_COURSE = "course"
+
+# Estados
+STATE_PENDING = "pending"
+STATE_IN_PROGRESS = "in_progress"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+STATE_SKIPPED = "skipped"  # Saltada por circuito abierto o presupuesto agotado
+
+# Prioridades (mayor = antes)
+PRIORITY_CHANGED = 30
+PRIORITY_NEW = 20
+PRIORITY_KNOWN = 10
+
+
+def canonicalize_url(url):
+    """Forma canónica de una URL para deduplicar."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+
+    # Sin fragmento (#...)
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+class CrawlFrontier:
+    def __init__(self, site, db_file=DEFAULT_DB_FILE, max_retries=2, lease_seconds=600):
+        self.site = site
+        self.db_file = db_file
+        self.max_retries = max_retries
+        self.lease_seconds = lease_seconds  # Un "in_progress" más viejo se considera abandonado
+        self._local = threading.local()
+
+        directory = os.path.dirname(db_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS frontier (
+                    site TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'pending',
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    retries INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    seen_run INTEGER,
+                    claimed_by TEXT,
+                    claimed_at REAL,
+                    discovered_at REAL,
+                    updated_at REAL,
+                    PRIMARY KEY (site, url)
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_frontier_claim ON frontier (site, kind, state, priority)"
+            )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS frontier_runs (
+                    site TEXT PRIMARY KEY,
+                    run_id INTEGER NOT NULL,
+                    run_key TEXT,
+                    started_at REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS discovery_cache (
+                    site TEXT PRIMARY KEY,
+                    urls_json TEXT NOT NULL,
+                    fingerprint TEXT,
+                    discovered_at REAL
+                )
+            """)
+        self.run_id = None
+        self.resumed = False
+
+    def _conn(self):
+        """Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # === Ciclo de vida de una ejecución ===
+    def start_run(self, seed_urls=None, resume=False, run_key=None):
+        """
+        Abre una ejecución: el catálogo se vuelve a recorrer y los cursos ya
+        hechos quedan pendientes (los que cambiaron la última vez, primero).
+        Con `resume` se conserva el estado de la ejecución interrumpida, solo si
+        la última ejecución del sitio pertenece a la misma corrida (`run_key`);
+        si no, el sitio no llegó a empezar y se hace completo.
+        """
+        conn = self._conn()
+        now = time.time()
+        last = conn.execute("SELECT run_id, run_key FROM frontier_runs WHERE site = ?", (self.site,)).fetchone()
+        if resume and not (last and last[1] == run_key):
+            print(f"   ♻️  {self.site}: sin ejecución interrumpida que reanudar, se hace completo")
+            resume = False
+        self.resumed = resume
+        if resume:
+            self.run_id = last[0]
+            # Lo que quedó "in_progress" al cortarse el proceso (o se saltó) vuelve a pendientes
+            conn.execute(
+                "UPDATE frontier SET state = ?, claimed_by = NULL WHERE site = ? AND state IN (?, ?)",
+                (STATE_PENDING, self.site, STATE_IN_PROGRESS, STATE_SKIPPED)
+            )
+        else:
+            # Siempre mayor que la anterior: dos ejecuciones en el mismo milisegundo no comparten run_id
+            self.run_id = max(int(now * 1000), last[0] + 1 if last else 0)
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM frontier WHERE site = ? AND kind = ?", (self.site, KIND_CATALOG))
+            # Los nuevos de la ejecución anterior pasan a conocidos; los que cambiaron conservan la prioridad
+            conn.execute(
+                "UPDATE frontier SET state = ?, retries = 0, "
+                "priority = CASE WHEN priority >= ? THEN ? ELSE ? END, "
+                "claimed_by = NULL, updated_at = ? WHERE site = ? AND kind = ?",
+                (STATE_PENDING, PRIORITY_CHANGED, PRIORITY_CHANGED, PRIORITY_KNOWN, now, self.site, KIND_COURSE)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO frontier_runs (site, run_id, run_key, started_at) VALUES (?, ?, ?, ?)",
+                (self.site, self.run_id, run_key, now)
+            )
+            conn.execute("COMMIT")
+
+        for url in seed_urls or []:
+            self.add(url, KIND_CATALOG, priority=PRIORITY_NEW)
+        return self.run_id
+
+    # === Alta ===
+    def add(self, url, kind=KIND_COURSE, priority=None):
+        """
+        Agrega (o marca como vista en esta ejecución) una URL canonicalizada.
+        Devuelve True si es nueva en esta ejecución.
+        """
+        url = canonicalize_url(url)
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT seen_run FROM frontier WHERE site = ? AND url = ?", (self.site, url)
+        ).fetchone()
+
+        if row is None:
+            conn.execute(
+                "INSERT OR IGNORE INTO frontier (site, url, kind, state, priority, seen_run, discovered_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.site, url, kind, STATE_PENDING, priority or PRIORITY_NEW, self.run_id, now, now)
+            )
+            return True
+
+        if row[0] != self.run_id:
+            conn.execute(
+                "UPDATE frontier SET seen_run = ?, updated_at = ? WHERE site = ? AND url = ?",
+                (self.run_id, now, self.site, url)
+            )
+            return True
+        return False
+
+    def mark_changed(self, url, changed=True):
+        """
+        Prioridad del curso para la próxima ejecución según si su contenido
+        cambió en esta (los que cambian tienden a volver a cambiar).
+        """
+        self._conn().execute(
+            "UPDATE frontier SET priority = ? WHERE site = ? AND url = ?",
+            (PRIORITY_CHANGED if changed else PRIORITY_KNOWN, self.site, canonicalize_url(url))
+        )
+
+    # === Reclamo de trabajo ===
+    def claim(self, kind=KIND_COURSE, worker="main"):
+        """Reclama atómicamente la siguiente URL pendiente (o None)."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT url FROM frontier WHERE site = ? AND kind = ? AND seen_run = ? "
+                "AND (state = ? OR (state = ? AND claimed_at < ?)) "
+                "ORDER BY priority DESC, discovered_at ASC LIMIT 1",
+                (self.site, kind, self.run_id, STATE_PENDING, STATE_IN_PROGRESS, now - self.lease_seconds)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE frontier SET state = ?, claimed_by = ?, claimed_at = ?, updated_at = ? "
+                "WHERE site = ? AND url = ?",
+                (STATE_IN_PROGRESS, worker, now, now, self.site, row[0])
+            )
+            conn.execute("COMMIT")
+            return row[0]
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def complete(self, url):
+        self._set_state(url, STATE_DONE)
+
+    def fail(self, url, error=""):
+        """Devuelve la URL a pendientes hasta agotar `max_retries`; luego la marca fallida."""
+        conn = self._conn()
+        url = canonicalize_url(url)
+        conn.execute(
+            "UPDATE frontier SET retries = retries + 1, last_error = ?, updated_at = ?, "
+            "state = CASE WHEN retries + 1 > ? THEN ? ELSE ? END "
+            "WHERE site = ? AND url = ?",
+            (str(error)[:500], time.time(), self.max_retries, STATE_FAILED, STATE_PENDING, self.site, url)
+        )
+
+    def skip(self, url, reason=""):
+        """Saltea la URL en esta ejecución sin contar un reintento."""
+        self._conn().execute(
+            "UPDATE frontier SET state = ?, last_error = ?, updated_at = ? WHERE site = ? AND url = ?",
+            (STATE_SKIPPED, str(reason)[:500], time.time(), self.site, canonicalize_url(url))
+        )
+
+    def _set_state(self, url, state):
+        self._conn().execute(
+            "UPDATE frontier SET state = ?, updated_at = ? WHERE site = ? AND url = ?",
+            (state, time.time(), self.site, canonicalize_url(url))
+        )
+
+    # === Caché de descubrimiento (fase 1) ===
+    def save_discovery(self, urls, fingerprint):
+        """Guarda el conjunto de cursos descubierto y la huella de la primera página del catálogo."""
+        self._conn().execute(
+            "INSERT OR REPLACE INTO discovery_cache (site, urls_json, fingerprint, discovered_at) VALUES (?, ?, ?, ?)",
+            (self.site, json.dumps(sorted(urls)), fingerprint, time.time())
+        )
+
+    def load_discovery(self):
+        row = self._conn().execute(
+            "SELECT urls_json, fingerprint, discovered_at FROM discovery_cache WHERE site = ?", (self.site,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"urls": json.loads(row[0]), "fingerprint": row[1], "discovered_at": row[2]}
+
+    def touch_discovery(self):
+        """Renueva la fecha del descubrimiento tras verificar que el catálogo no cambió."""
+        self._conn().execute(
+            "UPDATE discovery_cache SET discovered_at = ? WHERE site = ?", (time.time(), self.site)
+        )
+
+    # === Consultas ===
+    def urls(self, kind=KIND_COURSE, state=None):
+        """URLs vistas en esta ejecución (opcionalmente solo las de un estado)."""
+        query = "SELECT url FROM frontier WHERE site = ? AND kind = ? AND seen_run = ?"
+        params = [self.site, kind, self.run_id]
+        if state:
+            query += " AND state = ?"
+            params.append(state)
+        rows = self._conn().execute(
+            query + " ORDER BY priority DESC, discovered_at ASC", params
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def counts(self, kind=KIND_COURSE):
+        rows = self._conn().execute(
+            "SELECT state, COUNT(*) FROM frontier WHERE site = ? AND kind = ? AND seen_run = ? GROUP BY state",
+            (self.site, kind, self.run_id)
+        ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
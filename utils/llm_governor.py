@@ -0,0 +1,227 @@
+"""
+Gobernador global de llamadas LLM.
+Antes de cada llamada, LLMHelper pide turno: se respetan las peticiones y
+tokens por minuto (RPM/TPM) y el gasto máximo de la ejecución. El estado vive
+en SQLite (output/llm_governor.db), así varios procesos comparten los mismos
+límites. Cuando varios sitios esperan, pasa primero el que menos llamadas
+tuvo en el último minuto (reparto justo). Al llegar al tope de gasto se lanza
+LLMBudgetExhausted para que el scraper corte y deje un checkpoint.
+"""
+import os
+import time
+import uuid
+import sqlite3
+import threading
+from utils.singleton import ProcessSingleton
+
+DEFAULT_DB_FILE = "output/llm_governor.db"
+RUN_KEY_ENV = "LLM_GOVERNOR_RUN_KEY"
+
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200000
+ESTIMATED_OUTPUT_TOKENS = 500  # Reserva por llamada hasta conocer el uso real
+WAITER_TTL = 30                # Segundos sin heartbeat tras los que un turno en espera se descarta
+WINDOW_SECONDS = 60            # Ventana de RPM/TPM
+PRUNE_EVERY = 60               # Segundos entre podas de llm_calls (por proceso)
+STALE_RESERVATION = 3600       # Reserva sin liquidar (proceso caído) que se poda igual
+
+
+class LLMBudgetExhausted(Exception):
+    """Se alcanzó el gasto máximo de la ejecución."""
+
+
+def estimate_tokens(text):
+    """Aproximación barata: ~4 caracteres por token."""
+    return len(text) // 4 + ESTIMATED_OUTPUT_TOKENS
+
+
+class LLMGovernor:
+    def __init__(self, max_rpm=DEFAULT_RPM, max_tpm=DEFAULT_TPM, max_usd=None, run_key=None,
+                 db_file=DEFAULT_DB_FILE, poll_seconds=0.5):
+        """
+        `max_usd`: gasto máximo de la ejecución `run_key` (sumando todos los procesos
+        que usen la misma clave). None = sin tope.
+        """
+        self.max_rpm = max_rpm
+        self.max_tpm = max_tpm
+        self.max_usd = max_usd
+        self.run_key = run_key or os.environ.get(RUN_KEY_ENV) or time.strftime("%Y%m%d_%H%M%S")
+        self.db_file = db_file
+        self.poll_seconds = poll_seconds
+        self.exhausted = False
+        self.waited_seconds = 0.0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+        directory = os.path.dirname(db_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_calls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_key TEXT NOT NULL,
+                site TEXT NOT NULL,
+                model TEXT,
+                started_at REAL NOT NULL,
+                tokens INTEGER NOT NULL DEFAULT 0,
+                cost REAL NOT NULL DEFAULT 0,
+                settled INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_time ON llm_calls (started_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_run ON llm_calls (run_key)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_waiters (
+                ticket TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                heartbeat REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE TABLE IF NOT EXISTS llm_state (key TEXT PRIMARY KEY, value REAL)")
+        # Totales por run_key de las llamadas ya podadas de llm_calls (fuera de la ventana)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_run_totals (
+                run_key TEXT PRIMARY KEY,
+                calls INTEGER NOT NULL DEFAULT 0,
+                tokens INTEGER NOT NULL DEFAULT 0,
+                cost REAL NOT NULL DEFAULT 0
+            )
+        """)
+        self._last_prune = 0.0
+
+    def _conn(self):
+        """Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # === Admisión ===
+    def admit(self, site, model, est_tokens, est_cost=0.0):
+        """
+        Bloquea hasta que haya capacidad y sea el turno de `site`. Devuelve el id
+        de la llamada (para `settle`). Lanza LLMBudgetExhausted si se llegó al tope.
+        """
+        conn = self._conn()
+        ticket = uuid.uuid4().hex
+        start = time.time()
+        conn.execute("INSERT INTO llm_waiters (ticket, site, heartbeat) VALUES (?, ?, ?)", (ticket, site, start))
+        try:
+            while True:
+                now = time.time()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    call_id = self._try_admit(conn, ticket, site, model, est_tokens, est_cost, now)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                if call_id is not None:
+                    with self._stats_lock:
+                        self.waited_seconds += time.time() - start
+                    return call_id
+                time.sleep(self.poll_seconds)
+        finally:
+            conn.execute("DELETE FROM llm_waiters WHERE ticket = ?", (ticket,))
+
+    def _try_admit(self, conn, ticket, site, model, est_tokens, est_cost, now):
+        conn.execute("UPDATE llm_waiters SET heartbeat = ? WHERE ticket = ?", (now, ticket))
+        conn.execute("DELETE FROM llm_waiters WHERE heartbeat < ?", (now - WAITER_TTL,))
+        if now - self._last_prune >= PRUNE_EVERY:
+            self._prune(conn, now)
+            self._last_prune = now
+
+        if self.max_usd is not None and self.spent(conn) >= self.max_usd:
+            self.exhausted = True
+            raise LLMBudgetExhausted(f"tope de gasto LLM alcanzado (${self.max_usd:.2f})")
+
+        paused = conn.execute("SELECT value FROM llm_state WHERE key = 'paused_until'").fetchone()
+        if paused and paused[0] > now:
+            return None
+
+        requests_last_minute, tokens_last_minute = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tokens), 0) FROM llm_calls WHERE started_at > ?", (now - WINDOW_SECONDS,)
+        ).fetchone()
+        if requests_last_minute >= self.max_rpm:
+            return None
+        if tokens_last_minute and tokens_last_minute + est_tokens > self.max_tpm:
+            return None
+
+        # Reparto justo: pasa el sitio en espera con menos llamadas en el último minuto
+        served = dict(conn.execute(
+            "SELECT w.site, (SELECT COUNT(*) FROM llm_calls c WHERE c.site = w.site AND c.started_at > ?) "
+            "FROM llm_waiters w GROUP BY w.site", (now - WINDOW_SECONDS,)
+        ).fetchall())
+        if served and served.get(site, 0) > min(served.values()):
+            return None
+
+        cursor = conn.execute(
+            "INSERT INTO llm_calls (run_key, site, model, started_at, tokens, cost) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.run_key, site, model, now, est_tokens, est_cost)
+        )
+        return cursor.lastrowid
+
+    def _prune(self, conn, now):
+        """
+        Pasa a llm_run_totals las llamadas liquidadas que ya salieron de la ventana
+        de RPM/TPM y las borra de llm_calls. Las reservas sin liquidar se esperan
+        (la llamada sigue en curso) salvo que sean de un proceso que murió.
+        """
+        where = "WHERE (settled = 1 AND started_at < ?) OR started_at < ?"
+        params = (now - WINDOW_SECONDS, now - STALE_RESERVATION)
+        conn.execute(
+            "INSERT INTO llm_run_totals (run_key, calls, tokens, cost) "
+            f"SELECT run_key, COUNT(*), SUM(tokens), SUM(cost) FROM llm_calls {where} GROUP BY run_key "
+            "ON CONFLICT(run_key) DO UPDATE SET calls = calls + excluded.calls, "
+            "tokens = tokens + excluded.tokens, cost = cost + excluded.cost", params
+        )
+        conn.execute(f"DELETE FROM llm_calls {where}", params)
+
+    def settle(self, call_id, tokens, cost):
+        """Reemplaza la reserva por el uso real de la llamada."""
+        self._conn().execute(
+            "UPDATE llm_calls SET tokens = ?, cost = ?, settled = 1 WHERE id = ?", (tokens, cost, call_id)
+        )
+
+    def pause(self, seconds):
+        """Frena todas las admisiones (todos los procesos), ej. tras un 429 de OpenAI."""
+        until = time.time() + seconds
+        self._conn().execute(
+            "INSERT INTO llm_state (key, value) VALUES ('paused_until', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)", (until,)
+        )
+
+    # === Consultas ===
+    def _totals(self, conn=None):
+        """(llamadas, tokens, costo) de la ejecución: podadas + las que siguen en llm_calls."""
+        return (conn or self._conn()).execute(
+            "SELECT COALESCE(SUM(calls), 0), COALESCE(SUM(tokens), 0), COALESCE(SUM(cost), 0) FROM ("
+            "SELECT calls, tokens, cost FROM llm_run_totals WHERE run_key = ? UNION ALL "
+            "SELECT COUNT(*), COALESCE(SUM(tokens), 0), COALESCE(SUM(cost), 0) FROM llm_calls WHERE run_key = ?)",
+            (self.run_key, self.run_key)
+        ).fetchone()
+
+    def spent(self, conn=None):
+        return self._totals(conn)[2]
+
+    def usage(self):
+        calls, tokens, cost = self._totals()
+        return {"calls": calls, "tokens": tokens, "cost_usd": round(cost, 4),
+                "waited_seconds": round(self.waited_seconds, 1)}
+
+    def summary(self):
+        usage = self.usage()
+        cap = f" de ${self.max_usd:.2f}" if self.max_usd is not None else ""
+        return (f"🧮 LLM: {usage['calls']} llamadas | {usage['tokens']:,} tokens | "
+                f"${usage['cost_usd']:.2f}{cap} | espera por límites {usage['waited_seconds']:.0f}s")
+
+
+# Gobernador único del proceso, con los límites de la ejecución (o por defecto)
+_shared = ProcessSingleton(LLMGovernor)
+configure_governor = _shared.configure
+get_governor = _shared.get
@@ -1,11 +1,37 @@
 import os
 import pdfplumber
 import json
+import time
+import threading
 from openai import OpenAI
 from dotenv import load_dotenv
+from utils.brochure_rules import extract_brochure_fields, PDF_FIELDS
+from utils.spans import span
+from utils.llm_governor import get_governor, estimate_tokens, LLMBudgetExhausted
+from utils.llm_usage import (get_usage_log, OUTCOME_PARSED, OUTCOME_PARSE_ERROR, OUTCOME_RATE_LIMITED,
+                             OUTCOME_ERROR, OUTCOME_RULES, CACHE_MISS, CACHE_PROMPT, CACHE_MEMO)
+
+RATE_LIMIT_PAUSE = 20  # Segundos que se frenan todas las llamadas tras un 429
+
+# Precio en USD por millón de tokens: (entrada, salida)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+# Campos que extract_from_html devuelve
+HTML_FIELDS = ["course_name", "price_raw", "price_original", "duration", "start_date",
+               "course_type", "instructor", "modality"]
 
 class LLMHelper:
-    def __init__(self):
+    def __init__(self, site="default"):
+        self.site = site  # Para el reparto justo del gobernador entre sitios
+        self.governor = get_governor()
+        self.usage_log = get_usage_log()
+        self._local = threading.local()  # Llamada en curso de cada hilo (para registrar su resultado)
+        self.cost_usd = 0.0  # Gasto acumulado de esta instancia (presupuesto por sitio)
+        self.tokens = 0
+        self._usage_lock = threading.Lock()
         load_dotenv()
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.client = None
@@ -14,52 +40,143 @@ class LLMHelper:
         else:
             print("Warning: OPENAI_API_KEY not found in environment.")
 
-    def extract_from_pdf(self, pdf_path):
+    def _cost(self, model, prompt_tokens, completion_tokens):
+        input_price, output_price = MODEL_PRICES.get(model, MODEL_PRICES["gpt-4o"])
+        return (prompt_tokens * input_price + completion_tokens * output_price) / 1e6
+
+    def _track_usage(self, model, response):
         """
-        Extracts structured course info from a PDF brochure using GPT-4o-mini.
-        Returns a dict with duration, start_date, certification, methodology, instructor, content.
+        Acumula tokens y costo de una respuesta. Devuelve
+        (prompt_tokens, completion_tokens, cached_tokens, costo) o None sin `usage`.
         """
-        if not self.client:
-            return {}
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+        cost = self._cost(model, usage.prompt_tokens, usage.completion_tokens)
+        with self._usage_lock:
+            self.tokens += usage.prompt_tokens + usage.completion_tokens
+            self.cost_usd += cost
+        return usage.prompt_tokens, usage.completion_tokens, cached, cost
 
+    def _chat(self, method, model, messages, **kwargs):
+        """
+        Llamada a OpenAI pasando por el gobernador global: espera turno (RPM/TPM,
+        reparto entre sitios), registra el uso real y frena a todos ante un 429.
+        El llamador registra el resultado del parseo con `_finish_call`.
+        """
+        est_tokens = estimate_tokens("".join(message["content"] for message in messages))
+        est_cost = self._cost(model, est_tokens, 0)
+        with span(self.site, "llm_wait"):
+            call_id = self.governor.admit(self.site, model, est_tokens, est_cost)
+        start = time.time()
         try:
-            full_text = ""
-            with pdfplumber.open(pdf_path) as pdf:
-                # Extract first 5 and last 3 pages
-                pages_to_extract = pdf.pages[:5]
-                if len(pdf.pages) > 5:
-                    pages_to_extract += pdf.pages[-3:]
+            with span(self.site, f"llm_{method}", model=model):
+                response = self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+        except Exception as e:
+            self.governor.settle(call_id, 0, 0.0)
+            rate_limited = "429" in str(e) or "rate_limit" in str(e).lower()
+            if rate_limited:
+                self.governor.pause(RATE_LIMIT_PAUSE)
+            self.usage_log.record(self.site, method, model, latency=time.time() - start,
+                                  outcome=OUTCOME_RATE_LIMITED if rate_limited else OUTCOME_ERROR)
+            raise
+        latency = time.time() - start
+
+        usage = self._track_usage(model, response) or (est_tokens, 0, 0, est_cost)
+        prompt_tokens, completion_tokens, cached_tokens, cost = usage
+        self.governor.settle(call_id, prompt_tokens + completion_tokens, cost)
+        self._local.pending = {
+            "method": method, "model": model, "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens, "cached_tokens": cached_tokens, "cost_usd": cost,
+            "latency": latency, "cache": CACHE_PROMPT if cached_tokens else CACHE_MISS,
+        }
+        return response
+
+    def _finish_call(self, outcome):
+        """Registra la última llamada de este hilo con el resultado del parseo."""
+        pending = getattr(self._local, "pending", None)
+        if pending:
+            self._local.pending = None
+            self.usage_log.record(self.site, outcome=outcome, **pending)
+
+    def record_avoided_call(self, method, outcome=OUTCOME_RULES, cache=CACHE_MISS):
+        """Registra una extracción resuelta sin llamar al LLM (reglas o memo)."""
+        self.usage_log.record(self.site, method, outcome=outcome, cache=cache)
+
+    def record_memo_hit(self, method="extract_from_pdf"):
+        self.record_avoided_call(method, outcome=OUTCOME_PARSED, cache=CACHE_MEMO)
+
+    def read_pdf_text(self, pdf_path):
+        """Extrae el texto de las primeras 5 y últimas 3 páginas del PDF."""
+        full_text = ""
+        with span(self.site, "pdf_text"), pdfplumber.open(pdf_path) as pdf:
+            # Extract first 5 and last 3 pages
+            pages_to_extract = pdf.pages[:5]
+            if len(pdf.pages) > 5:
+                pages_to_extract += pdf.pages[-3:]
+            
+            seen_pages = set()
+            for page in pages_to_extract:
+                if page.page_number in seen_pages: continue
+                seen_pages.add(page.page_number)
                 
-                seen_pages = set()
-                for page in pages_to_extract:
-                    if page.page_number in seen_pages: continue
-                    seen_pages.add(page.page_number)
-                    
-                    text = page.extract_text()
-                    if text:
-                        full_text += text + "\n"
+                text = page.extract_text()
+                if text:
+                    full_text += text + "\n"
+        return full_text
+
+    def extract_from_pdf(self, pdf_path, model="gpt-4o-mini", use_rules=True):
+        """
+        Extracts structured course info from a PDF brochure.
+        Rule-based extraction (utils.brochure_rules) runs first; `model` is
+        only asked for the fields the rules could not fill (all of them with use_rules=False).
+        Returns a dict with duration, start_date, certification, methodology, instructor, content.
+        """
+        try:
+            full_text = self.read_pdf_text(pdf_path)
             
             if not full_text.strip():
                 return {}
 
+            rule_data = extract_brochure_fields(full_text) if use_rules else {}
+            missing = [field for field in PDF_FIELDS if field not in rule_data]
+
+            if not missing:
+                print(f"    📏 Brochure resuelto por reglas (sin LLM)")
+                self.record_avoided_call("extract_from_pdf")
+                return {field: rule_data[field] for field in PDF_FIELDS}
+
+            if not self.client:
+                return {field: rule_data.get(field, "N/A") for field in PDF_FIELDS}
+
+            field_descriptions = {
+                "duration": "Duration (in Academic Hours or similar)",
+                "start_date": "Start Date (Look for \"Inicio\", \"Start\", specific dates like \"21 Enero\")",
+                "certification": "Certification (How many and what certificates?)",
+                "methodology": "Methodology (Brief summary)",
+                "instructor": "Instructor Experience (Brief summary)",
+                "content": "Content Summary (Brief summary of modules/topics)"
+            }
+            requested = "\n".join(
+                f"            {i}. {field_descriptions[field]}" for i, field in enumerate(missing, 1)
+            )
+
             prompt = f"""
             You are a data extraction assistant. Extract the following information from the provided course brochure text:
-            1. Duration (in Academic Hours or similar)
-            2. Start Date (Look for "Inicio", "Start", specific dates like "21 Enero")
-            3. Certification (How many and what certificates?)
-            4. Methodology (Brief summary)
-            5. Instructor Experience (Brief summary)
-            6. Content Summary (Brief summary of modules/topics)
-
-            Return ONLY raw JSON with keys: duration, start_date, certification, methodology, instructor, content.
+{requested}
+
+            Return ONLY raw JSON with keys: {", ".join(missing)}.
             If a field is not found, use "N/A".
             
             Brochure Text:
             {full_text[:10000]} 
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+            response = self._chat(
+                "extract_from_pdf",
+                model=model,
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that extracts structured data from text."},
                     {"role": "user", "content": prompt}
@@ -72,25 +189,41 @@ class LLMHelper:
             
             try:
                 data = json.loads(content)
+                if not isinstance(data, dict):
+                    data = {}
+                self._finish_call(OUTCOME_PARSED if data else OUTCOME_PARSE_ERROR)
             except:
+                self._finish_call(OUTCOME_PARSE_ERROR)
                 data = {}
             
+            # Las reglas tienen prioridad: son literales del brochure
             return {
-                "duration": data.get("duration", "N/A"),
-                "start_date": data.get("start_date", "N/A"),
-                "certification": data.get("certification", "N/A"),
-                "methodology": data.get("methodology", "N/A"),
-                "instructor": data.get("instructor", "N/A"),
-                "content": data.get("content", "N/A")
+                field: rule_data[field] if field in rule_data else data.get(field, "N/A")
+                for field in PDF_FIELDS
             }
 
+        except LLMBudgetExhausted:
+            raise
         except Exception as e:
+            self._finish_call(OUTCOME_ERROR)
             print(f"LLM Helper Error: {e}")
             return {}
 
-    def extract_from_html(self, html_content, url=""):
+    def clean_html(self, html_content, max_chars=15000):
+        """
+        Removes script/style content and truncates to limit tokens.
+        Idempotent, so already-reduced HTML can be passed to extract_from_html.
+        """
+        import re
+        clean_html = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL)
+        clean_html = re.sub(r'<style[^>]*>.*?</style>', '', clean_html, flags=re.DOTALL)
+        
+        # Take first 15000 chars (reasonable for most course pages)
+        return clean_html[:max_chars]
+
+    def extract_from_html(self, html_content, url="", model="gpt-4o-mini"):
         """
-        Extracts structured course info from HTML using GPT-4o-mini.
+        Extracts structured course info from HTML using `model` (GPT-4o-mini by default).
         This is more robust than selector-based scraping.
         Returns a dict with course_name, price_raw, price_original, duration, etc.
         """
@@ -98,14 +231,7 @@ class LLMHelper:
             return {}
 
         try:
-            # Limit HTML size to avoid token overflow
-            # Remove script/style tags content first
-            import re
-            clean_html = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL)
-            clean_html = re.sub(r'<style[^>]*>.*?</style>', '', clean_html, flags=re.DOTALL)
-            
-            # Take first 15000 chars (reasonable for most course pages)
-            clean_html = clean_html[:15000]
+            clean_html = self.clean_html(html_content)
 
             prompt = f"""
             You are a web scraping assistant. Extract course information from the provided HTML.
@@ -128,8 +254,9 @@ class LLMHelper:
             {clean_html}
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+            response = self._chat(
+                "extract_from_html",
+                model=model,
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that extracts structured data from HTML."},
                     {"role": "user", "content": prompt}
@@ -146,8 +273,10 @@ class LLMHelper:
                 if not isinstance(data, dict):
                     print(f"    ⚠️  LLM returned non-dict: {type(data)}")
                     data = {}
+                self._finish_call(OUTCOME_PARSED if data else OUTCOME_PARSE_ERROR)
             except Exception as e:
                 print(f"    ⚠️  JSON parse error: {e}")
+                self._finish_call(OUTCOME_PARSE_ERROR)
                 data = {}
             
             return {
@@ -161,7 +290,10 @@ class LLMHelper:
                 "modality": data.get("modality", "N/A")
             }
 
+        except LLMBudgetExhausted:
+            raise
         except Exception as e:
+            self._finish_call(OUTCOME_ERROR)
             print(f"HTML Extraction Error: {e}")
             return {
                 "course_name": "N/A", "price_raw": "N/A", "price_original": "N/A",
@@ -226,7 +358,8 @@ HTML (truncado):
 RESPONDE SOLO CON JSON VÁLIDO.
 """
             
-            response = self.client.chat.completions.create(
+            response = self._chat(
+                "discover_course_links_with_llm",
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": "Eres un asistente experto en extracción de estructuras web. Siempre respondes con JSON válido."},
@@ -240,6 +373,7 @@ RESPONDE SOLO CON JSON VÁLIDO.
             
             try:
                 data = json.loads(content)
+                self._finish_call(OUTCOME_PARSED)
                 return {
                     "course_urls": data.get("course_urls", []),
                     "pagination_next": data.get("pagination_next"),
@@ -247,10 +381,14 @@ RESPONDE SOLO CON JSON VÁLIDO.
                     "rate_limited": False
                 }
             except:
+                self._finish_call(OUTCOME_PARSE_ERROR)
                 print(f"   ⚠️  Error parsing LLM JSON response")
                 return {"course_urls": [], "pagination_next": None, "total_found": 0, "rate_limited": False}
 
+        except LLMBudgetExhausted:
+            raise
         except Exception as e:
+            self._finish_call(OUTCOME_ERROR)
             error_str = str(e)
             # Detectar rate limit
             if "rate_limit" in error_str.lower() or "429" in error_str:
@@ -0,0 +1,117 @@
+"""
+Contabilidad de llamadas LLM.
+Cada llamada de LLMHelper queda registrada con modelo, tokens de prompt y
+respuesta, latencia, caché y resultado, en output/llm_calls.jsonl. Al final
+de la ejecución se agrega por sitio y por método en un reporte JSON.
+"""
+import os
+import json
+import time
+import threading
+from utils.stats import percentile
+from utils.singleton import ProcessSingleton
+
+DEFAULT_LOG_FILE = "output/llm_calls.jsonl"
+DEFAULT_REPORT_FILE = "output/llm_report.json"
+
+# Resultado de una llamada
+OUTCOME_PARSED = "parsed"
+OUTCOME_PARSE_ERROR = "parse_error"
+OUTCOME_RATE_LIMITED = "rate_limited"
+OUTCOME_ERROR = "error"
+OUTCOME_RULES = "rules"      # Resuelto por reglas, sin llamada
+
+# Caché
+CACHE_MISS = "miss"
+CACHE_PROMPT = "prompt"      # OpenAI reutilizó tokens de prompt (cached_tokens > 0)
+CACHE_MEMO = "memo"          # Extracción memoizada localmente, sin llamada
+
+
+class LLMUsageLog:
+    def __init__(self, run_id=None, log_file=DEFAULT_LOG_FILE, live_every=25):
+        self.run_id = run_id or time.strftime("%Y%m%d_%H%M%S")
+        self.log_file = log_file
+        self.live_every = live_every  # Cada cuántas llamadas se imprime el total acumulado
+        self.records = []
+        self.totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(log_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def record(self, site, method, model=None, prompt_tokens=0, completion_tokens=0, cached_tokens=0,
+               cost_usd=0.0, latency=0.0, outcome=OUTCOME_PARSED, cache=CACHE_MISS):
+        entry = {
+            "run_id": self.run_id, "timestamp": round(time.time(), 3), "site": site, "method": method,
+            "model": model, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens, "cost_usd": round(cost_usd, 6), "latency": round(latency, 3),
+            "outcome": outcome, "cache": cache,
+        }
+        with self._lock:
+            self.records.append(entry)
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            if model:
+                self.totals["calls"] += 1
+                self.totals["prompt_tokens"] += prompt_tokens
+                self.totals["completion_tokens"] += completion_tokens
+                self.totals["cost_usd"] += cost_usd
+                if self.live_every and self.totals["calls"] % self.live_every == 0:
+                    print(f"    {self.live_summary()}")
+
+    def live_summary(self):
+        tokens = self.totals["prompt_tokens"] + self.totals["completion_tokens"]
+        return f"🧮 LLM acumulado: {self.totals['calls']} llamadas | {tokens:,} tokens | ${self.totals['cost_usd']:.2f}"
+
+    # === Reporte ===
+    def _rollup(self, entries):
+        calls = [e for e in entries if e["model"]]
+        latencies = [e["latency"] for e in calls]
+        outcomes, cache = {}, {}
+        for e in entries:
+            outcomes[e["outcome"]] = outcomes.get(e["outcome"], 0) + 1
+            cache[e["cache"]] = cache.get(e["cache"], 0) + 1
+        return {
+            "calls": len(calls),
+            "avoided_calls": len(entries) - len(calls),
+            "prompt_tokens": sum(e["prompt_tokens"] for e in calls),
+            "completion_tokens": sum(e["completion_tokens"] for e in calls),
+            "cached_tokens": sum(e["cached_tokens"] for e in calls),
+            "cost_usd": round(sum(e["cost_usd"] for e in calls), 4),
+            "latency_p50": percentile(latencies, 0.5),
+            "latency_p95": percentile(latencies, 0.95),
+            "latency_total": round(sum(latencies), 1),
+            "outcomes": outcomes,
+            "cache": cache,
+        }
+
+    def report(self):
+        with self._lock:
+            entries = list(self.records)
+        by_site, by_method = {}, {}
+        for e in entries:
+            by_site.setdefault(e["site"], {}).setdefault(e["method"], []).append(e)
+            by_method.setdefault(e["method"], []).append(e)
+        return {
+            "run_id": self.run_id,
+            "total": self._rollup(entries),
+            "by_method": {method: self._rollup(items) for method, items in sorted(by_method.items())},
+            "by_site": {
+                site: {
+                    "total": self._rollup([e for items in methods.values() for e in items]),
+                    "by_method": {method: self._rollup(items) for method, items in sorted(methods.items())},
+                }
+                for site, methods in sorted(by_site.items())
+            },
+        }
+
+    def export(self, path=DEFAULT_REPORT_FILE):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+
+_shared = ProcessSingleton(LLMUsageLog)
+configure_usage_log = _shared.configure
+get_usage_log = _shared.get
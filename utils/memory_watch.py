@@ -0,0 +1,135 @@
+"""
+Medición de memoria del navegador para crawls largos.
+Suma el RSS de los procesos hijos (driver de Playwright, Chromium y sus
+renderers) leyendo /proc; si el navegador es de otro proceso (modo CDP) o
+no hay /proc, usa el heap JS de la página vía CDP como aproximación.
+"""
+import os
+
+MB = 1024 * 1024
+
+
+def _read_status(pid):
+    """(ppid, rss_bytes) de un proceso, o None si ya terminó."""
+    ppid, rss = None, 0
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("PPid:"):
+                    ppid = int(line.split()[1])
+                elif line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        return None
+    return ppid, rss
+
+
+def _is_renderer(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"--type=renderer" in f.read()
+    except OSError:
+        return False
+
+
+def browser_tree_rss(root_pid=None):
+    """
+    RSS de todos los descendientes de `root_pid` (por defecto este proceso,
+    sin contarlo). Devuelve {"total", "max_renderer", "processes"} o None
+    si no hay /proc.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    root_pid = root_pid or os.getpid()
+
+    children, rss = {}, {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        status = _read_status(entry)
+        if status is None:
+            continue
+        pid = int(entry)
+        rss[pid] = status[1]
+        children.setdefault(status[0], []).append(pid)
+
+    total, max_renderer, count = 0, 0, 0
+    pending = list(children.get(root_pid, []))
+    while pending:
+        pid = pending.pop()
+        total += rss.get(pid, 0)
+        count += 1
+        if _is_renderer(pid):
+            max_renderer = max(max_renderer, rss.get(pid, 0))
+        pending.extend(children.get(pid, []))
+    return {"total": total, "max_renderer": max_renderer, "processes": count}
+
+
+def page_js_heap(page):
+    """Heap JS usado por la página (bytes) vía CDP; None si no se puede medir."""
+    try:
+        session = page.context.new_cdp_session(page)
+        session.send("Performance.enable")
+        metrics = session.send("Performance.getMetrics")["metrics"]
+        session.detach()
+        return int(next(m["value"] for m in metrics if m["name"] == "JSHeapUsedSize"))
+    except Exception:
+        return None
+
+
+class MemoryWatchdog:
+    def __init__(self, max_pages=200, max_rss_mb=2048, check_every=5):
+        """
+        `max_pages`: páginas por contexto antes de reciclarlo.
+        `max_rss_mb`: RSS del navegador que dispara el relanzamiento completo.
+        `check_every`: cada cuántas páginas se mide la memoria.
+        """
+        self.max_pages = max_pages
+        self.max_rss = max_rss_mb * MB if max_rss_mb else None
+        self.check_every = check_every
+        self.pages = 0          # Páginas desde el último reciclaje
+        self.total_pages = 0
+        self.peak_bytes = 0
+        self.peak_renderer_bytes = 0
+        self.last_bytes = 0
+        self.recycles = {}      # motivo → cantidad
+
+    def sample(self, page=None, remote=False):
+        """Mide la memoria actual y actualiza el pico. `remote`: navegador de otro proceso."""
+        usage = None if remote else browser_tree_rss()
+        if usage and usage["processes"]:
+            current = usage["total"]
+            self.peak_renderer_bytes = max(self.peak_renderer_bytes, usage["max_renderer"])
+        elif page is not None:
+            current = page_js_heap(page) or 0
+        else:
+            current = 0
+        self.last_bytes = current
+        self.peak_bytes = max(self.peak_bytes, current)
+        return current
+
+    def page_done(self, page=None, remote=False):
+        """
+        Registra una página procesada. Devuelve el motivo de reciclaje
+        ("pages" o "memory") o None si todavía no hace falta.
+        """
+        self.pages += 1
+        self.total_pages += 1
+        # Sin pico todavía (sitios de pocas páginas, --test) se mide igual
+        if self.pages % self.check_every == 0 or not self.peak_bytes:
+            current = self.sample(page, remote)
+            if self.max_rss and current > self.max_rss:
+                return "memory"
+        if self.max_pages and self.pages >= self.max_pages:
+            return "pages"
+        return None
+
+    def recycled(self, reason):
+        self.recycles[reason] = self.recycles.get(reason, 0) + 1
+        self.pages = 0
+
+    def summary(self):
+        recycles = ", ".join(f"{reason}={count}" for reason, count in sorted(self.recycles.items())) or "ninguno"
+        return (f"🧠 Memoria navegador: pico {self.peak_bytes / MB:.0f} MB "
+                f"(renderer máx {self.peak_renderer_bytes / MB:.0f} MB) | "
+                f"{self.total_pages} páginas | reciclajes: {recycles}")
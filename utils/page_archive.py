@@ -0,0 +1,103 @@
+"""
+Archivo crudo de páginas por ejecución (estilo WARC).
+Cada registro (página de catálogo, página de curso, respuesta XHR o brochure)
+se guarda como un miembro gzip independiente dentro de
+output/archive/<run_id>/<sitio>.warc.gz, y un índice JSONL guarda su offset,
+así se puede leer cualquier registro sin descomprimir el archivo completo.
+"""
+import os
+import json
+import gzip
+import time
+import threading
+
+DEFAULT_ARCHIVE_DIR = "output/archive"
+
+# Tipos de registro
+RECORD_CATALOG = "catalog"
+RECORD_COURSE = "course"
+RECORD_XHR = "xhr"
+RECORD_BROCHURE = "brochure"
+RECORD_CARRIED = "carried"  # Curso no re-descargado (304): el replay usa la última fila conocida
+
+
+class PageArchive:
+    def __init__(self, run_id, site_key, archive_dir=DEFAULT_ARCHIVE_DIR):
+        self.run_id = run_id
+        self.site_key = site_key
+        self.run_dir = os.path.join(archive_dir, run_id)
+        self.data_file = os.path.join(self.run_dir, f"{site_key}.warc.gz")
+        self.index_file = os.path.join(self.run_dir, f"{site_key}.index.jsonl")
+        self._lock = threading.Lock()
+        self.records = 0
+
+        if not os.path.exists(self.run_dir):
+            os.makedirs(self.run_dir)
+
+    def add(self, kind, url, content, content_type="text/html", course_url=None):
+        """Agrega un registro; `content` puede ser str o bytes."""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        member = gzip.compress(content)
+
+        with self._lock:
+            with open(self.data_file, "ab") as f:
+                offset = f.tell()
+                f.write(member)
+            entry = {
+                "kind": kind, "url": url, "course_url": course_url or url,
+                "content_type": content_type, "offset": offset, "length": len(member),
+                "size": len(content), "timestamp": time.time()
+            }
+            with open(self.index_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.records += 1
+
+    def add_file(self, kind, url, path, content_type="application/pdf", course_url=None):
+        with open(path, "rb") as f:
+            self.add(kind, url, f.read(), content_type, course_url)
+
+
+class ArchiveReader:
+    """Lectura de un archivo de ejecución (sin navegador ni red)."""
+
+    def __init__(self, run_id, archive_dir=DEFAULT_ARCHIVE_DIR):
+        self.run_id = run_id
+        self.run_dir = os.path.join(archive_dir, run_id)
+        if not os.path.isdir(self.run_dir):
+            raise FileNotFoundError(f"No existe el archivo de ejecución: {self.run_dir}")
+
+    def sites(self):
+        return sorted(
+            name[:-len(".index.jsonl")] for name in os.listdir(self.run_dir)
+            if name.endswith(".index.jsonl")
+        )
+
+    def index(self, site_key):
+        entries = []
+        index_file = os.path.join(self.run_dir, f"{site_key}.index.jsonl")
+        if not os.path.exists(index_file):
+            return entries
+        with open(index_file, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entries.append(json.loads(line))
+        return entries
+
+    def read(self, site_key, entry):
+        """Devuelve los bytes descomprimidos de un registro del índice."""
+        data_file = os.path.join(self.run_dir, f"{site_key}.warc.gz")
+        with open(data_file, "rb") as f:
+            f.seek(entry["offset"])
+            return gzip.decompress(f.read(entry["length"]))
+
+    def read_text(self, site_key, entry):
+        return self.read(site_key, entry).decode("utf-8", errors="replace")
+
+    def latest(self, site_key, kind):
+        """Último registro de cada URL para un tipo dado: {url: entry}."""
+        latest = {}
+        for entry in self.index(site_key):
+            if entry["kind"] == kind:
+                latest[entry["course_url"]] = entry
+        return latest
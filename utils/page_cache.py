@@ -0,0 +1,150 @@
+"""
+Caché de páginas de curso para re-scraping condicional.
+Guarda por URL los validadores HTTP (ETag / Last-Modified), una huella del
+contenido principal y la última fila extraída, para saltar el render y el
+LLM cuando la página no cambió.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import requests
+from utils.politeness import get_scheduler
+
+DEFAULT_DB_FILE = "output/course_cache.db"
+
+# Resultado de la comparación
+STATUS_FRESH = "fresh"          # Nunca vista
+STATUS_UNCHANGED = "unchanged"  # Igual que la última vez
+STATUS_CHANGED = "changed"      # Contenido distinto
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+
+def content_fingerprint(text):
+    """Huella del texto visible, insensible a espacios y mayúsculas."""
+    normalized = re.sub(r'\s+', ' ', text or "").strip().lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class CoursePageCache:
+    def __init__(self, site, db_file=DEFAULT_DB_FILE, revalidate_timeout=10, scheduler=None):
+        self.site = site
+        self.scheduler = scheduler or get_scheduler()
+        self.db_file = db_file
+        self.revalidate_timeout = revalidate_timeout
+        self._local = threading.local()
+        self.stats = {STATUS_FRESH: 0, STATUS_UNCHANGED: 0, STATUS_CHANGED: 0}
+
+        directory = os.path.dirname(db_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._conn().execute("""
+            CREATE TABLE IF NOT EXISTS course_pages (
+                site TEXT NOT NULL,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fingerprint TEXT,
+                row_json TEXT,
+                checked_at REAL,
+                changed_at REAL,
+                PRIMARY KEY (site, url)
+            )
+        """)
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, url):
+        row = self._conn().execute(
+            "SELECT etag, last_modified, fingerprint, row_json FROM course_pages WHERE site = ? AND url = ?",
+            (self.site, url)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "etag": row[0], "last_modified": row[1], "fingerprint": row[2],
+            "row": json.loads(row[3]) if row[3] else None
+        }
+
+    def revalidate(self, url):
+        """
+        Petición condicional barata (sin navegador). Devuelve la fila previa si
+        el servidor responde 304 Not Modified; None en cualquier otro caso.
+        """
+        cached = self.get(url)
+        if not cached or not cached["row"] or not (cached["etag"] or cached["last_modified"]):
+            return None
+
+        headers = {}
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            with self.scheduler.slot(url):
+                response = self.session.get(url, headers=headers, timeout=self.revalidate_timeout, stream=True)
+                response.close()
+        except Exception:
+            return None
+
+        if response.status_code == 304:
+            self._touch(url)
+            self.stats[STATUS_UNCHANGED] += 1
+            return cached["row"]
+        return None
+
+    def compare(self, url, fingerprint):
+        """Compara la huella del contenido renderizado con la guardada."""
+        cached = self.get(url)
+        if cached is None or not cached["fingerprint"]:
+            return STATUS_FRESH, None
+        if cached["fingerprint"] == fingerprint and cached["row"]:
+            return STATUS_UNCHANGED, cached["row"]
+        return STATUS_CHANGED, cached["row"]
+
+    def record(self, url, status, fingerprint, row, headers=None):
+        """Guarda validadores, huella y fila tras procesar una página."""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        now = time.time()
+        self.stats[status] += 1
+        self._conn().execute(
+            "INSERT INTO course_pages (site, url, etag, last_modified, fingerprint, row_json, checked_at, changed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(site, url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+            "fingerprint = excluded.fingerprint, row_json = excluded.row_json, checked_at = excluded.checked_at, "
+            "changed_at = CASE WHEN ? = 'unchanged' THEN course_pages.changed_at ELSE excluded.changed_at END",
+            (self.site, url, headers.get("etag"), headers.get("last-modified"), fingerprint,
+             json.dumps(row, ensure_ascii=False), now, now, status)
+        )
+
+    def _touch(self, url):
+        self._conn().execute(
+            "UPDATE course_pages SET checked_at = ? WHERE site = ? AND url = ?",
+            (time.time(), self.site, url)
+        )
+
+    def row_for(self, url):
+        cached = self.get(url)
+        return cached["row"] if cached else None
+
+    def summary(self):
+        return (f"🆕 {self.stats[STATUS_FRESH]} nuevos | 🔁 {self.stats[STATUS_CHANGED]} cambiados | "
+                f"✔️  {self.stats[STATUS_UNCHANGED]} sin cambios")
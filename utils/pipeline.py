@@ -0,0 +1,170 @@
+"""
+Pipeline productor/consumidor con colas acotadas.
+Cada etapa tiene su propia concurrencia (hilos) y una cola de entrada acotada:
+si una etapa se atrasa, su cola se llena y la etapa anterior se bloquea
+(back-pressure) hasta llegar al productor. Expone profundidad de cola y
+utilización por etapa para ver dónde está el cuello de botella.
+"""
+import json
+import time
+import queue
+import threading
+
+_STOP = object()
+
+
+class StageStats:
+    def __init__(self, name, workers, queue_size):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0  # Tiempo esperando lugar en la cola siguiente
+        self.max_depth = 0
+        self._lock = threading.Lock()
+
+    def add(self, busy, blocked=0.0, error=False):
+        with self._lock:
+            self.processed += 1
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+            if error:
+                self.errors += 1
+
+
+class Stage:
+    def __init__(self, name, func, workers=1, queue_size=None):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size or workers * 2)
+        self.stats = StageStats(name, workers, self.queue.maxsize)
+        self.threads = []
+
+
+class Pipeline:
+    def __init__(self, stages, on_error=None, producer_name="fetch"):
+        """
+        `stages`: lista de Stage; la salida de cada func es la entrada de la
+        siguiente. Si func devuelve None el item se descarta. `on_error(item, e)`
+        se llama cuando una etapa lanza una excepción.
+        """
+        self.stages = stages
+        self.on_error = on_error
+        self.producer = StageStats(producer_name, 1, 0)
+        self.started_at = time.time()
+
+        for index, stage in enumerate(stages):
+            next_stage = stages[index + 1] if index + 1 < len(stages) else None
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(stage, next_stage),
+                    name=f"{stage.name}-{n}", daemon=True
+                )
+                thread.start()
+                stage.threads.append(thread)
+
+    def _worker(self, stage, next_stage):
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                stage.queue.task_done()
+                break
+
+            start = time.time()
+            result, error = None, False
+            blocked = 0.0
+            try:
+                try:
+                    result = stage.func(item)
+                except Exception as e:
+                    error = True
+                    self._report_error(stage, item, e)
+                busy = time.time() - start
+
+                if result is not None and next_stage is not None:
+                    put_start = time.time()
+                    next_stage.queue.put(result)  # Bloquea si la siguiente etapa está llena
+                    blocked = time.time() - put_start
+                    depth = next_stage.queue.qsize()
+                    if depth > next_stage.stats.max_depth:
+                        next_stage.stats.max_depth = depth
+
+                stage.stats.add(busy, blocked, error)
+            finally:
+                # Si el hilo muriera sin esto, su cola se llena y close() no vuelve nunca
+                stage.queue.task_done()
+
+    def _report_error(self, stage, item, error):
+        """Llama a on_error sin dejar que una excepción del callback mate al worker."""
+        if not self.on_error:
+            return
+        try:
+            self.on_error(item, error)
+        except Exception as e:
+            print(f"    ⚠️  on_error falló en la etapa {stage.name}: {e}")
+
+    def submit(self, item, produce_seconds=0.0):
+        """Entrega un item a la primera etapa (bloquea si está llena)."""
+        first = self.stages[0]
+        put_start = time.time()
+        first.queue.put(item)
+        blocked = time.time() - put_start
+        depth = first.queue.qsize()
+        if depth > first.stats.max_depth:
+            first.stats.max_depth = depth
+        self.producer.add(produce_seconds, blocked)
+
+    def close(self):
+        """Espera a que se vacíen todas las etapas, en orden, y detiene los hilos."""
+        for stage in self.stages:
+            for _ in range(stage.workers):
+                stage.queue.put(_STOP)
+            for thread in stage.threads:
+                thread.join()
+
+    def metrics(self):
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        result = {"elapsed_seconds": round(elapsed, 1), "stages": []}
+        for stats, depth in [(self.producer, 0)] + [(s.stats, s.queue.qsize()) for s in self.stages]:
+            result["stages"].append({
+                "stage": stats.name,
+                "workers": stats.workers,
+                "processed": stats.processed,
+                "errors": stats.errors,
+                "queue_depth": depth,
+                "queue_max_depth": stats.max_depth,
+                "queue_size": stats.queue_size,
+                "busy_seconds": round(stats.busy_seconds, 1),
+                "blocked_seconds": round(stats.blocked_seconds, 1),
+                "utilization": round(stats.busy_seconds / (elapsed * stats.workers), 3)
+            })
+        return result
+
+    def bottleneck(self):
+        stages = self.metrics()["stages"]
+        return max(stages, key=lambda s: s["utilization"])["stage"] if stages else None
+
+    def export(self, path, key):
+        """Escribe las métricas en un JSON compartido, bajo `key` (el sitio)."""
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except Exception:
+            data = {}
+        data[key] = self.metrics()
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    def summary(self):
+        lines = []
+        for s in self.metrics()["stages"]:
+            lines.append(
+                f"   {s['stage']:<8} x{s['workers']}  procesados={s['processed']:<4} "
+                f"util={s['utilization'] * 100:5.1f}%  cola max={s['queue_max_depth']}/{s['queue_size']}  "
+                f"bloqueado={s['blocked_seconds']}s"
+            )
+        lines.append(f"   🐢 Cuello de botella: {self.bottleneck()}")
+        return "\n".join(lines)
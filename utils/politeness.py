@@ -0,0 +1,240 @@
+"""
+Cortesía por dominio: límite de concurrencia y de tasa (token bucket) por host,
+respetando el Crawl-delay de robots.txt.
+Los límites se agrupan por dominio registrado (infopucp.pucp.edu.pe y
+educacioncontinua.pucp.edu.pe comparten "pucp.edu.pe"), así varios sitios del
+mismo servidor no suman su tasa. Todas las peticiones de un proceso (navegador,
+revalidación y brochures) pasan por el mismo scheduler.
+"""
+import time
+import ipaddress
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+import requests
+from utils.singleton import ProcessSingleton
+
+# Sufijos de segundo nivel: el dominio registrado tiene tres etiquetas
+SECOND_LEVEL_SUFFIXES = {"edu.pe", "com.pe", "org.pe", "gob.pe", "net.pe", "co.uk", "com.ar", "com.mx", "com.co"}
+
+# Límites por defecto de cada dominio
+DEFAULT_RATE = 1.0        # Peticiones por segundo
+DEFAULT_BURST = 3         # Peticiones seguidas permitidas
+DEFAULT_CONCURRENCY = 2   # Peticiones en vuelo a la vez
+
+USER_AGENT = "Mozilla/5.0 (compatible; CourseScraper/1.0)"
+
+
+def domain_key(url):
+    """Dominio registrado de una URL (ej. https://infopucp.pucp.edu.pe/x → pucp.edu.pe)."""
+    host = (urlsplit(url).hostname or "").lower()
+    try:
+        ipaddress.ip_address(host)
+        return host  # Una IP no tiene dominio registrado (127.0.0.1 no es "0.1")
+    except ValueError:
+        pass
+    labels = host.split(".")
+    if len(labels) >= 3 and ".".join(labels[-2:]) in SECOND_LEVEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def interleave_by_host(items, key=lambda item: item):
+    """Reordena en round-robin por dominio para no encadenar trabajo del mismo host."""
+    groups = {}
+    for item in items:
+        groups.setdefault(domain_key(key(item)), []).append(item)
+    result = []
+    queues = list(groups.values())
+    while queues:
+        for queue in list(queues):
+            result.append(queue.pop(0))
+            if not queue:
+                queues.remove(queue)
+    return result
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Toma un token, esperando lo necesario. Devuelve los segundos esperados."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def reconfigure(self, rate, burst):
+        """Cambia tasa y ráfaga sin perder los tokens acumulados (ni a quien está esperando)."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.rate = rate
+            self.capacity = max(1, burst)
+            self.tokens = min(self.tokens, self.capacity)
+
+
+class ConcurrencyLimit:
+    """Semáforo redimensionable: cambiar el tope no afecta a quien ya tiene un lugar."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_use >= self.limit:
+                self._cond.wait()
+            self.in_use += 1
+
+    def release(self):
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify()
+
+    def resize(self, limit):
+        with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+
+class HostPolicy:
+    def __init__(self, key, rate=DEFAULT_RATE, burst=DEFAULT_BURST, concurrency=DEFAULT_CONCURRENCY):
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.crawl_delay = None
+        self.configured = set()  # Límites fijados explícitamente por algún sitio
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = ConcurrencyLimit(concurrency)
+        self.requests = 0
+        self.waited = 0.0
+
+    def configure(self, rate=None, burst=None, concurrency=None):
+        """
+        Ajusta los límites en el lugar (contadores, bucket y lugares en uso se conservan).
+        Solo los valores dados cuentan; si otro sitio ya fijó uno, queda el más estricto.
+        """
+        for name, value in (("rate", rate), ("burst", burst), ("concurrency", concurrency)):
+            if value is None:
+                continue
+            if name in self.configured:
+                value = min(value, getattr(self, name))
+            self.configured.add(name)
+            setattr(self, name, value)
+        self._apply()
+
+    def apply_crawl_delay(self, delay):
+        """Crawl-delay de robots.txt: la tasa nunca supera 1 petición cada `delay` segundos."""
+        if delay and (self.crawl_delay is None or delay > self.crawl_delay):
+            self.crawl_delay = delay
+            self._apply()
+
+    def _apply(self):
+        burst = self.burst
+        if self.crawl_delay:
+            self.rate = min(self.rate, 1.0 / self.crawl_delay)
+            burst = 1
+        self.bucket.reconfigure(self.rate, burst)
+        self.slots.resize(self.concurrency)
+
+
+class PolitenessScheduler:
+    def __init__(self, respect_robots=True, robots_timeout=10):
+        self.respect_robots = respect_robots
+        self.robots_timeout = robots_timeout
+        self.policies = {}
+        self._robots_checked = set()
+        self._lock = threading.Lock()
+
+    def configure(self, url, rate=None, burst=None, concurrency=None):
+        """
+        Fija los límites del dominio de `url` (claves de SCRAPERS_CONFIG).
+        Si dos sitios comparten dominio se queda el límite más estricto de los
+        que se configuraron; un sitio sin claves host_* no cambia nada.
+        """
+        key = domain_key(url)
+        with self._lock:
+            policy = self.policies.get(key)
+            if policy is None:
+                policy = self.policies[key] = HostPolicy(key)
+            policy.configure(rate, burst, concurrency)
+            return policy
+
+    def policy_for(self, url):
+        key = domain_key(url)
+        with self._lock:
+            if key not in self.policies:
+                self.policies[key] = HostPolicy(key)
+            policy = self.policies[key]
+        self._check_robots(url, policy)
+        return policy
+
+    def _check_robots(self, url, policy):
+        """Lee robots.txt una vez por host y aplica su Crawl-delay."""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            if not self.respect_robots or host in self._robots_checked:
+                return
+            self._robots_checked.add(host)
+        try:
+            response = requests.get(f"{host}/robots.txt", timeout=self.robots_timeout,
+                                    headers={"User-Agent": USER_AGENT})
+            if response.status_code != 200:
+                return
+            parser = RobotFileParser()
+            parser.parse(response.text.splitlines())
+            delay = parser.crawl_delay(USER_AGENT) or parser.crawl_delay("*")
+        except Exception:
+            return
+        if delay:
+            with self._lock:
+                policy.apply_crawl_delay(float(delay))
+            print(f"   🤖 robots.txt de {parts.netloc}: Crawl-delay {delay}s")
+
+    @contextmanager
+    def slot(self, url):
+        """Reserva un lugar en el dominio de `url` (concurrencia + tasa) mientras dura el bloque."""
+        policy = self.policy_for(url)
+        start = time.monotonic()
+        policy.slots.acquire()
+        try:
+            policy.bucket.acquire()
+            policy.requests += 1
+            policy.waited += time.monotonic() - start
+            yield policy
+        finally:
+            policy.slots.release()
+
+    def summary(self):
+        lines = []
+        for key, policy in sorted(self.policies.items()):
+            if not policy.requests:
+                continue
+            delay = f", crawl-delay {policy.crawl_delay}s" if policy.crawl_delay else ""
+            lines.append(f"   🚦 {key:<28} {policy.requests:>5} peticiones | espera {policy.waited:6.1f}s | "
+                         f"{policy.rate:.2f} req/s x{policy.concurrency}{delay}")
+        return "\n".join(lines)
+
+
+# Scheduler único del proceso: todos los sitios comparten los límites por dominio
+_shared = ProcessSingleton(PolitenessScheduler)
+get_scheduler = _shared.get
@@ -0,0 +1,190 @@
+"""
+Perfilado de la ejecución (--profile en run_all_scrapers).
+Cada sitio corre bajo un perfilador y deja en output/profiles/<run_id>/:
+  <sitio>.pstats     → `python -m pstats` / snakeviz
+  <sitio>.collapsed  → stacks colapsados (flamegraph.pl, speedscope, inferno)
+Modo "sample" (por defecto): un hilo muestrea las pilas de TODOS los hilos
+cada `interval` segundos (sys._current_frames), con poco overhead; el pstats se
+arma a partir de las muestras. Modo "cprofile": perfilado determinista de cada
+hilo (el principal y los workers del pipeline) más el muestreo para los stacks.
+Así se ven sin tocar código la limpieza con regex, pdfplumber, pandas y el
+tiempo que se va en la IPC de Playwright.
+"""
+import os
+import sys
+import pstats
+import marshal
+import cProfile
+import threading
+from contextlib import contextmanager
+
+MODE_SAMPLE = "sample"
+MODE_CPROFILE = "cprofile"
+MODES = (MODE_SAMPLE, MODE_CPROFILE)
+
+DEFAULT_PROFILE_DIR = "output/profiles"
+DEFAULT_INTERVAL = 0.005  # 5 ms entre muestras
+TOP_FUNCTIONS = 10
+
+
+def _frame_key(code):
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def _frame_label(key):
+    filename, lineno, name = key
+    # ';' separa frames en el formato colapsado
+    return f"{name} ({os.path.basename(filename)}:{lineno})".replace(";", ",")
+
+
+def _thread_label(name):
+    """Agrupa hilos equivalentes (extract-0, extract-1 → extract)."""
+    base, _, suffix = name.rpartition("-")
+    return base if base and suffix.isdigit() else name
+
+
+class StackSampler:
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks = {}   # (hilo, frames raíz→hoja) → muestras
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(_frame_key(frame.f_code))
+                    frame = frame.f_back
+                key = (_thread_label(names.get(thread_id, "thread")), tuple(reversed(frames)))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def write_collapsed(self, path):
+        with open(path, "w") as f:
+            for (thread, frames), count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+                f.write(";".join([thread] + [_frame_label(key) for key in frames]) + f" {count}\n")
+
+    def pstats_dict(self):
+        """
+        Estadísticas en el formato de pstats a partir de las muestras: tiempo
+        propio = muestras en la hoja, acumulado = muestras con la función en la pila.
+        """
+        stats = {}
+        for (_, frames), count in self.stacks.items():
+            seconds = count * self.interval
+            seen = set()
+            for depth, key in enumerate(frames):
+                cc, nc, tt, ct, callers = stats.get(key, (0, 0, 0.0, 0.0, {}))
+                leaf = depth == len(frames) - 1
+                if leaf:
+                    tt += seconds
+                if key not in seen:
+                    # Recursión: el acumulado se cuenta una sola vez por muestra
+                    seen.add(key)
+                    cc += count
+                    nc += count
+                    ct += seconds
+                if depth:
+                    caller = frames[depth - 1]
+                    c_cc, c_nc, c_tt, c_ct = callers.get(caller, (0, 0, 0.0, 0.0))
+                    callers[caller] = (c_cc + count, c_nc + count,
+                                       c_tt + (seconds if leaf else 0.0), c_ct + seconds)
+                stats[key] = (cc, nc, tt, ct, callers)
+        return stats
+
+
+class ThreadProfiles:
+    """cProfile en el hilo actual y en cada hilo que arranque mientras está activo."""
+
+    def __init__(self):
+        self.main = cProfile.Profile()
+        self.threads = []
+        self._lock = threading.Lock()
+
+    def _bootstrap(self, frame, event, arg):
+        # Primer evento del hilo nuevo: se reemplaza este hook por un cProfile propio
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock:
+            self.threads.append(profile)
+        profile.enable()
+
+    def start(self):
+        threading.setprofile(self._bootstrap)
+        self.main.enable()
+
+    def stop(self):
+        self.main.disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(self.main)
+        with self._lock:
+            for profile in self.threads:
+                stats.add(profile)
+        return stats
+
+
+class Profiler:
+    def __init__(self, run_id, mode=MODE_SAMPLE, profile_dir=DEFAULT_PROFILE_DIR, interval=DEFAULT_INTERVAL):
+        if mode not in MODES:
+            raise ValueError(f"modo de perfilado desconocido: {mode} (usa {' / '.join(MODES)})")
+        self.mode = mode
+        self.interval = interval
+        self.out_dir = os.path.join(profile_dir, run_id)
+        self.artifacts = {}  # sitio → (pstats, collapsed)
+        if not os.path.exists(self.out_dir):
+            os.makedirs(self.out_dir)
+
+    @contextmanager
+    def site(self, name):
+        """Perfila el bloque y escribe los artefactos de `name` al salir (aunque falle)."""
+        sampler = StackSampler(self.interval)
+        profiles = ThreadProfiles() if self.mode == MODE_CPROFILE else None
+        sampler.start()
+        if profiles:
+            profiles.start()
+        try:
+            yield
+        finally:
+            stats = profiles.stop() if profiles else None
+            sampler.stop()
+            self._write(name, sampler, stats)
+
+    def _write(self, name, sampler, stats):
+        base = os.path.join(self.out_dir, name)
+        pstats_path, collapsed_path = base + ".pstats", base + ".collapsed"
+        sampler.write_collapsed(collapsed_path)
+        if stats is not None:
+            stats.dump_stats(pstats_path)
+        else:
+            with open(pstats_path, "wb") as f:
+                marshal.dump(sampler.pstats_dict(), f)
+        self.artifacts[name] = (pstats_path, collapsed_path)
+        print(f"   🔬 Perfil de {name} ({self.mode}, {sampler.samples} muestras): {pstats_path} | {collapsed_path}")
+        print(self.hot_spots(pstats_path))
+
+    def hot_spots(self, pstats_path, limit=TOP_FUNCTIONS):
+        """Las funciones con más tiempo propio del perfil."""
+        stats = pstats.Stats(pstats_path).stats
+        ranked = sorted(stats.items(), key=lambda item: -item[1][2])[:limit]
+        lines = []
+        for key, (cc, nc, tt, ct, callers) in ranked:
+            if tt < 0.01:
+                break
+            lines.append(f"      🔥 {tt:8.2f}s propio {ct:8.2f}s acumulado  {_frame_label(key)}")
+        return "\n".join(lines)
@@ -0,0 +1,127 @@
+"""
+Historial de rendimiento entre ejecuciones.
+Cada ejecución de run_all_scrapers agrega un registro compacto por sitio en
+output/run_history.jsonl (duración, páginas, cursos, llamadas LLM, tokens,
+errores, timeouts y filas). Las corridas --test y las reanudadas (--resume,
+parciales) se marcan con `mode` y no entran en la comparación. `compare` contrasta una ejecución con la mediana
+de las últimas N del mismo sitio y marca las regresiones que pasan los umbrales:
+    python -m utils.run_history                  # Última ejecución vs. las 5 anteriores
+    python -m utils.run_history --run 20260118_150258 --last 10
+"""
+import os
+import sys
+import json
+import argparse
+import threading
+from statistics import median
+
+DEFAULT_HISTORY_FILE = "output/run_history.jsonl"
+DEFAULT_LAST_RUNS = 5
+
+# Tipo de ejecución: solo las completas son comparables entre sí
+MODE_FULL = "full"
+MODE_TEST = "test"          # --test: 2 cursos por sitio
+MODE_RESUMED = "resumed"    # --resume: solo lo que quedó pendiente
+
+# Métrica → (subir es peor, cambio relativo tolerado, cambio absoluto mínimo para marcar)
+THRESHOLDS = {
+    "duration_seconds": (True, 0.5, 60),
+    "pages": (False, 0.25, 3),
+    "courses": (False, 0.25, 3),
+    "rows": (False, 0.25, 3),
+    "llm_calls": (True, 0.5, 10),
+    "tokens": (True, 0.5, 5000),
+    "errors": (True, 1.0, 3),
+    "timeouts": (True, 1.0, 3),
+}
+
+LABELS = {
+    "duration_seconds": "tiempo", "pages": "páginas", "courses": "cursos", "rows": "filas",
+    "llm_calls": "llamadas LLM", "tokens": "tokens", "errors": "errores", "timeouts": "timeouts",
+}
+
+
+class RunHistory:
+    def __init__(self, history_file=DEFAULT_HISTORY_FILE):
+        self.history_file = history_file
+        self._lock = threading.Lock()
+        directory = os.path.dirname(history_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def record(self, run_id, site, mode=MODE_FULL, **metrics):
+        entry = {"run_id": run_id, "site": site, "mode": mode}
+        entry.update(metrics)
+        with self._lock:
+            with open(self.history_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def entries(self):
+        if not os.path.exists(self.history_file):
+            return []
+        with open(self.history_file, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def run_ids(self):
+        """Ejecuciones en orden cronológico (el run_id es un timestamp)."""
+        return sorted({entry["run_id"] for entry in self.entries()})
+
+    def compare(self, run_id=None, last=DEFAULT_LAST_RUNS, thresholds=THRESHOLDS):
+        """
+        Regresiones de `run_id` (default: la última) contra la mediana de las
+        `last` ejecuciones completas anteriores de cada sitio. Devuelve
+        [(sitio, métrica, referencia, actual, cambio relativo)].
+        """
+        # Registros sin `mode` son anteriores a la marca: se asumen completos
+        entries = [e for e in self.entries() if e.get("mode", MODE_FULL) == MODE_FULL]
+        run_id = run_id or (self.run_ids() or [None])[-1]
+        current = {entry["site"]: entry for entry in entries if entry["run_id"] == run_id}
+        regressions = []
+        for site, entry in sorted(current.items()):
+            previous = [e for e in entries if e["site"] == site and e["run_id"] < run_id][-last:]
+            if not previous:
+                continue
+            for metric, (up_is_worse, max_change, min_delta) in thresholds.items():
+                values = [e[metric] for e in previous if e.get(metric) is not None]
+                if entry.get(metric) is None or not values:
+                    continue
+                reference, value = median(values), entry[metric]
+                delta = value - reference
+                if abs(delta) < min_delta:
+                    continue
+                change = delta / reference if reference else float("inf")
+                if (change > max_change) if up_is_worse else (change < -max_change):
+                    regressions.append((site, metric, reference, value, change))
+        return regressions
+
+
+def format_regressions(regressions):
+    """Ej. "Platzi: tiempo +80%, cursos −40%" (una línea por sitio)."""
+    by_site = {}
+    for site, metric, reference, value, change in regressions:
+        text = f"{LABELS.get(metric, metric)} {change * 100:+.0f}%" if change != float("inf") else \
+            f"{LABELS.get(metric, metric)} {reference:g} → {value:g}"
+        by_site.setdefault(site, []).append(text.replace("-", "−"))
+    return "\n".join(f"   📉 {site}: {', '.join(items)}" for site, items in sorted(by_site.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Comparar el rendimiento de una ejecución con las anteriores')
+    parser.add_argument('--run', default=None, help='run_id a evaluar (default: la última ejecución)')
+    parser.add_argument('--last', type=int, default=DEFAULT_LAST_RUNS, help='Ejecuciones anteriores de referencia (default 5)')
+    parser.add_argument('--history', default=DEFAULT_HISTORY_FILE, help='Archivo de historial')
+    args = parser.parse_args()
+
+    history = RunHistory(args.history)
+    run_ids = history.run_ids()
+    if not run_ids:
+        print(f"❌ Sin historial en {args.history}")
+        sys.exit(1)
+    run_id = args.run or run_ids[-1]
+    regressions = history.compare(run_id, last=args.last)
+    print(f"📊 Ejecución {run_id} vs. mediana de las {args.last} anteriores por sitio:")
+    if regressions:
+        print(format_regressions(regressions))
+        sys.exit(1)
+    print("   ✅ Sin regresiones")
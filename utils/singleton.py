@@ -0,0 +1,31 @@
+"""
+Instancia única por proceso (gobernador LLM, scheduler de cortesía, spans, ...).
+`configure(**options)` la reemplaza para una ejecución (run_all_scrapers /
+benchmark); `get()` la crea con los valores por defecto si nadie la configuró.
+"""
+import threading
+
+
+class ProcessSingleton:
+    def __init__(self, factory, on_create=None):
+        self.factory = factory
+        self.on_create = on_create  # Ej. atexit.register(instancia.close)
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def _create(self, options):
+        self._instance = self.factory(**options)
+        if self.on_create:
+            self.on_create(self._instance)
+        return self._instance
+
+    def configure(self, **options):
+        with self._lock:
+            return self._create(options)
+
+    def get(self, **options):
+        """`options` solo se usan si todavía no hay instancia."""
+        with self._lock:
+            if self._instance is None:
+                return self._create(options)
+            return self._instance
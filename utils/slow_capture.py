@@ -0,0 +1,269 @@
+"""
+Captura de páginas lentas: traza de Playwright + HAR de las cargas atípicas.
+El registro de red (request/response/requestfailed con sus tiempos) es barato y
+se toma para todas las páginas; la traza de Playwright es cara y se graba en
+chunks solo para una muestra (`sample_rate`). Si la carga supera el percentil
+del sitio (p95 por defecto, con un piso en segundos) o falla, se guarda en
+output/slow_pages/<sitio>/ el HAR (con las peticiones que quedaron colgadas) y,
+si esa página estaba en la muestra, el trace.zip (`playwright show-trace`).
+"""
+import os
+import json
+import time
+import random
+import hashlib
+from collections import deque
+from datetime import datetime, timezone
+from utils.stats import percentile
+
+DEFAULT_CAPTURE_DIR = "output/slow_pages"
+INDEX_FILE = "index.jsonl"
+SLOWEST_IN_INDEX = 5
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class SlowPageCapture:
+    def __init__(self, site_key, capture_dir=DEFAULT_CAPTURE_DIR, percentile=0.95, floor_seconds=20,
+                 min_samples=10, window=200, sample_rate=0.25, max_captures=10, max_total_mb=500,
+                 snapshots=True, seed=None):
+        """
+        `percentile` / `floor_seconds`: una carga es atípica si supera ambos (con menos de
+        `min_samples` cargas solo cuenta el piso). Los fallos siempre se capturan.
+        `sample_rate`: fracción de páginas con traza de Playwright.
+        `max_captures`: capturas por sitio y ejecución; `max_total_mb`: tope del directorio
+        (se borran las capturas más viejas de cualquier sitio).
+        """
+        self.site_key = site_key
+        self.capture_dir = capture_dir
+        self.site_dir = os.path.join(capture_dir, site_key)
+        self.percentile = percentile
+        self.floor_seconds = floor_seconds
+        self.min_samples = min_samples
+        self.loads = deque(maxlen=window)
+        self.sample_rate = sample_rate
+        self.max_captures = max_captures
+        self.max_bytes = max_total_mb * 1024 * 1024 if max_total_mb else None
+        self.snapshots = snapshots
+        self._random = random.Random(seed)
+        self.captures = 0
+        self.traced = 0
+        self._traced_context = None
+        self._tracing = False     # Chunk de traza abierto para la página actual
+        self._requests = []       # Registro de red de la página actual
+        self._recording = False
+
+        if not os.path.exists(self.site_dir):
+            os.makedirs(self.site_dir)
+
+    # === Enganche a la página ===
+    def attach(self, page):
+        """Listeners de red y traza del contexto (se llama con cada página nueva)."""
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_finished)
+        page.on("requestfailed", self._on_failed)
+        if self.sample_rate and page.context is not self._traced_context:
+            try:
+                page.context.tracing.start(screenshots=self.snapshots, snapshots=self.snapshots)
+                self._traced_context = page.context
+            except Exception as e:
+                print(f"    ⚠️  Traza de Playwright no disponible: {e}")
+
+    def _on_request(self, request):
+        if self._recording:
+            self._requests.append({"request": request, "started": time.time(), "finished": None,
+                                   "failure": None})
+
+    def _entry_for(self, request):
+        for entry in reversed(self._requests):
+            if entry["request"] is request:
+                return entry
+        return None
+
+    def _on_finished(self, request):
+        entry = self._entry_for(request) if self._recording else None
+        if entry:
+            entry["finished"] = time.time()
+
+    def _on_failed(self, request):
+        entry = self._entry_for(request) if self._recording else None
+        if entry:
+            entry["finished"] = time.time()
+            entry["failure"] = request.failure
+
+    # === Ciclo por página ===
+    def threshold(self):
+        p = percentile(self.loads, self.percentile) if len(self.loads) >= self.min_samples else None
+        return max(self.floor_seconds, p or 0)
+
+    def begin(self, page):
+        """Antes de navegar: limpia el registro de red y abre un chunk de traza si toca en la muestra."""
+        self._requests = []
+        self._recording = True
+        self._tracing = False
+        if self._traced_context is page.context and self._random.random() < self.sample_rate:
+            try:
+                page.context.tracing.start_chunk()
+                self._tracing = True
+                self.traced += 1
+            except Exception:
+                pass
+
+    def end(self, page, url, seconds, error=None):
+        """Después de la carga: guarda la captura si fue atípica o falló. Devuelve el índice o None."""
+        self._recording = False
+        threshold = self.threshold()
+        slow = error is not None or seconds > threshold
+        if error is None:
+            self.loads.append(seconds)
+        keep = slow and self.captures < self.max_captures
+
+        base = None
+        if keep:
+            stamp = time.strftime("%Y%m%d_%H%M%S")
+            base = os.path.join(self.site_dir, f"{stamp}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]}")
+        trace_path = None
+        if self._tracing:
+            try:
+                if keep:
+                    trace_path = base + ".trace.zip"
+                    page.context.tracing.stop_chunk(path=trace_path)
+                else:
+                    page.context.tracing.stop_chunk()  # Sin path: el chunk se descarta
+            except Exception:
+                trace_path = None
+            self._tracing = False
+        if not keep:
+            self._requests = []
+            return None
+
+        har_path = base + ".har"
+        har = self._har(url, seconds)
+        with open(har_path, "w", encoding="utf-8") as f:
+            json.dump(har, f, indent=1, ensure_ascii=False)
+        self.captures += 1
+
+        slowest = sorted(har["log"]["entries"], key=lambda e: -e["time"])[:SLOWEST_IN_INDEX]
+        record = {
+            "site": self.site_key, "url": url, "seconds": round(seconds, 2), "threshold": round(threshold, 2),
+            "error": str(error)[:300] if error else None, "har": har_path, "trace": trace_path,
+            "pending_requests": [e["request"]["url"] for e in har["log"]["entries"] if e["_pending"]],
+            "slowest": [{"url": e["request"]["url"], "ms": round(e["time"]), "type": e["_resourceType"]}
+                        for e in slowest],
+            "timestamp": time.time(),
+        }
+        with open(os.path.join(self.capture_dir, INDEX_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        reason = f"falló ({type(error).__name__})" if error else f"{seconds:.1f}s > {threshold:.1f}s"
+        print(f"    🐢 Página atípica capturada: {reason} → {har_path}" + (f" + {trace_path}" if trace_path else ""))
+        self._enforce_storage()
+        self._requests = []
+        return record
+
+    def _har(self, url, seconds):
+        """HAR 1.2 del registro de red; `_pending` marca lo que nunca terminó (típico de networkidle)."""
+        now = time.time()
+        entries = []
+        for item in self._requests:
+            request = item["request"]
+            finished = item["finished"]
+            try:
+                response = request.response() if finished and not item["failure"] else None
+            except Exception:
+                response = None
+            try:
+                timing = request.timing or {}
+            except Exception:
+                timing = {}
+            elapsed = ((finished or now) - item["started"]) * 1000
+            entries.append({
+                "startedDateTime": _iso(item["started"]),
+                "time": elapsed,
+                "request": {"method": request.method, "url": request.url, "httpVersion": "",
+                            "headers": [], "queryString": [], "cookies": [], "headersSize": -1, "bodySize": -1},
+                "response": {"status": response.status if response else 0,
+                             "statusText": (response.status_text if response else item["failure"] or "pending") or "",
+                             "httpVersion": "", "headers": [], "cookies": [],
+                             "content": {"size": -1, "mimeType": response.headers.get("content-type", "") if response else ""},
+                             "redirectURL": "", "headersSize": -1, "bodySize": -1},
+                "cache": {},
+                "timings": self._timings(timing, elapsed),
+                "_resourceType": request.resource_type,
+                "_pending": finished is None,
+                "_failure": item["failure"],
+            })
+        return {"log": {
+            "version": "1.2",
+            "creator": {"name": "slow_capture", "version": "1.0"},
+            "pages": [{"startedDateTime": _iso(self._requests[0]["started"] if self._requests else now),
+                       "id": "page_1", "title": url, "pageTimings": {"onLoad": seconds * 1000}}],
+            "entries": entries,
+        }}
+
+    @staticmethod
+    def _timings(timing, elapsed):
+        """Timings HAR a partir de request.timing de Playwright (ms relativos a startTime, -1 = no aplica)."""
+        def span(start, end):
+            a, b = timing.get(start, -1), timing.get(end, -1)
+            return b - a if a is not None and b is not None and a >= 0 and b >= 0 else -1
+
+        wait = span("requestStart", "responseStart")
+        receive = span("responseStart", "responseEnd")
+        return {
+            "blocked": -1,
+            "dns": span("domainLookupStart", "domainLookupEnd"),
+            "connect": span("connectStart", "connectEnd"),
+            "ssl": span("secureConnectionStart", "connectEnd"),
+            "send": 0,
+            "wait": wait if wait >= 0 else elapsed,
+            "receive": receive if receive >= 0 else 0,
+        }
+
+    def _enforce_storage(self):
+        """Borra las capturas más viejas (de cualquier sitio) si el directorio pasa el tope."""
+        if not self.max_bytes:
+            return
+        files = []
+        for root, _, names in os.walk(self.capture_dir):
+            for name in names:
+                if name.endswith((".har", ".trace.zip")):
+                    path = os.path.join(root, name)
+                    files.append((os.path.getmtime(path), os.path.getsize(path), path))
+        total = sum(size for _, size, _ in files)
+        removed = set()
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            removed.add(path)
+            total -= size
+        if removed:
+            self._prune_index(removed)
+
+    def _prune_index(self, removed):
+        """Reescribe index.jsonl sin las capturas borradas (una traza sin HAR queda sin "trace")."""
+        index_path = os.path.join(self.capture_dir, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        kept = []
+        with open(index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("har") in removed:
+                    continue
+                if record.get("trace") in removed:
+                    record["trace"] = None
+                kept.append(record)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in kept:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, index_path)
+
+    def summary(self):
+        return (f"🐢 Páginas atípicas: {self.captures} capturadas | umbral {self.threshold():.1f}s | "
+                f"{self.traced} cargas con traza")
@@ -0,0 +1,122 @@
+"""
+Spans de tiempo por fase del scraping.
+Cada fase (goto, networkidle, scroll, descubrimiento, brochure, pdfplumber,
+LLM...) se mide con `span(sitio, fase)` y queda como evento en
+output/events.jsonl. Al final se exporta un archivo en formato de texto de
+Prometheus (output/metrics.prom) y un resumen con p50/p95 por sitio y fase.
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from utils.stats import percentile
+from utils.singleton import ProcessSingleton
+
+DEFAULT_EVENT_FILE = "output/events.jsonl"
+DEFAULT_PROM_FILE = "output/metrics.prom"
+
+OUTCOME_OK = "ok"
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+class SpanRecorder:
+    def __init__(self, run_id=None, event_file=DEFAULT_EVENT_FILE, prom_file=DEFAULT_PROM_FILE):
+        self.run_id = run_id or time.strftime("%Y%m%d_%H%M%S")
+        self.event_file = event_file
+        self.prom_file = prom_file
+        self.durations = {}  # (sitio, fase) → [segundos]
+        self.errors = {}     # (sitio, fase) → cantidad
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(event_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    @contextmanager
+    def span(self, site, phase, **attrs):
+        """Mide el bloque; si lanza una excepción se registra su tipo como resultado."""
+        start = time.time()
+        outcome = OUTCOME_OK
+        try:
+            yield
+        except BaseException as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            self.record(site, phase, time.time() - start, outcome, start=start, **attrs)
+
+    def record(self, site, phase, seconds, outcome=OUTCOME_OK, start=None, **attrs):
+        event = {
+            "run_id": self.run_id, "site": site, "phase": phase,
+            "start": round(start or time.time() - seconds, 3), "seconds": round(seconds, 4),
+            "outcome": outcome, "thread": threading.current_thread().name,
+        }
+        event.update(attrs)
+        key = (site, phase)
+        with self._lock:
+            self.durations.setdefault(key, []).append(seconds)
+            if outcome != OUTCOME_OK:
+                self.errors[key] = self.errors.get(key, 0) + 1
+            with open(self.event_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    # === Exportación ===
+    def stats(self):
+        with self._lock:
+            items = {key: list(values) for key, values in self.durations.items()}
+            errors = dict(self.errors)
+        return {
+            key: {
+                "count": len(values), "total": sum(values),
+                "p50": percentile(values, 0.5), "p95": percentile(values, 0.95),
+                "errors": errors.get(key, 0),
+            }
+            for key, values in items.items()
+        }
+
+    def export_prometheus(self, path=None):
+        """Escribe las métricas en formato de texto de Prometheus (node_exporter textfile)."""
+        path = path or self.prom_file
+        lines = [
+            "# HELP scraper_phase_seconds Duración de cada fase del scraping por sitio.",
+            "# TYPE scraper_phase_seconds summary",
+        ]
+        stats = self.stats()
+        for (site, phase), s in sorted(stats.items()):
+            labels = f'site="{_label(site)}",phase="{_label(phase)}"'
+            lines.append(f'scraper_phase_seconds{{{labels},quantile="0.5"}} {s["p50"]:.4f}')
+            lines.append(f'scraper_phase_seconds{{{labels},quantile="0.95"}} {s["p95"]:.4f}')
+            lines.append(f'scraper_phase_seconds_sum{{{labels}}} {s["total"]:.4f}')
+            lines.append(f'scraper_phase_seconds_count{{{labels}}} {s["count"]}')
+        lines.append("# HELP scraper_phase_errors_total Fases que terminaron con excepción.")
+        lines.append("# TYPE scraper_phase_errors_total counter")
+        for (site, phase), s in sorted(stats.items()):
+            lines.append(f'scraper_phase_errors_total{{site="{_label(site)}",phase="{_label(phase)}"}} {s["errors"]}')
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)  # Atómico: el scraper de Prometheus nunca lee un archivo a medias
+        return path
+
+    def summary(self):
+        lines = [f"   {'sitio':<22} {'fase':<30} {'n':>5} {'p50':>8} {'p95':>8} {'total':>9}"]
+        for (site, phase), s in sorted(self.stats().items(), key=lambda kv: (kv[0][0], -kv[1]["total"])):
+            errors = f"  ❌{s['errors']}" if s["errors"] else ""
+            lines.append(f"   {site[:22]:<22} {phase[:30]:<30} {s['count']:>5} {s['p50']:>7.2f}s "
+                         f"{s['p95']:>7.2f}s {s['total']:>8.1f}s{errors}")
+        return "\n".join(lines)
+
+
+_shared = ProcessSingleton(SpanRecorder)
+configure_spans = _shared.configure
+get_span_recorder = _shared.get
+
+
+def span(site, phase, **attrs):
+    """Atajo: span en el registro del proceso."""
+    return get_span_recorder().span(site, phase, **attrs)
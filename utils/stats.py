@@ -0,0 +1,14 @@
+"""
+Estadísticas simples compartidas por los registros de métricas
+(timeouts adaptativos, spans, uso del LLM, capturas lentas, evaluación).
+"""
+import math
+
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano; None sin muestras."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
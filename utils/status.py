@@ -0,0 +1,251 @@
+"""
+Estado en vivo de la ejecución.
+Un hilo reescribe output/status.json cada pocos segundos (y opcionalmente lo
+sirve por HTTP local) con, por sitio activo: fase, tamaño de la frontera,
+cursos hechos y pendientes, ritmo actual, ETA, gasto LLM y errores recientes.
+Para cortar un sitio antes de tiempo:
+    curl -X POST "http://localhost:8765/stop?site=platzi"
+o crear el archivo output/stop_<sitio> (los cursos que faltan conservan su fila anterior).
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from utils.singleton import ProcessSingleton
+
+DEFAULT_STATUS_FILE = "output/status.json"
+STOP_FILE_PATTERN = "output/stop_{site}"
+RATE_WINDOW = 300     # Segundos de la ventana para el ritmo actual
+RECENT_ERRORS = 10
+
+PHASE_STARTING = "starting"
+PHASE_DISCOVERY = "discovery"
+PHASE_EXTRACTION = "extraction"
+PHASE_DONE = "done"
+
+STOP_REASON = "cortado por el operador"
+
+
+class SiteStatus:
+    def __init__(self, site, name, probe=None):
+        self.site = site
+        self.name = name
+        self.probe = probe  # Callable → {"frontier": {...}, "llm_usd": ...} del scraper
+        self.phase = PHASE_STARTING
+        self.started_at = time.time()
+        self.extraction_started_at = None  # El ritmo se mide desde aquí: el descubrimiento no produce cursos
+        self.finished_at = None
+        self.courses_done = 0
+        self.completions = deque()  # Timestamps de cursos hechos dentro de la ventana
+        self.errors = deque(maxlen=RECENT_ERRORS)
+        self.error_count = 0
+        self.outcome = None
+        self.stop_requested = False
+
+    def rate(self, now):
+        """Cursos por minuto en la ventana reciente de la extracción."""
+        while self.completions and self.completions[0] < now - RATE_WINDOW:
+            self.completions.popleft()
+        if self.extraction_started_at is None:
+            return 0.0
+        window = min(RATE_WINDOW, now - self.extraction_started_at)
+        return len(self.completions) / window * 60 if window > 0 else 0.0
+
+    def snapshot(self, now):
+        probe = {}
+        if self.probe and self.phase != PHASE_DONE:
+            try:
+                probe = self.probe() or {}
+            except Exception as e:
+                probe = {"probe_error": str(e)}
+        frontier = probe.pop("frontier", {})
+        remaining = frontier.get("pending", 0) + frontier.get("in_progress", 0)
+        rate = self.rate(now)
+        return {
+            "name": self.name,
+            "phase": self.phase,
+            "elapsed_seconds": round((self.finished_at or now) - self.started_at, 1),
+            "frontier": frontier,
+            "frontier_size": sum(frontier.values()),
+            "courses_done": self.courses_done,
+            "remaining": remaining,
+            "rate_per_min": round(rate, 2),
+            "eta_seconds": round(remaining / rate * 60) if rate and remaining else None,
+            "error_count": self.error_count,
+            "recent_errors": list(self.errors),
+            "outcome": self.outcome,
+            "stop_requested": self.stop_requested,
+            **probe,
+        }
+
+
+class RunStatus:
+    def __init__(self, run_id=None, status_file=DEFAULT_STATUS_FILE, interval=5, spend_fn=None):
+        """`spend_fn()`: gasto LLM total de la ejecución (ej. el del gobernador)."""
+        self.run_id = run_id or time.strftime("%Y%m%d_%H%M%S")
+        self.status_file = status_file
+        self.interval = interval
+        self.spend_fn = spend_fn
+        self.started_at = time.time()
+        self.sites = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.server = None
+
+    # === Eventos de los scrapers ===
+    def site_started(self, site, name, probe=None):
+        with self._lock:
+            self.sites[site] = SiteStatus(site, name, probe)
+
+    def _site(self, site):
+        status = self.sites.get(site)
+        if status is None:
+            status = self.sites[site] = SiteStatus(site, site)
+        return status
+
+    def set_phase(self, site, phase):
+        with self._lock:
+            status = self._site(site)
+            status.phase = phase
+            if phase == PHASE_EXTRACTION and status.extraction_started_at is None:
+                status.extraction_started_at = time.time()
+
+    def course_done(self, site):
+        with self._lock:
+            status = self._site(site)
+            status.courses_done += 1
+            status.completions.append(time.time())
+
+    def error(self, site, message):
+        with self._lock:
+            status = self._site(site)
+            status.error_count += 1
+            status.errors.append({"time": time.strftime("%H:%M:%S"), "message": str(message)[:200]})
+
+    def site_finished(self, site, outcome="ok"):
+        with self._lock:
+            status = self._site(site)
+            status.phase = PHASE_DONE
+            status.outcome = outcome
+            status.finished_at = time.time()
+        self.write()
+
+    # === Corte manual ===
+    def request_stop(self, site):
+        with self._lock:
+            if site not in self.sites:
+                return False
+            self.sites[site].stop_requested = True
+        print(f"\n✋ Corte pedido para {site}")
+        return True
+
+    def stop_requested(self, site):
+        """Motivo de corte si el operador lo pidió (HTTP o archivo output/stop_<sitio>), o None."""
+        stop_file = STOP_FILE_PATTERN.format(site=site)
+        if os.path.exists(stop_file):
+            os.remove(stop_file)
+            self.request_stop(site)
+        with self._lock:
+            status = self.sites.get(site)
+            return STOP_REASON if status and status.stop_requested else None
+
+    # === Publicación ===
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            sites = list(self.sites.values())
+        spend = None
+        if self.spend_fn:
+            try:
+                spend = round(self.spend_fn(), 4)
+            except Exception:
+                pass
+        return {
+            "run_id": self.run_id,
+            "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "elapsed_seconds": round(now - self.started_at, 1),
+            "llm_spend_usd": spend,
+            "active": [status.site for status in sites if status.phase != PHASE_DONE],
+            "sites": {status.site: status.snapshot(now) for status in sites},
+        }
+
+    def write(self):
+        directory = os.path.dirname(self.status_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = self.status_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.status_file)  # Quien lo lea nunca ve un JSON a medias
+
+    def start(self, port=None):
+        """Arranca el hilo que reescribe el archivo y, si hay `port`, el endpoint HTTP."""
+        self._thread = threading.Thread(target=self._run, name="run-status", daemon=True)
+        self._thread.start()
+        if port:
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, name="status-http", daemon=True).start()
+            print(f"📡 Estado en vivo: http://localhost:{port}/status (cortar un sitio: POST /stop?site=<dir_name>)")
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                print(f"   ⚠️  No se pudo escribir {self.status_file}: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        self.write()
+
+    def _handler(self):
+        run_status = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if urlsplit(self.path).path.rstrip("/") not in ("", "/status"):
+                    self._json(404, {"error": "usa /status"})
+                    return
+                self._json(200, run_status.snapshot())
+
+            def do_POST(self):
+                parts = urlsplit(self.path)
+                site = parse_qs(parts.query).get("site", [None])[0]
+                if parts.path.rstrip("/") != "/stop" or not site:
+                    self._json(400, {"error": "usa POST /stop?site=<dir_name>"})
+                    return
+                if run_status.request_stop(site):
+                    self._json(200, {"site": site, "stop_requested": True})
+                else:
+                    self._json(404, {"error": f"sitio no activo: {site}"})
+
+            def _json(self, status, payload):
+                body = json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+# Estado del proceso (solo en memoria si nadie lo configuró y arrancó)
+_shared = ProcessSingleton(RunStatus)
+configure_status = _shared.configure
+get_run_status = _shared.get